@@ -0,0 +1,56 @@
+"""add gpu allocations
+
+Revision ID: a2d7f4c9e6b8
+Revises: f6b9d2e4a8c1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a2d7f4c9e6b8"
+down_revision: Union[str, None] = "f6b9d2e4a8c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("gpu_allocations"):
+        return
+
+    op.create_table(
+        "gpu_allocations",
+        sa.Column("node", sa.String(length=64), nullable=False),
+        sa.Column("gpu_index", sa.Integer(), nullable=False),
+        sa.Column("environment_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("node", "gpu_index"),
+    )
+    op.create_index("ix_gpu_allocations_environment_id", "gpu_allocations", ["environment_id"])
+
+    # Host environments that currently hold GPUs; the oldest wins if two share an index.
+    if inspector.has_table("environments"):
+        op.execute(
+            """
+            INSERT INTO gpu_allocations (node, gpu_index, environment_id)
+            SELECT DISTINCT ON (gpu_index) 'local', gpu_index, id
+            FROM environments, unnest(gpu_indices) AS gpu_index
+            WHERE worker_server_id IS NULL
+              AND status IN ('creating', 'building', 'running', 'starting')
+            ORDER BY gpu_index, created_at
+            """
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("gpu_allocations"):
+        op.drop_table("gpu_allocations")
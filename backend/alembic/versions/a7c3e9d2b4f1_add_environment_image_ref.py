@@ -0,0 +1,41 @@
+"""add environment image ref
+
+Revision ID: a7c3e9d2b4f1
+Revises: e4c8a2f6b1d7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e9d2b4f1"
+down_revision: Union[str, None] = "e4c8a2f6b1d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    columns = {col["name"] for col in inspector.get_columns("environments")}
+    if "image_ref" not in columns:
+        op.add_column("environments", sa.Column("image_ref", sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    columns = {col["name"] for col in inspector.get_columns("environments")}
+    if "image_ref" in columns:
+        op.drop_column("environments", "image_ref")
@@ -0,0 +1,44 @@
+"""add environment build logs
+
+Revision ID: c9e2d4f7a1b3
+Revises: a7c3e9d2b4f1
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e2d4f7a1b3"
+down_revision: Union[str, None] = "a7c3e9d2b4f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("environment_build_logs") or not inspector.has_table("environments"):
+        return
+
+    op.create_table(
+        "environment_build_logs",
+        sa.Column("environment_id", sa.UUID(), nullable=False),
+        sa.Column("log_gzip", sa.LargeBinary(), nullable=False),
+        sa.Column("line_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["environment_id"], ["environments.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("environment_id"),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("environment_build_logs"):
+        op.drop_table("environment_build_logs")
@@ -0,0 +1,58 @@
+"""add warm containers
+
+Revision ID: d5f8b2c6e9a4
+Revises: c9e2d4f7a1b3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f8b2c6e9a4"
+down_revision: Union[str, None] = "c9e2d4f7a1b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("warm_containers") or not inspector.has_table("templates"):
+        return
+
+    op.create_table(
+        "warm_containers",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("template_id", sa.UUID(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("enable_jupyter", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+        sa.Column("enable_code_server", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+        sa.Column("status", sa.String(length=32), nullable=False, server_default=sa.text("'warming'")),
+        sa.Column("container_name", sa.String(length=255), nullable=False),
+        sa.Column("image_ref", sa.String(length=255), nullable=True),
+        sa.Column("ssh_port", sa.Integer(), nullable=False),
+        sa.Column("jupyter_port", sa.Integer(), nullable=False),
+        sa.Column("code_port", sa.Integer(), nullable=False),
+        sa.Column("jupyter_token", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["template_id"], ["templates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("container_name"),
+        sa.UniqueConstraint("ssh_port"),
+        sa.UniqueConstraint("jupyter_port"),
+        sa.UniqueConstraint("code_port"),
+    )
+    op.create_index("ix_warm_containers_claim", "warm_containers", ["content_hash", "status"])
+    op.create_index("ix_warm_containers_template_id", "warm_containers", ["template_id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("warm_containers"):
+        op.drop_table("warm_containers")
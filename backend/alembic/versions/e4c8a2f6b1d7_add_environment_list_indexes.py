@@ -0,0 +1,50 @@
+"""add environment list indexes
+
+Revision ID: e4c8a2f6b1d7
+Revises: b7d4a1e9c2f3
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4c8a2f6b1d7"
+down_revision: Union[str, None] = "b7d4a1e9c2f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ENVIRONMENT_INDEXES = {
+    "ix_environments_status": ["status"],
+    "ix_environments_worker_server_id": ["worker_server_id"],
+    "ix_environments_created_at_id": ["created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    existing = {index["name"] for index in inspector.get_indexes("environments")}
+    for name, columns in ENVIRONMENT_INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "environments", columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    existing = {index["name"] for index in inspector.get_indexes("environments")}
+    for name in ENVIRONMENT_INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name="environments")
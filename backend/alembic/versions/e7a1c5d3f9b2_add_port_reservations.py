@@ -0,0 +1,81 @@
+"""add port reservations
+
+Revision ID: e7a1c5d3f9b2
+Revises: d5f8b2c6e9a4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a1c5d3f9b2"
+down_revision: Union[str, None] = "d5f8b2c6e9a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("port_reservations"):
+        return
+
+    op.create_table(
+        "port_reservations",
+        sa.Column("node", sa.String(length=64), nullable=False),
+        sa.Column("port", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("node", "port"),
+    )
+    op.create_index("ix_port_reservations_owner_id", "port_reservations", ["owner_id"])
+
+    # Backfill everything that already holds a host port on this node.
+    if inspector.has_table("environments"):
+        for column, kind in (("ssh_port", "ssh"), ("jupyter_port", "jupyter"), ("code_port", "code")):
+            op.execute(
+                f"""
+                INSERT INTO port_reservations (node, port, kind, owner_id)
+                SELECT 'local', {column},
+                       CASE WHEN worker_server_id IS NULL THEN '{kind}' ELSE 'surrogate' END, id
+                FROM environments
+                ON CONFLICT DO NOTHING
+                """
+            )
+    if inspector.has_table("warm_containers"):
+        for column, kind in (("ssh_port", "ssh"), ("jupyter_port", "jupyter"), ("code_port", "code")):
+            op.execute(
+                f"""
+                INSERT INTO port_reservations (node, port, kind, owner_id)
+                SELECT 'local', {column}, '{kind}', id FROM warm_containers
+                ON CONFLICT DO NOTHING
+                """
+            )
+    if inspector.has_table("settings"):
+        op.execute(
+            """
+            INSERT INTO port_reservations (node, port, kind, owner_id)
+            SELECT 'local', (mapping->>'host_port')::int, 'custom', substring(s.key from 14)::uuid
+            FROM settings s, jsonb_array_elements(
+                CASE WHEN jsonb_typeof(s.value::jsonb) = 'array' THEN s.value::jsonb ELSE '[]'::jsonb END
+            ) AS mapping
+            WHERE s.key LIKE 'custom\\_ports:%'
+              AND s.value ~ '^\\s*\\['
+              AND substring(s.key from 14) ~ '^[0-9a-fA-F-]{36}$'
+              AND (mapping->>'host_port') ~ '^[0-9]+$'
+            ON CONFLICT DO NOTHING
+            """
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("port_reservations"):
+        op.drop_table("port_reservations")
@@ -0,0 +1,109 @@
+"""move environment settings to columns
+
+Revision ID: f6b9d2e4a8c1
+Revises: e7a1c5d3f9b2
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6b9d2e4a8c1"
+down_revision: Union[str, None] = "e7a1c5d3f9b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    columns = {col["name"] for col in inspector.get_columns("environments")}
+    if "custom_ports" not in columns:
+        op.add_column(
+            "environments",
+            sa.Column(
+                "custom_ports",
+                postgresql.JSONB(astext_type=sa.Text()),
+                server_default=sa.text("'[]'::jsonb"),
+                nullable=False,
+            ),
+        )
+    if "jupyter_token" not in columns:
+        op.add_column("environments", sa.Column("jupyter_token", sa.Text(), nullable=True))
+    if "build_error" not in columns:
+        op.add_column("environments", sa.Column("build_error", sa.Text(), nullable=True))
+
+    if not inspector.has_table("settings"):
+        return
+
+    op.execute(
+        """
+        UPDATE environments e
+        SET custom_ports = s.value::jsonb
+        FROM settings s
+        WHERE s.key = 'custom_ports:' || e.id::text
+          AND s.value ~ '^\\s*\\['
+        """
+    )
+    op.execute(
+        """
+        UPDATE environments e
+        SET jupyter_token = s.value
+        FROM settings s
+        WHERE s.key = 'jupyter_token:' || e.id::text
+        """
+    )
+    op.execute(
+        """
+        UPDATE environments e
+        SET build_error = NULLIF(btrim(s.value), '')
+        FROM settings s
+        WHERE s.key = 'build_error:' || e.id::text
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM settings
+        WHERE key LIKE 'custom\\_ports:%'
+           OR key LIKE 'jupyter\\_token:%'
+           OR key LIKE 'build\\_error:%'
+        """
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("environments"):
+        return
+
+    columns = {col["name"] for col in inspector.get_columns("environments")}
+    if inspector.has_table("settings"):
+        for column, prefix in (
+            ("custom_ports", "custom_ports:"),
+            ("jupyter_token", "jupyter_token:"),
+            ("build_error", "build_error:"),
+        ):
+            if column not in columns:
+                continue
+            op.execute(
+                f"""
+                INSERT INTO settings (key, value)
+                SELECT '{prefix}' || id::text, {column}::text
+                FROM environments
+                WHERE {column} IS NOT NULL
+                ON CONFLICT (key) DO NOTHING
+                """
+            )
+    for column in ("build_error", "jupyter_token", "custom_ports"):
+        if column in columns:
+            op.drop_column("environments", column)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import redis
+from redis.exceptions import RedisError
+
+from .env import resolve_int_env
+from .task_redis import get_task_redis
+
+
+BUILD_ADMISSION_KEY_PREFIX = "lyra:build-admission:"
+BUILD_ADMISSION_POLL_SECONDS = 2.0
+# A waiter that stops polling for this long (crashed worker) loses its place in the queue.
+BUILD_ADMISSION_WAITER_STALE_SECONDS = 30
+logger = logging.getLogger(__name__)
+
+# Returns 0 when the slot is granted, otherwise the 1-based position among waiters.
+_ACQUIRE_SCRIPT = """
+local slots, queue, heartbeats = KEYS[1], KEYS[2], KEYS[3]
+local member = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease_seconds = tonumber(ARGV[3])
+local max_slots = tonumber(ARGV[4])
+local stale_after = tonumber(ARGV[5])
+
+redis.call('ZREMRANGEBYSCORE', slots, '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', heartbeats, '-inf', now - stale_after)
+for _, waiter in ipairs(stale) do
+  redis.call('ZREM', queue, waiter)
+  redis.call('ZREM', heartbeats, waiter)
+end
+
+if redis.call('ZSCORE', slots, member) then
+  redis.call('ZADD', slots, now + lease_seconds, member)
+  return 0
+end
+
+redis.call('ZADD', queue, 'NX', now, member)
+redis.call('ZADD', heartbeats, now, member)
+local free = max_slots - redis.call('ZCARD', slots)
+local rank = redis.call('ZRANK', queue, member)
+if rank < free then
+  redis.call('ZADD', slots, now + lease_seconds, member)
+  redis.call('ZREM', queue, member)
+  redis.call('ZREM', heartbeats, member)
+  return 0
+end
+return rank - math.max(free, 0) + 1
+"""
+
+
+class BuildAdmissionTimeout(RuntimeError):
+    pass
+
+
+def resolve_max_concurrent_builds() -> int:
+    return resolve_int_env("LYRA_MAX_CONCURRENT_BUILDS", 2, 1, 64)
+
+
+def resolve_build_min_free_disk_bytes() -> int:
+    # 0 disables the disk watermark.
+    return resolve_int_env("LYRA_BUILD_MIN_FREE_DISK_GB", 10, 0, 100000) * 1024 ** 3
+
+
+def resolve_build_admission_timeout_seconds() -> int:
+    return resolve_int_env("LYRA_BUILD_ADMISSION_TIMEOUT_SECONDS", 3600, 60, 24 * 3600)
+
+
+def resolve_build_slot_lease_seconds() -> int:
+    return resolve_int_env("LYRA_BUILD_SLOT_LEASE_SECONDS", 300, 30, 3600)
+
+
+_docker_info: dict[str, Any] | None = None
+
+
+def _load_docker_info(client) -> dict[str, Any]:
+    global _docker_info
+    if _docker_info is None:
+        try:
+            _docker_info = client.info() or {}
+        except Exception as error:  # noqa: BLE001
+            logger.warning("Docker info unavailable for build admission: %s", error)
+            return {}
+    return _docker_info
+
+
+def resolve_build_node_id(client) -> str:
+    # The daemon ID is shared by every worker container using the same Docker socket,
+    # so the build and ops workers on one host count against one limit.
+    return str(_load_docker_info(client).get("ID") or socket.gethostname())
+
+
+def free_docker_disk_bytes(client) -> int | None:
+    root = (os.getenv("LYRA_DOCKER_ROOT_PATH", "") or "").strip() or _load_docker_info(client).get("DockerRootDir")
+    if not root or not os.path.exists(root):
+        return None
+    try:
+        return shutil.disk_usage(root).free
+    except OSError:
+        return None
+
+
+def build_admission_keys(node_id: str) -> list[str]:
+    prefix = f"{BUILD_ADMISSION_KEY_PREFIX}{node_id}"
+    return [f"{prefix}:slots", f"{prefix}:queue", f"{prefix}:heartbeats"]
+
+
+class BuildAdmission:
+    # Node-scoped semaphore for image builds. A build waits for a slot in FIFO order,
+    # and also waits while free space under the Docker root is below the watermark.
+    def __init__(
+        self,
+        client,
+        holder: str,
+        on_wait: Callable[[dict[str, Any]], None] | None = None,
+        redis_client: redis.Redis | None = None,
+    ):
+        self.client = client
+        self.holder = str(holder)
+        self.on_wait = on_wait
+        self._redis = redis_client
+        self._keys = build_admission_keys(resolve_build_node_id(client))
+        self._lease_seconds = resolve_build_slot_lease_seconds()
+        self._last_wait: dict[str, Any] | None = None
+        self._stop_renewal = threading.Event()
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = get_task_redis()
+        return self._redis
+
+    def _report_wait(self, wait: dict[str, Any]) -> None:
+        if wait == self._last_wait:
+            return
+        self._last_wait = wait
+        if self.on_wait is not None:
+            self.on_wait(wait)
+
+    def _disk_wait(self) -> dict[str, Any] | None:
+        watermark = resolve_build_min_free_disk_bytes()
+        if watermark <= 0:
+            return None
+        free_bytes = free_docker_disk_bytes(self.client)
+        if free_bytes is None or free_bytes >= watermark:
+            return None
+        return {"reason": "disk", "free_bytes": free_bytes, "required_bytes": watermark}
+
+    def try_acquire(self) -> int:
+        return int(
+            self._client().eval(
+                _ACQUIRE_SCRIPT,
+                len(self._keys),
+                *self._keys,
+                self.holder,
+                time.time(),
+                self._lease_seconds,
+                resolve_max_concurrent_builds(),
+                BUILD_ADMISSION_WAITER_STALE_SECONDS,
+            )
+        )
+
+    def acquire(self) -> None:
+        deadline = time.monotonic() + resolve_build_admission_timeout_seconds()
+        while True:
+            wait = self._disk_wait()
+            if wait is None:
+                position = self.try_acquire()
+                if position == 0:
+                    return
+                wait = {"reason": "queue", "position": position}
+            self._report_wait(wait)
+            if time.monotonic() >= deadline:
+                self._leave_queue()
+                raise BuildAdmissionTimeout(
+                    "build_admission_timeout Build was not admitted in time "
+                    f"({'low disk space' if wait['reason'] == 'disk' else 'build queue is full'})"
+                )
+            time.sleep(BUILD_ADMISSION_POLL_SECONDS)
+
+    def _leave_queue(self) -> None:
+        try:
+            pipe = self._client().pipeline(transaction=False)
+            pipe.zrem(self._keys[1], self.holder)
+            pipe.zrem(self._keys[2], self.holder)
+            pipe.execute()
+        except (RedisError, OSError):
+            pass
+
+    def _renew_lease(self) -> None:
+        while not self._stop_renewal.wait(self._lease_seconds / 3):
+            try:
+                self._client().zadd(self._keys[0], {self.holder: time.time() + self._lease_seconds}, xx=True)
+            except (RedisError, OSError) as error:
+                logger.warning("Failed to renew build slot for %s: %s", self.holder, error)
+
+    def release(self) -> None:
+        self._stop_renewal.set()
+        try:
+            self._client().zrem(self._keys[0], self.holder)
+        except (RedisError, OSError) as error:
+            logger.warning("Failed to release build slot for %s: %s", self.holder, error)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        try:
+            self.acquire()
+        except (RedisError, OSError) as error:
+            # Without Redis the node falls back to Celery concurrency alone.
+            logger.warning("Build admission unavailable, building without a slot: %s", error)
+            yield
+            return
+        renewal = threading.Thread(target=self._renew_lease, name=f"build-slot-{self.holder}", daemon=True)
+        renewal.start()
+        try:
+            yield
+        finally:
+            self.release()
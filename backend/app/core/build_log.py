@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from typing import Any
+
+import redis
+from redis.exceptions import RedisError
+
+from .task_redis import get_task_redis
+
+
+BUILD_LOG_KEY_PREFIX = "lyra:build:"
+BUILD_LOG_BACKLOG_MAX_EVENTS = 5000
+BUILD_LOG_BACKLOG_TTL_SECONDS = 3600
+BUILD_LOG_MAX_BYTES = 8 * 1024 * 1024
+BUILD_LOG_TRUNCATED_MARKER = "[lyra] Build log truncated; later output was not stored.\n"
+# Layer download/extract progress is live-only; it would swamp the stored log.
+BUILD_LOG_LIVE_ONLY_EVENT_TYPES = {"progress"}
+logger = logging.getLogger(__name__)
+
+
+def build_log_channel(environment_id: str) -> str:
+    return f"{BUILD_LOG_KEY_PREFIX}{environment_id}:events"
+
+
+def build_log_backlog_key(environment_id: str) -> str:
+    return f"{BUILD_LOG_KEY_PREFIX}{environment_id}:backlog"
+
+
+def build_event_from_chunk(chunk: dict[str, Any]) -> dict[str, Any] | None:
+    if not isinstance(chunk, dict):
+        return None
+    if chunk.get("error"):
+        return {"type": "error", "line": f"{chunk['error']}\n"}
+    stream = chunk.get("stream")
+    if isinstance(stream, str) and stream:
+        event_type = "step" if stream.startswith("Step ") else "log"
+        return {"type": event_type, "line": stream}
+    status = chunk.get("status")
+    if isinstance(status, str) and status:
+        event: dict[str, Any] = {"type": "progress", "status": status}
+        if chunk.get("id"):
+            event["id"] = str(chunk["id"])
+        if chunk.get("progress"):
+            event["progress"] = str(chunk["progress"])
+        return event
+    return None
+
+
+def compress_build_log(text: str) -> bytes:
+    return gzip.compress(text.encode("utf-8"), compresslevel=6)
+
+
+def decompress_build_log(blob: bytes) -> str:
+    return gzip.decompress(blob).decode("utf-8", errors="replace")
+
+
+def page_build_log_lines(lines: list[str], offset: int, limit: int, complete: bool) -> dict[str, Any]:
+    offset = max(0, offset)
+    page = lines[offset:offset + limit]
+    return {
+        "lines": page,
+        "offset": offset,
+        "next_offset": offset + len(page),
+        "total": len(lines),
+        "complete": complete,
+    }
+
+
+class BuildLogPublisher:
+    # Publishes build output for one environment to Redis as it is produced and
+    # keeps the full text so the task can store it compressed afterwards.
+    def __init__(self, environment_id: str, redis_client: redis.Redis | None = None):
+        self.environment_id = str(environment_id)
+        self._redis = redis_client
+        self._redis_enabled = True
+        self._seq = 0
+        self._lines: list[str] = []
+        self._size = 0
+        self._truncated = False
+        self.finished = False
+        self._reset_backlog()
+
+    def _client(self) -> redis.Redis | None:
+        if not self._redis_enabled:
+            return None
+        if self._redis is None:
+            self._redis = get_task_redis()
+        return self._redis
+
+    def _disable_redis(self, error: Exception) -> None:
+        # A Redis outage must never fail the build; live tailing just stops.
+        logger.warning("Build log publishing disabled for environment %s: %s", self.environment_id, error)
+        self._redis_enabled = False
+
+    def _reset_backlog(self) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.delete(build_log_backlog_key(self.environment_id))
+        except (RedisError, OSError) as error:
+            self._disable_redis(error)
+
+    def _append_line(self, line: str) -> None:
+        if self._truncated:
+            return
+        encoded_size = len(line.encode("utf-8"))
+        if self._size + encoded_size > BUILD_LOG_MAX_BYTES:
+            self._truncated = True
+            self._lines.append(BUILD_LOG_TRUNCATED_MARKER)
+            return
+        self._size += encoded_size
+        self._lines.append(line)
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self._seq += 1
+        event = {"seq": self._seq, **event}
+        live_only = event.get("type") in BUILD_LOG_LIVE_ONLY_EVENT_TYPES
+        if not live_only and event.get("line"):
+            self._append_line(str(event["line"]))
+
+        client = self._client()
+        if client is None:
+            return
+        payload = json.dumps(event, separators=(",", ":"))
+        backlog_key = build_log_backlog_key(self.environment_id)
+        try:
+            pipe = client.pipeline(transaction=False)
+            if not live_only:
+                pipe.rpush(backlog_key, payload)
+                pipe.ltrim(backlog_key, -BUILD_LOG_BACKLOG_MAX_EVENTS, -1)
+                pipe.expire(backlog_key, BUILD_LOG_BACKLOG_TTL_SECONDS)
+            pipe.publish(build_log_channel(self.environment_id), payload)
+            pipe.execute()
+        except (RedisError, OSError) as error:
+            self._disable_redis(error)
+
+    def publish_chunk(self, chunk: dict[str, Any]) -> None:
+        event = build_event_from_chunk(chunk)
+        if event is not None:
+            self.publish(event)
+
+    def log(self, line: str) -> None:
+        self.publish({"type": "log", "line": line if line.endswith("\n") else f"{line}\n"})
+
+    def finish(self, status: str) -> None:
+        self.finished = True
+        self.publish({"type": "done", "status": status})
+
+    @property
+    def text(self) -> str:
+        return "".join(self._lines)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._lines)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import docker
+
+
+LYRA_MANAGED_LABEL = "lyra.managed"
+LYRA_ENVIRONMENT_ID_LABEL = "lyra.environment_id"
+LYRA_CONTAINER_NAME_PREFIX = "lyra-"
+_STATE_EVENT_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "die",
+    "stop",
+    "kill",
+    "oom",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+}
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContainerState:
+    container_id: str
+    name: str
+    environment_id: str | None
+    status: str
+    exit_code: int | None
+    oom_killed: bool
+    error: str
+    started_at: str | None
+    finished_at: str | None
+
+    @property
+    def short_id(self) -> str:
+        return self.container_id[:12]
+
+
+def container_state_from_attrs(attrs: dict[str, Any]) -> ContainerState | None:
+    container_id = str(attrs.get("Id") or "").strip()
+    name = str(attrs.get("Name") or "").lstrip("/")
+    if not container_id or not name:
+        return None
+    labels = (attrs.get("Config") or {}).get("Labels") or {}
+    state = attrs.get("State") or {}
+    exit_code = state.get("ExitCode")
+    return ContainerState(
+        container_id=container_id,
+        name=name,
+        environment_id=labels.get(LYRA_ENVIRONMENT_ID_LABEL),
+        status=str(state.get("Status") or ""),
+        exit_code=int(exit_code) if isinstance(exit_code, int) else None,
+        oom_killed=bool(state.get("OOMKilled", False)),
+        error=str(state.get("Error") or ""),
+        started_at=state.get("StartedAt") or None,
+        finished_at=state.get("FinishedAt") or None,
+    )
+
+
+class ContainerStateIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: dict[str, ContainerState] = {}
+        self._by_name: dict[str, ContainerState] = {}
+        self._by_environment_id: dict[str, ContainerState] = {}
+        self._synced = False
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def is_synced(self) -> bool:
+        return self._synced
+
+    def replace_all(self, states: list[ContainerState]) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_name.clear()
+            self._by_environment_id.clear()
+            for state in states:
+                self._add_locked(state)
+            self._synced = True
+        self._notify_listeners()
+
+    def upsert(self, state: ContainerState) -> None:
+        with self._lock:
+            self._remove_locked(state.container_id)
+            self._add_locked(state)
+        self._notify_listeners()
+
+    def remove(self, container_id: str) -> None:
+        with self._lock:
+            self._remove_locked(container_id)
+        self._notify_listeners()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify_listeners(self) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Container state listener failed: %s", error)
+
+    def mark_stale(self) -> None:
+        self._synced = False
+
+    def find(self, environment_id: str, name: str) -> ContainerState | None:
+        with self._lock:
+            return self._by_environment_id.get(str(environment_id)) or self._by_name.get(name)
+
+    def _add_locked(self, state: ContainerState) -> None:
+        self._by_id[state.container_id] = state
+        self._by_name[state.name] = state
+        if state.environment_id:
+            self._by_environment_id[state.environment_id] = state
+
+    def _remove_locked(self, container_id: str) -> None:
+        previous = self._by_id.pop(container_id, None)
+        if previous is None:
+            return
+        if self._by_name.get(previous.name) is previous:
+            self._by_name.pop(previous.name, None)
+        if previous.environment_id and self._by_environment_id.get(previous.environment_id) is previous:
+            self._by_environment_id.pop(previous.environment_id, None)
+
+
+class ContainerStateWatcher:
+    def __init__(self, index: ContainerStateIndex):
+        self._index = index
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stream = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="lyra-docker-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._close_stream()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self._index.mark_stale()
+
+    def _close_stream(self) -> None:
+        stream = self._stream
+        self._stream = None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def _run(self) -> None:
+        backoff_seconds = 1.0
+        while not self._stop_event.is_set():
+            try:
+                client = docker.from_env()
+                # Subscribe from before the resync so changes made while listing are replayed.
+                since = int(time.time())
+                self.resync(client)
+                self._stream = client.events(decode=True, since=since, filters={"type": "container"})
+                backoff_seconds = 1.0
+                for event in self._stream:
+                    if self._stop_event.is_set():
+                        break
+                    self.handle_event(client, event)
+            except Exception as error:  # noqa: BLE001
+                if not self._stop_event.is_set():
+                    logger.warning("Docker event stream failed; container state index is stale: %s", error)
+            finally:
+                self._index.mark_stale()
+                self._close_stream()
+            if self._stop_event.wait(backoff_seconds):
+                break
+            backoff_seconds = min(backoff_seconds * 2, 30.0)
+
+    def resync(self, client) -> None:
+        states = []
+        containers = client.containers.list(all=True, filters={"name": LYRA_CONTAINER_NAME_PREFIX}, ignore_removed=True)
+        for container in containers:
+            state = container_state_from_attrs(container.attrs)
+            if state is not None and state.name.startswith(LYRA_CONTAINER_NAME_PREFIX):
+                states.append(state)
+        self._index.replace_all(states)
+
+    def handle_event(self, client, event: dict[str, Any]) -> None:
+        if event.get("Type") != "container":
+            return
+        actor = event.get("Actor") or {}
+        attributes = actor.get("Attributes") or {}
+        name = str(attributes.get("name") or "")
+        if not name.startswith(LYRA_CONTAINER_NAME_PREFIX) and LYRA_MANAGED_LABEL not in attributes:
+            return
+        container_id = str(actor.get("ID") or event.get("id") or "")
+        if not container_id:
+            return
+
+        action = str(event.get("Action") or event.get("status") or "").split(":", 1)[0].strip()
+        if action == "destroy":
+            self._index.remove(container_id)
+            return
+        if action not in _STATE_EVENT_ACTIONS:
+            return
+
+        try:
+            attrs = client.api.inspect_container(container_id)
+        except docker.errors.NotFound:
+            self._index.remove(container_id)
+            return
+        state = container_state_from_attrs(attrs)
+        if state is not None:
+            self._index.upsert(state)
+
+
+container_state_index = ContainerStateIndex()
+_watcher: ContainerStateWatcher | None = None
+
+
+def _is_container_events_enabled() -> bool:
+    raw = (os.getenv("LYRA_CONTAINER_EVENTS_ENABLED", "true") or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def start_container_state_watcher() -> None:
+    global _watcher
+    if _watcher is not None or not _is_container_events_enabled():
+        return
+    _watcher = ContainerStateWatcher(container_state_index)
+    _watcher.start()
+
+
+def stop_container_state_watcher() -> None:
+    global _watcher
+    if _watcher is None:
+        return
+    _watcher.stop()
+    _watcher = None
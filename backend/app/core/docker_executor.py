@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from .env import resolve_int_env
+
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {
+    "queued": 0,
+    "active": 0,
+    "completed": 0,
+    "failed": 0,
+    "last_queue_wait_ms": 0,
+    "max_queue_wait_ms": 0,
+}
+
+
+def _resolve_docker_executor_size() -> int:
+    return resolve_int_env("LYRA_DOCKER_EXECUTOR_THREADS", 8, 1, 64)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is None:
+            _executor_size = _resolve_docker_executor_size()
+            _executor = ThreadPoolExecutor(max_workers=_executor_size, thread_name_prefix="lyra-docker")
+        return _executor
+
+
+async def run_docker(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Docker SDK and NVML calls block on sockets/drivers; keep them off the event loop
+    # and on a bounded pool so a slow daemon cannot starve unrelated requests.
+    submitted_at = time.monotonic()
+    with _metrics_lock:
+        _metrics["queued"] += 1
+
+    def _call() -> T:
+        wait_ms = int((time.monotonic() - submitted_at) * 1000)
+        with _metrics_lock:
+            _metrics["queued"] -= 1
+            _metrics["active"] += 1
+            _metrics["last_queue_wait_ms"] = wait_ms
+            _metrics["max_queue_wait_ms"] = max(_metrics["max_queue_wait_ms"], wait_ms)
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with _metrics_lock:
+                _metrics["active"] -= 1
+                _metrics["completed"] += 1
+                if failed:
+                    _metrics["failed"] += 1
+
+    future = _get_executor().submit(_call)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if future.cancel():
+            # Never started, so _call did not get a chance to leave the queue.
+            with _metrics_lock:
+                _metrics["queued"] -= 1
+        raise
+
+
+def get_docker_executor_metrics() -> dict[str, Any]:
+    with _executor_lock:
+        max_workers = _executor_size if _executor is not None else _resolve_docker_executor_size()
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    snapshot["max_workers"] = max_workers
+    snapshot["saturation"] = round(min(snapshot["active"] / max_workers, 1.0), 3) if max_workers else 0.0
+    return snapshot
+
+
+def shutdown_docker_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor = _executor
+        _executor = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
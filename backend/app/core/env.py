@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import os
+
+
+def resolve_int_env(name: str, default: int, minimum: int, maximum: int) -> int:
+    raw = (os.getenv(name, "") or "").strip()
+    try:
+        value = int(raw) if raw else default
+    except ValueError:
+        value = default
+    if value < minimum:
+        return minimum
+    if value > maximum:
+        return maximum
+    return value
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable
+
+
+StreamLoader = Callable[[], Awaitable[tuple[list[dict[str, Any]], list[dict[str, Any]]]]]
+STREAM_QUEUE_SIZE = 256
+STREAM_COALESCE_SECONDS = 0.25
+logger = logging.getLogger(__name__)
+
+
+def resolve_environment_stream_interval() -> float:
+    raw = (os.getenv("LYRA_ENVIRONMENT_STREAM_INTERVAL_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 5.0
+    except ValueError:
+        value = 5.0
+    if value < 1.0:
+        return 1.0
+    if value > 60.0:
+        return 60.0
+    return value
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EnvironmentStreamHub:
+    # One refresh loop per process feeds every open stream, so backend load follows
+    # the rate of state changes instead of the number of connected dashboards.
+    def __init__(self, loader: StreamLoader):
+        self._loader = loader
+        self._subscribers: set[asyncio.Queue] = set()
+        self._environments: dict[str, dict[str, Any]] | None = None
+        self._workers: dict[str, dict[str, Any]] = {}
+        self._refresh_lock: asyncio.Lock | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._refresh_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._environments = None
+
+    async def subscribe(self) -> asyncio.Queue:
+        self._bind_loop()
+        if self._environments is None:
+            await self.refresh()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        self._put_snapshot(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._wakeup is not None:
+            self._wakeup.set()
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def notify_threadsafe(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self.notify)
+        except RuntimeError:
+            pass
+
+    async def refresh(self) -> None:
+        self._bind_loop()
+        async with self._refresh_lock:
+            rows, workers = await self._loader()
+            environments = {str(row["id"]): row for row in rows}
+            next_workers = {str(worker["id"]): worker for worker in workers}
+            previous = self._environments
+            previous_workers = self._workers
+            self._environments = environments
+            self._workers = next_workers
+            if previous is None:
+                return
+
+            events: list[tuple[str, Any]] = []
+            for env_id, row in environments.items():
+                old_row = previous.get(env_id)
+                if old_row is None:
+                    events.append(("environment.created", row))
+                elif old_row != row:
+                    events.append(("environment.updated", row))
+            for env_id in previous.keys() - environments.keys():
+                events.append(("environment.deleted", {"id": env_id}))
+            for worker_id, worker in next_workers.items():
+                old_worker = previous_workers.get(worker_id)
+                if old_worker is None or old_worker.get("health_status") != worker.get("health_status"):
+                    events.append(("worker.health", worker))
+            for event in events:
+                self._broadcast(*event)
+
+    def _snapshot_payload(self) -> dict[str, Any]:
+        return {
+            "environments": list((self._environments or {}).values()),
+            "workers": list(self._workers.values()),
+        }
+
+    def _put_snapshot(self, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(("snapshot", self._snapshot_payload()))
+
+    def _broadcast(self, event: str, data: Any) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A consumer that fell behind gets a fresh snapshot instead of a gap.
+                self._put_snapshot(queue)
+
+    async def _run(self) -> None:
+        interval = resolve_environment_stream_interval()
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                await asyncio.sleep(STREAM_COALESCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._subscribers:
+                break
+            try:
+                await self.refresh()
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Environment stream refresh failed: %s", error)
+        # Drop the cached view while idle so the next subscriber starts from fresh state.
+        self._environments = None
+        self._workers = {}
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pynvml
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import Environment, GpuAllocation
+
+
+LOCAL_GPU_NODE = "local"
+GPU_ALLOCATION_LOCK_KEY = 93821
+GPU_OCCUPIED_STATUSES = {"creating", "building", "running", "starting"}
+
+
+def count_host_gpus() -> int:
+    pynvml.nvmlInit()
+    try:
+        return int(pynvml.nvmlDeviceGetCount())
+    finally:
+        pynvml.nvmlShutdown()
+
+
+async def lock_gpu_node(db, node: str) -> None:
+    # Transaction-scoped and keyed by placement target, so creates on other nodes
+    # (and CPU-only creates, which never take it) do not wait on each other.
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_key, hashtext(:node))"),
+        {"lock_key": GPU_ALLOCATION_LOCK_KEY, "node": node},
+    )
+
+
+def _holder_is_active():
+    return GpuAllocation.environment_id.in_(
+        select(Environment.id).where(Environment.status.in_(GPU_OCCUPIED_STATUSES))
+    )
+
+
+async def held_gpu_indices(db, node: str) -> set[int]:
+    result = await db.execute(
+        select(GpuAllocation.gpu_index).where(GpuAllocation.node == node, _holder_is_active())
+    )
+    return set(result.scalars().all())
+
+
+async def claim_gpus(db, node: str, allocations: list[tuple[object, int]]) -> list[int]:
+    # Takes (environment_id, gpu_index) pairs and returns the indices still held by another
+    # active environment. Rows left by stopped, failed or deleted environments are taken over.
+    if not allocations:
+        return []
+    stmt = insert(GpuAllocation).values(
+        [{"node": node, "gpu_index": gpu_index, "environment_id": environment_id} for environment_id, gpu_index in allocations]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["node", "gpu_index"],
+        set_={"environment_id": stmt.excluded.environment_id},
+        where=~_holder_is_active(),
+    ).returning(GpuAllocation.gpu_index)
+    result = await db.execute(stmt)
+    claimed = set(result.scalars().all())
+    return sorted(gpu_index for _environment_id, gpu_index in allocations if gpu_index not in claimed)
+
+
+async def release_gpus(db, environment_ids: list) -> None:
+    await db.execute(delete(GpuAllocation).where(GpuAllocation.environment_id.in_(environment_ids)))
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import docker
+from redis.exceptions import RedisError
+
+from .build_admission import BuildAdmission
+from .container_state import LYRA_MANAGED_LABEL
+from .task_redis import get_task_redis
+
+
+LYRA_IMAGE_REPOSITORY = "lyra-custom"
+LYRA_IMAGE_CONTENT_HASH_LABEL = "lyra.image.content_hash"
+# Bump when the hashed inputs change shape so old tags are not reused by mistake.
+IMAGE_CONTENT_HASH_VERSION = "1"
+IMAGE_FACT_CACHE_KEY_PREFIX = "lyra:image-fact:v1:"
+IMAGE_FACT_CACHE_TTL_SECONDS = 30 * 24 * 3600
+IMAGE_FACT_CACHE_MAX_ENTRIES = 1024
+IMAGE_REF_CACHE_TTL_SECONDS = 3600
+logger = logging.getLogger(__name__)
+
+# (expires_at, value) per fact. Facts keyed by image ID never go stale, but facts keyed
+# by a tag must expire locally as they do in Redis.
+_image_facts: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+
+def normalize_dockerfile_content(dockerfile_content: str) -> str:
+    lines = [line.rstrip() for line in (dockerfile_content or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    while lines and not lines[0]:
+        lines.pop(0)
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+def compute_image_content_hash(dockerfile_content: str, build_args: dict[str, str] | None = None) -> str:
+    payload = {
+        "version": IMAGE_CONTENT_HASH_VERSION,
+        "dockerfile": normalize_dockerfile_content(dockerfile_content),
+        "build_args": {str(key): str(value) for key, value in sorted((build_args or {}).items())},
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def content_addressed_image_tag(content_hash: str) -> str:
+    return f"{LYRA_IMAGE_REPOSITORY}:{content_hash}"
+
+
+def _stream_image_build(client, build_kwargs: dict, on_output: Callable[[dict], None] | None) -> None:
+    # The low-level API yields each build step as it happens instead of
+    # buffering the whole log until the build returns.
+    build_log: list[dict] = []
+    for chunk in client.api.build(decode=True, **build_kwargs):
+        if not isinstance(chunk, dict):
+            continue
+        build_log.append(chunk)
+        if on_output is not None:
+            on_output(chunk)
+        if chunk.get("error"):
+            raise docker.errors.BuildError(str(chunk["error"]).strip(), build_log)
+
+
+def ensure_content_addressed_image(
+    client,
+    dockerfile_content: str,
+    build_args: dict[str, str] | None = None,
+    on_output: Callable[[dict], None] | None = None,
+    admission: BuildAdmission | None = None,
+) -> tuple[str, bool]:
+    # Identical Dockerfiles share one image tag per node, so only the first
+    # environment from a template pays for the build.
+    content_hash = compute_image_content_hash(dockerfile_content, build_args)
+    image_tag = content_addressed_image_tag(content_hash)
+    if _get_local_image(client, image_tag) is not None:
+        return image_tag, False
+    if admission is None:
+        _build_content_addressed_image(client, dockerfile_content, image_tag, content_hash, build_args, on_output)
+        return image_tag, True
+
+    with admission.slot():
+        # Another build of the same Dockerfile may have finished while this one waited.
+        if _get_local_image(client, image_tag) is not None:
+            return image_tag, False
+        _build_content_addressed_image(client, dockerfile_content, image_tag, content_hash, build_args, on_output)
+    return image_tag, True
+
+
+def _build_content_addressed_image(
+    client,
+    dockerfile_content: str,
+    image_tag: str,
+    content_hash: str,
+    build_args: dict[str, str] | None,
+    on_output: Callable[[dict], None] | None,
+) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dockerfile_path = os.path.join(temp_dir, "Dockerfile")
+        with open(dockerfile_path, "w") as f:
+            f.write(dockerfile_content)
+        build_kwargs = {
+            "path": temp_dir,
+            "tag": image_tag,
+            "rm": True,
+            "labels": {LYRA_MANAGED_LABEL: "true", LYRA_IMAGE_CONTENT_HASH_LABEL: content_hash},
+        }
+        if build_args:
+            build_kwargs["buildargs"] = dict(build_args)
+        _stream_image_build(client, build_kwargs, on_output)
+    client.images.get(image_tag)
+
+
+def _load_image_fact(namespace: str, key: str, ttl_seconds: int = IMAGE_FACT_CACHE_TTL_SECONDS) -> Any | None:
+    cache_key = f"{namespace}:{key}"
+    cached = _image_facts.get(cache_key)
+    if cached is not None:
+        expires_at, value = cached
+        if expires_at > time.monotonic():
+            _image_facts.move_to_end(cache_key)
+            return value
+        del _image_facts[cache_key]
+    try:
+        raw = get_task_redis().get(f"{IMAGE_FACT_CACHE_KEY_PREFIX}{cache_key}")
+    except (RedisError, OSError) as error:
+        logger.warning("Image cache lookup failed: %s", error)
+        return None
+    if raw is None:
+        return None
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return None
+    _remember_image_fact(cache_key, value, ttl_seconds)
+    return value
+
+
+def _store_image_fact(namespace: str, key: str, value: Any, ttl_seconds: int = IMAGE_FACT_CACHE_TTL_SECONDS) -> None:
+    cache_key = f"{namespace}:{key}"
+    _remember_image_fact(cache_key, value, ttl_seconds)
+    try:
+        get_task_redis().set(
+            f"{IMAGE_FACT_CACHE_KEY_PREFIX}{cache_key}",
+            json.dumps(value, separators=(",", ":")),
+            ex=ttl_seconds,
+        )
+    except (RedisError, OSError) as error:
+        logger.warning("Image cache store failed: %s", error)
+
+
+def _remember_image_fact(cache_key: str, value: Any, ttl_seconds: int) -> None:
+    _image_facts[cache_key] = (time.monotonic() + ttl_seconds, value)
+    _image_facts.move_to_end(cache_key)
+    while len(_image_facts) > IMAGE_FACT_CACHE_MAX_ENTRIES:
+        _image_facts.popitem(last=False)
+
+
+def load_cached_image_probe(image_id: str) -> dict[str, str] | None:
+    result = _load_image_fact("probe", image_id)
+    return dict(result) if isinstance(result, dict) else None
+
+
+def store_image_probe(image_id: str, result: dict[str, str]) -> None:
+    _store_image_fact("probe", image_id, dict(result))
+
+
+def extract_dockerfile_base_image(dockerfile_content: str) -> str | None:
+    if not dockerfile_content:
+        return None
+    for raw_line in dockerfile_content.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = re.match(r"^FROM\s+(?:--[^\s]+\s+)*([^\s]+)(?:\s+AS\s+\S+)?$", line, flags=re.IGNORECASE)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _get_local_image(client, image_ref: str):
+    try:
+        return client.images.get(image_ref)
+    except docker.errors.ImageNotFound:
+        return None
+
+
+def image_has_apt_get(client, image_ref: str, pull: bool = True) -> bool | None:
+    # Returns None when the answer would need a registry pull and pull is False.
+    image = _get_local_image(client, image_ref)
+    if image is None:
+        cached_by_ref = _load_image_fact("apt_ref", image_ref, IMAGE_REF_CACHE_TTL_SECONDS)
+        if isinstance(cached_by_ref, bool):
+            return cached_by_ref
+        if not pull:
+            return None
+        client.images.pull(image_ref)
+        image = client.images.get(image_ref)
+
+    cached = _load_image_fact("apt", image.id)
+    if not isinstance(cached, bool):
+        try:
+            client.containers.run(
+                image.id,
+                ["command -v apt-get >/dev/null 2>&1"],
+                entrypoint=["sh", "-lc"],
+                remove=True,
+                stdout=True,
+                stderr=True,
+                detach=False,
+            )
+            cached = True
+        except docker.errors.ContainerError:
+            cached = False
+        _store_image_fact("apt", image.id, cached)
+    # Tags can move to a new digest, so the by-reference answer is only kept briefly.
+    _store_image_fact("apt_ref", image_ref, cached, ttl_seconds=IMAGE_REF_CACHE_TTL_SECONDS)
+    return cached
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import PortReservation
+
+
+LOCAL_PORT_NODE = "local"
+PORT_RANGES = {
+    "ssh": (20000, 25000),
+    "jupyter": (25001, 30000),
+    "code": (30001, 35000),
+    "custom": (35001, 60000),
+    "surrogate": (61001, 65535),
+}
+ENVIRONMENT_PORT_KINDS = ("ssh", "jupyter", "code")
+# Callers resync this often to pick up releases made by other processes and
+# host ports bound outside Lyra; reservations themselves are checked by the DB.
+PORT_MAP_RESYNC_SECONDS = 300.0
+
+
+class PortsExhausted(RuntimeError):
+    def __init__(self, kind: str):
+        start, end = PORT_RANGES[kind]
+        super().__init__(f"No available host ports in range {start}-{end}")
+        self.kind = kind
+
+
+class NodePortMap:
+    # One byte per host port plus a rotating cursor per range: taking a port is a
+    # C-level bytearray.find from the cursor instead of building and shuffling a range.
+    def __init__(self, used_ports: Iterable[int] = ()):
+        self._used = bytearray(65536)
+        self._cursors = {kind: start for kind, (start, _end) in PORT_RANGES.items()}
+        for port in used_ports:
+            self.mark_used(port)
+
+    def mark_used(self, port: int) -> None:
+        if 0 < port < 65536:
+            self._used[port] = 1
+
+    def release(self, port: int) -> None:
+        if 0 < port < 65536:
+            self._used[port] = 0
+
+    def is_free(self, port: int) -> bool:
+        return 0 < port < 65536 and self._used[port] == 0
+
+    def _find(self, kind: str, cursor: int) -> int | None:
+        start, end = PORT_RANGES[kind]
+        port = self._used.find(0, cursor, end + 1)
+        if port < 0:
+            port = self._used.find(0, start, cursor)
+        return port if port >= 0 else None
+
+    def take(self, kind: str) -> int | None:
+        port = self._find(kind, self._cursors[kind])
+        if port is None:
+            return None
+        self._used[port] = 1
+        start, end = PORT_RANGES[kind]
+        self._cursors[kind] = port + 1 if port < end else start
+        return port
+
+    def suggest(self, kind: str, count: int, exclude: set[int]) -> list[int]:
+        suggested: list[int] = []
+        start, end = PORT_RANGES[kind]
+        cursor = self._cursors[kind]
+        scanned = 0
+        while len(suggested) < count and scanned <= end - start:
+            port = self._find(kind, cursor)
+            if port is None:
+                break
+            scanned += (port - cursor) % (end - start + 1) + 1
+            cursor = port + 1 if port < end else start
+            if port not in exclude and port not in suggested:
+                suggested.append(port)
+        # Suggestions are not marked used, but advancing the cursor keeps concurrent
+        # callers from being offered the same ports.
+        self._cursors[kind] = cursor
+        return suggested
+
+
+class PortAllocator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._maps: dict[str, NodePortMap] = {}
+        self._synced_at: dict[str, float] = {}
+
+    def needs_sync(self, node: str) -> bool:
+        synced_at = self._synced_at.get(node)
+        return synced_at is None or time.monotonic() - synced_at >= PORT_MAP_RESYNC_SECONDS
+
+    def rebuild(self, node: str, used_ports: Iterable[int]) -> None:
+        port_map = NodePortMap(used_ports)
+        with self._lock:
+            self._maps[node] = port_map
+            self._synced_at[node] = time.monotonic()
+
+    def take(self, node: str, kind: str) -> int:
+        with self._lock:
+            port = self._maps.setdefault(node, NodePortMap()).take(kind)
+        if port is None:
+            raise PortsExhausted(kind)
+        return port
+
+    def mark_used(self, node: str, ports: Iterable[int]) -> None:
+        with self._lock:
+            port_map = self._maps.setdefault(node, NodePortMap())
+            for port in ports:
+                port_map.mark_used(port)
+
+    def release(self, node: str, ports: Iterable[int]) -> None:
+        with self._lock:
+            port_map = self._maps.get(node)
+            if port_map is None:
+                return
+            for port in ports:
+                port_map.release(port)
+
+    def is_free(self, node: str, port: int) -> bool:
+        with self._lock:
+            port_map = self._maps.get(node)
+            return port_map is None or port_map.is_free(port)
+
+    def suggest(self, node: str, kind: str, count: int, exclude: set[int]) -> list[int]:
+        with self._lock:
+            return self._maps.setdefault(node, NodePortMap()).suggest(kind, count, exclude)
+
+
+port_allocator = PortAllocator()
+
+
+def reserved_ports_query(node: str = LOCAL_PORT_NODE):
+    return select(PortReservation.port).where(PortReservation.node == node)
+
+
+def _insert_reservations(node: str, rows: list[tuple[int, str, object]]):
+    return (
+        insert(PortReservation)
+        .values([{"node": node, "port": port, "kind": kind, "owner_id": owner_id} for port, kind, owner_id in rows])
+        .on_conflict_do_nothing(index_elements=["node", "port"])
+        .returning(PortReservation.port)
+    )
+
+
+def _plan(node: str, requests: list[tuple[object, str]], pending: list[int]) -> list[tuple[int, str, object]]:
+    return [(port_allocator.take(node, requests[index][1]), requests[index][1], requests[index][0]) for index in pending]
+
+
+def reservation_rounds(node: str, requests: list[tuple[object, str]]):
+    # Yields one multi-row INSERT ... ON CONFLICT DO NOTHING per round and receives the
+    # ports that were inserted. A port lost to another process stays marked used in the
+    # local map, so each round only retries the losers with fresh ports.
+    assigned: list[int | None] = [None] * len(requests)
+    pending = list(range(len(requests)))
+    while pending:
+        rows = _plan(node, requests, pending)
+        inserted = set((yield _insert_reservations(node, rows)))
+        still_pending = []
+        for index, (port, _kind, _owner_id) in zip(pending, rows):
+            if port in inserted:
+                assigned[index] = port
+            else:
+                still_pending.append(index)
+        pending = still_pending
+    return assigned
+
+
+def _drive(rounds, execute):
+    try:
+        stmt = next(rounds)
+        while True:
+            stmt = rounds.send(execute(stmt))
+    except StopIteration as done:
+        return done.value
+
+
+def reserve_ports_sync(db, requests: list[tuple[object, str]], node: str = LOCAL_PORT_NODE) -> list[int]:
+    if not requests:
+        return []
+    return _drive(reservation_rounds(node, requests), lambda stmt: db.execute(stmt).scalars().all())
+
+
+async def reserve_ports(db, requests: list[tuple[object, str]], node: str = LOCAL_PORT_NODE) -> list[int]:
+    if not requests:
+        return []
+    rounds = reservation_rounds(node, requests)
+    try:
+        stmt = next(rounds)
+        while True:
+            result = await db.execute(stmt)
+            stmt = rounds.send(result.scalars().all())
+    except StopIteration as done:
+        return done.value
+
+
+async def reserve_specific_ports(db, owner_id, kind: str, ports: list[int], node: str = LOCAL_PORT_NODE) -> list[int]:
+    # Returns the ports that could not be reserved (held by Lyra or bound outside it).
+    if not ports:
+        return []
+    conflicts = [port for port in ports if not port_allocator.is_free(node, port)]
+    if conflicts:
+        return conflicts
+    result = await db.execute(_insert_reservations(node, [(port, kind, owner_id) for port in ports]))
+    inserted = set(result.scalars().all())
+    port_allocator.mark_used(node, ports)
+    return [port for port in ports if port not in inserted]
+
+
+async def release_owner_ports(db, owner_ids: list, node: str = LOCAL_PORT_NODE) -> None:
+    result = await db.execute(
+        delete(PortReservation)
+        .where(PortReservation.node == node, PortReservation.owner_id.in_(owner_ids))
+        .returning(PortReservation.port)
+    )
+    port_allocator.release(node, result.scalars().all())
+
+
+def release_owner_ports_sync(db, owner_ids: list, node: str = LOCAL_PORT_NODE) -> None:
+    result = db.execute(
+        delete(PortReservation)
+        .where(PortReservation.node == node, PortReservation.owner_id.in_(owner_ids))
+        .returning(PortReservation.port)
+    )
+    port_allocator.release(node, result.scalars().all())
+
+
+async def sync_port_map(db, node: str = LOCAL_PORT_NODE, docker_used_ports: Iterable[int] = ()) -> None:
+    result = await db.execute(reserved_ports_query(node))
+    port_allocator.rebuild(node, [*result.scalars().all(), *docker_used_ports])
+
+
+def sync_port_map_sync(db, node: str = LOCAL_PORT_NODE, docker_used_ports: Iterable[int] = ()) -> None:
+    port_allocator.rebuild(node, [*db.execute(reserved_ports_query(node)).scalars().all(), *docker_used_ports])
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+import redis
+from redis.exceptions import RedisError
+
+from .task_redis import get_task_redis
+
+
+PROVISIONING_KEY_PREFIX = "lyra:provisioning:"
+PROVISIONING_STATE_TTL_SECONDS = 7 * 24 * 3600
+PROVISIONING_HISTOGRAM_INDEX_KEY = f"{PROVISIONING_KEY_PREFIX}histograms"
+# Upper bounds in seconds; the last bucket catches everything slower.
+PROVISIONING_HISTOGRAM_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+PROVISIONING_STEPS = ("build", "probe", "password", "container_run", "port_retry")
+logger = logging.getLogger(__name__)
+
+
+def provisioning_state_key(environment_id: str) -> str:
+    return f"{PROVISIONING_KEY_PREFIX}{environment_id}:state"
+
+
+def provisioning_histogram_key(node: str, step: str) -> str:
+    return f"{PROVISIONING_KEY_PREFIX}histogram:{node}:{step}"
+
+
+def histogram_bucket_label(seconds: float) -> str:
+    for bound in PROVISIONING_HISTOGRAM_BUCKETS:
+        if seconds <= bound:
+            return f"le_{bound:g}"
+    return "le_inf"
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ProvisioningTracker:
+    # Records per-step timings for one create_environment_task run. The state is
+    # pushed to Celery (update_state) and to Redis keyed by environment id, since
+    # the API only knows the environment, not the task id.
+    def __init__(self, environment_id: str, task=None, redis_client: redis.Redis | None = None, node: str | None = None):
+        self.environment_id = str(environment_id)
+        self.node = node or socket.gethostname()
+        self._task = task
+        self._redis = redis_client
+        self._redis_enabled = True
+        self.state: dict[str, Any] = {
+            "environment_id": self.environment_id,
+            "node": self.node,
+            "task_id": self._task_id(),
+            "status": "running",
+            "current_step": None,
+            "started_at": _utc_now_iso(),
+            "finished_at": None,
+            "waiting": None,
+            "steps": [],
+        }
+        self._publish()
+
+    def _task_id(self) -> str | None:
+        request = getattr(self._task, "request", None)
+        return getattr(request, "id", None)
+
+    def _client(self) -> redis.Redis | None:
+        if not self._redis_enabled:
+            return None
+        if self._redis is None:
+            self._redis = get_task_redis()
+        return self._redis
+
+    def _publish(self) -> None:
+        if self.state["task_id"]:
+            try:
+                self._task.update_state(state="PROGRESS", meta=self.state)
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Failed to update task state for environment %s: %s", self.environment_id, error)
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.set(
+                provisioning_state_key(self.environment_id),
+                json.dumps(self.state, separators=(",", ":")),
+                ex=PROVISIONING_STATE_TTL_SECONDS,
+            )
+        except (RedisError, OSError) as error:
+            logger.warning("Provisioning state unavailable for environment %s: %s", self.environment_id, error)
+            self._redis_enabled = False
+
+    def _record_duration(self, step: str, seconds: float) -> None:
+        client = self._client()
+        if client is None:
+            return
+        key = provisioning_histogram_key(self.node, step)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(key, histogram_bucket_label(seconds), 1)
+            pipe.hincrby(key, "count", 1)
+            pipe.hincrbyfloat(key, "sum_seconds", round(seconds, 3))
+            pipe.sadd(PROVISIONING_HISTOGRAM_INDEX_KEY, key)
+            pipe.execute()
+        except (RedisError, OSError) as error:
+            logger.warning("Failed to record provisioning duration for %s: %s", step, error)
+
+    @contextmanager
+    def step(self, name: str, detail: str | None = None) -> Iterator[dict[str, Any]]:
+        # Step names become histogram keys, so only the known set is accepted.
+        if name not in PROVISIONING_STEPS:
+            raise ValueError(f"Unknown provisioning step: {name}")
+        entry: dict[str, Any] = {
+            "name": name,
+            "status": "running",
+            "started_at": _utc_now_iso(),
+            "finished_at": None,
+            "duration_ms": None,
+        }
+        if detail:
+            entry["detail"] = detail
+        self.state["steps"].append(entry)
+        self.state["current_step"] = name
+        self._publish()
+        started = time.monotonic()
+        try:
+            yield entry
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        else:
+            if entry["status"] == "running":
+                entry["status"] = "succeeded"
+        finally:
+            elapsed = time.monotonic() - started
+            entry["finished_at"] = _utc_now_iso()
+            entry["duration_ms"] = int(elapsed * 1000)
+            self.state["current_step"] = None
+            self._record_duration(name, elapsed)
+            self._publish()
+
+    def report_wait(self, wait: dict[str, Any] | None) -> None:
+        # Build admission: queue position or low-disk deferral, None once admitted.
+        if self.state.get("waiting") == wait:
+            return
+        self.state["waiting"] = wait
+        self._publish()
+
+    def fail_step(self, entry: dict[str, Any], detail: str) -> None:
+        entry["status"] = "failed"
+        entry["detail"] = detail
+
+    def finish(self, status: str) -> None:
+        self.state["status"] = status
+        self.state["current_step"] = None
+        self.state["finished_at"] = _utc_now_iso()
+        self._publish()
+
+
+def parse_provisioning_histogram(raw: dict[str, str]) -> dict[str, Any]:
+    buckets = []
+    cumulative = 0
+    for bound in PROVISIONING_HISTOGRAM_BUCKETS:
+        cumulative += int(raw.get(f"le_{bound:g}", 0) or 0)
+        buckets.append({"le": bound, "count": cumulative})
+    cumulative += int(raw.get("le_inf", 0) or 0)
+    buckets.append({"le": "+Inf", "count": cumulative})
+    count = int(raw.get("count", 0) or 0)
+    total = float(raw.get("sum_seconds", 0) or 0)
+    return {
+        "count": count,
+        "sum_seconds": round(total, 3),
+        "mean_seconds": round(total / count, 3) if count else None,
+        "buckets": buckets,
+    }
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 from cryptography.fernet import Fernet, InvalidToken
 
@@ -11,12 +12,17 @@ class SecretCipherError(RuntimeError):
     pass
 
 
+@lru_cache(maxsize=4)
+def _build_fernet(key: str) -> Fernet:
+    return Fernet(key.encode("utf-8"))
+
+
 def _get_fernet() -> Fernet:
     key = os.getenv("APP_SECRET_KEY", "").strip()
     if not key:
         raise SecretKeyError("APP_SECRET_KEY is required")
     try:
-        return Fernet(key.encode("utf-8"))
+        return _build_fernet(key)
     except Exception as error:
         raise SecretKeyError("APP_SECRET_KEY is invalid for Fernet") from error
 
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from typing import Any
+
+import redis.asyncio as redis_asyncio
+from redis.exceptions import RedisError
+
+
+SHARED_CACHE_KEY_PREFIX = "lyra:cache:"
+MEMORY_PURGE_EVERY_WRITES = 256
+logger = logging.getLogger(__name__)
+
+
+def _resolve_shared_cache_url() -> str:
+    return (os.getenv("LYRA_SHARED_CACHE_REDIS_URL", "") or "").strip()
+
+
+def resolve_environment_status_cache_seconds() -> float:
+    raw = (os.getenv("LYRA_ENVIRONMENT_STATUS_CACHE_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 2.0
+    except ValueError:
+        value = 2.0
+    if value < 0.0:
+        return 0.0
+    if value > 60.0:
+        return 60.0
+    return value
+
+
+class _MemoryBackend:
+    def __init__(self):
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._writes = 0
+
+    def _live(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def _purge_expired(self) -> None:
+        self._writes += 1
+        if self._writes % MEMORY_PURGE_EVERY_WRITES:
+            return
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _value) in self._entries.items() if expires_at <= now]:
+            self._entries.pop(key, None)
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        return [self._live(key) for key in keys]
+
+    async def set_many(self, values: dict[str, Any], ttl_seconds: float) -> None:
+        expires_at = time.monotonic() + ttl_seconds
+        for key, value in values.items():
+            self._entries[key] = (expires_at, value)
+        self._purge_expired()
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def take(self, key: str) -> Any | None:
+        value = self._live(key)
+        self._entries.pop(key, None)
+        return value
+
+    async def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set_many({key: value}, ttl_seconds)
+        return True
+
+
+class _RedisBackend:
+    def __init__(self, url: str):
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        raw_values = await self._client.mget(keys)
+        return [json.loads(raw) if raw is not None else None for raw in raw_values]
+
+    async def set_many(self, values: dict[str, Any], ttl_seconds: float) -> None:
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, json.dumps(value, separators=(",", ":")), px=ttl_ms)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def take(self, key: str) -> Any | None:
+        raw = await self._client.getdel(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        return bool(await self._client.set(key, json.dumps(value), px=ttl_ms, nx=True))
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class SharedCache:
+    # Redis-backed when LYRA_SHARED_CACHE_REDIS_URL is set so every API process sees
+    # the same entries; otherwise (or while Redis is failing) entries stay in-process.
+    def __init__(self):
+        self._memory = _MemoryBackend()
+        self._redis: _RedisBackend | None = None
+        self._redis_url: str | None = None
+
+    def _backend(self):
+        url = _resolve_shared_cache_url()
+        if not url:
+            return self._memory
+        if self._redis is None or self._redis_url != url:
+            self._redis = _RedisBackend(url)
+            self._redis_url = url
+        return self._redis
+
+    @property
+    def is_shared(self) -> bool:
+        return bool(_resolve_shared_cache_url())
+
+    async def _call(self, method: str, *args):
+        backend = self._backend()
+        if backend is not self._memory:
+            try:
+                return await getattr(backend, method)(*args)
+            except (RedisError, OSError, ValueError) as error:
+                logger.warning("Shared cache %s failed; using in-process cache: %s", method, error)
+        return await getattr(self._memory, method)(*args)
+
+    async def get(self, key: str) -> Any | None:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        if not keys:
+            return []
+        return await self._call("get_many", [f"{SHARED_CACHE_KEY_PREFIX}{key}" for key in keys])
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self.set_many({key: value}, ttl_seconds)
+
+    async def set_many(self, values: dict[str, Any], ttl_seconds: float) -> None:
+        if not values or ttl_seconds <= 0:
+            return
+        prefixed = {f"{SHARED_CACHE_KEY_PREFIX}{key}": value for key, value in values.items()}
+        await self._call("set_many", prefixed, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", f"{SHARED_CACHE_KEY_PREFIX}{key}")
+
+    async def take(self, key: str) -> Any | None:
+        return await self._call("take", f"{SHARED_CACHE_KEY_PREFIX}{key}")
+
+    async def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return await self._call("add", f"{SHARED_CACHE_KEY_PREFIX}{key}", value, ttl_seconds)
+
+    async def close(self) -> None:
+        redis_backend = self._redis
+        self._redis = None
+        self._redis_url = None
+        if redis_backend is not None:
+            try:
+                await redis_backend.close()
+            except (RedisError, OSError) as error:
+                logger.warning("Failed to close shared cache connection: %s", error)
+
+
+shared_cache = SharedCache()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+import docker
+
+
+TASK_DOCKER_PING_INTERVAL_SECONDS = 30.0
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client: docker.DockerClient | None = None
+_client_pid: int | None = None
+_last_ping = 0.0
+
+
+def _close_client(client: docker.DockerClient | None) -> None:
+    if client is None:
+        return
+    try:
+        client.close()
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Failed to close Docker client: %s", error)
+
+
+def get_task_docker() -> docker.DockerClient:
+    # One client per Celery process; it is pinged at most every interval and
+    # recreated if the daemon connection went bad or the process was forked.
+    global _client, _client_pid, _last_ping
+    with _lock:
+        now = time.monotonic()
+        if _client is not None and _client_pid != os.getpid():
+            _client = None
+        if _client is not None and now - _last_ping >= TASK_DOCKER_PING_INTERVAL_SECONDS:
+            try:
+                _client.ping()
+                _last_ping = now
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Docker client failed health check, reconnecting: %s", error)
+                _close_client(_client)
+                _client = None
+        if _client is None:
+            _client = docker.from_env()
+            _client_pid = os.getpid()
+            _last_ping = now
+        return _client
+
+
+def close_task_docker() -> None:
+    global _client, _client_pid
+    with _lock:
+        client, _client, _client_pid = _client, None, None
+    _close_client(client)
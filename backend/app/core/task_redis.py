@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+
+import redis
+import redis.asyncio as redis_asyncio
+
+
+_sync_clients: dict[str, redis.Redis] = {}
+
+
+def resolve_task_redis_url() -> str:
+    for name in ("LYRA_TASK_REDIS_URL", "CELERY_BROKER_URL"):
+        value = (os.getenv(name, "") or "").strip()
+        if value:
+            return value
+    return "redis://localhost:6379/0"
+
+
+def get_task_redis() -> redis.Redis:
+    url = resolve_task_redis_url()
+    client = _sync_clients.get(url)
+    if client is None:
+        client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        _sync_clients[url] = client
+    return client
+
+
+def create_async_task_redis() -> redis_asyncio.Redis:
+    return redis_asyncio.from_url(resolve_task_redis_url(), decode_responses=True)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import docker
+
+from .env import resolve_int_env
+from .image_cache import compute_image_content_hash
+
+
+WARM_POOL_CONFIG_KEY = "warm_pool"
+WARM_CONTAINER_NAME_PREFIX = "lyra-warm-"
+WARM_CONTAINER_WARMING = "warming"
+WARM_CONTAINER_READY = "ready"
+WARM_CONTAINER_CLAIMED = "claimed"
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_warm_pool_max_size() -> int:
+    return resolve_int_env("LYRA_WARM_POOL_MAX_SIZE", 20, 0, 200)
+
+
+@dataclass(frozen=True)
+class WarmPoolConfig:
+    size: int
+    dockerfile_content: str
+    enable_jupyter: bool
+    enable_code_server: bool
+
+    @property
+    def content_hash(self) -> str:
+        return compute_image_content_hash(self.dockerfile_content)
+
+    def to_config(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "dockerfile_content": self.dockerfile_content,
+            "enable_jupyter": self.enable_jupyter,
+            "enable_code_server": self.enable_code_server,
+        }
+
+
+def parse_warm_pool_config(template_config: dict[str, Any] | None) -> WarmPoolConfig | None:
+    # Warm containers are only interchangeable with a cold create when the Dockerfile
+    # and service flags match exactly, so the pool records the rendered Dockerfile.
+    raw = (template_config or {}).get(WARM_POOL_CONFIG_KEY)
+    if raw is None:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("warm_pool must be an object")
+    try:
+        size = int(raw.get("size", 0))
+    except (TypeError, ValueError) as error:
+        raise ValueError("warm_pool.size must be an integer") from error
+    max_size = resolve_warm_pool_max_size()
+    if size < 0 or size > max_size:
+        raise ValueError(f"warm_pool.size must be between 0 and {max_size}")
+    dockerfile_content = raw.get("dockerfile_content") or (template_config or {}).get("dockerfile_content")
+    if not isinstance(dockerfile_content, str) or not dockerfile_content.strip():
+        raise ValueError("warm_pool requires dockerfile_content")
+    return WarmPoolConfig(
+        size=size,
+        dockerfile_content=dockerfile_content,
+        enable_jupyter=bool(raw.get("enable_jupyter", True)),
+        enable_code_server=bool(raw.get("enable_code_server", True)),
+    )
+
+
+def schedule_warm_pool_refill(template_id) -> None:
+    # Imported lazily: app.tasks imports this module.
+    from ..tasks import refill_warm_pool_task
+
+    try:
+        refill_warm_pool_task.delay(str(template_id))
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Failed to enqueue warm pool refill for template %s: %s", template_id, error)
+
+
+def remove_warm_containers(container_names: Iterable[str], client=None) -> None:
+    client = client or docker.from_env()
+    for container_name in container_names:
+        try:
+            client.containers.get(container_name).remove(force=True)
+        except docker.errors.NotFound:
+            pass
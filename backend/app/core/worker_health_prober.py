@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+from sqlalchemy import select
+
+from ..database import AsyncSessionLocal
+from ..models import WorkerServer
+from .shared_cache import shared_cache
+from .worker_registry import (
+    WORKER_HEALTH_HEALTHY,
+    refresh_worker_health,
+    resolve_worker_fanout_concurrency,
+    set_health_prober_active,
+)
+
+
+logger = logging.getLogger(__name__)
+PROBE_JITTER_RATIO = 0.2
+
+
+def _resolve_health_probe_interval() -> float:
+    raw = (os.getenv("LYRA_WORKER_HEALTH_PROBE_INTERVAL_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 10.0
+    except ValueError:
+        value = 10.0
+    if value < 2.0:
+        return 2.0
+    if value > 300.0:
+        return 300.0
+    return value
+
+
+def _resolve_health_probe_max_backoff() -> float:
+    raw = (os.getenv("LYRA_WORKER_HEALTH_PROBE_MAX_BACKOFF_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 120.0
+    except ValueError:
+        value = 120.0
+    if value < 2.0:
+        return 2.0
+    if value > 3600.0:
+        return 3600.0
+    return value
+
+
+def _is_health_prober_enabled() -> bool:
+    raw = (os.getenv("LYRA_WORKER_HEALTH_PROBER_ENABLED", "true") or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _jittered(seconds: float) -> float:
+    return seconds * random.uniform(1.0 - PROBE_JITTER_RATIO, 1.0 + PROBE_JITTER_RATIO)
+
+
+class WorkerHealthProber:
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._next_probe_at: dict[str, float] = {}
+        self._delays: dict[str, float] = {}
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        set_health_prober_active(True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        set_health_prober_active(False)
+        task = self._task
+        self._task = None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def _schedule(self, worker_id: str, healthy: bool, now_monotonic: float) -> None:
+        interval = _resolve_health_probe_interval()
+        if healthy:
+            delay = interval
+        else:
+            # Back off on workers that stay down so they do not eat probe capacity.
+            delay = min(self._delays.get(worker_id, interval / 2) * 2, _resolve_health_probe_max_backoff())
+        self._delays[worker_id] = delay
+        self._next_probe_at[worker_id] = now_monotonic + _jittered(delay)
+
+    async def probe_due_workers(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(WorkerServer))
+            workers = result.scalars().all()
+            known_ids = {str(worker.id) for worker in workers}
+            for stale_id in set(self._next_probe_at) - known_ids:
+                self._next_probe_at.pop(stale_id, None)
+                self._delays.pop(stale_id, None)
+
+            now_monotonic = time.monotonic()
+            due = [worker for worker in workers if self._next_probe_at.get(str(worker.id), 0.0) <= now_monotonic]
+            if not due:
+                return
+            semaphore = asyncio.Semaphore(resolve_worker_fanout_concurrency())
+            probe_lock_seconds = _resolve_health_probe_interval() * 0.8
+
+            async def _probe(worker: WorkerServer):
+                async with semaphore:
+                    # With a shared cache only one API process probes a worker per
+                    # interval; the others pick up its result from the cache.
+                    if not shared_cache.is_shared or await shared_cache.add(
+                        f"worker_probe_lock:{worker.id}", 1, probe_lock_seconds
+                    ):
+                        return await refresh_worker_health(db, worker, use_cache=False, persist=False)
+                    return await refresh_worker_health(db, worker, use_cache=True, persist=False)
+
+            results = await asyncio.gather(*[_probe(worker) for worker in due], return_exceptions=True)
+            finished_at = time.monotonic()
+            for worker, health in zip(due, results, strict=False):
+                if isinstance(health, Exception):
+                    logger.warning("Health probe failed for worker %s: %s", worker.id, health)
+                healthy = not isinstance(health, Exception) and health.status == WORKER_HEALTH_HEALTHY
+                self._schedule(str(worker.id), healthy, finished_at)
+            await db.commit()
+
+    def _seconds_until_next_probe(self) -> float:
+        interval = _resolve_health_probe_interval()
+        if not self._next_probe_at:
+            return interval
+        wait_seconds = min(self._next_probe_at.values()) - time.monotonic()
+        return max(0.5, min(wait_seconds, interval))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_due_workers()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Worker health probe cycle failed: %s", error)
+            await asyncio.sleep(self._seconds_until_next_probe())
+
+
+_prober: WorkerHealthProber | None = None
+
+
+def start_worker_health_prober() -> None:
+    global _prober
+    if _prober is not None or not _is_health_prober_enabled():
+        return
+    _prober = WorkerHealthProber()
+    _prober.start()
+
+
+async def stop_worker_health_prober() -> None:
+    global _prober
+    if _prober is None:
+        return
+    await _prober.stop()
+    _prober = None
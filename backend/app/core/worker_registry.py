@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
@@ -11,7 +14,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import WorkerServer
+from .env import resolve_int_env
 from .security import SecretCipherError, SecretKeyError, decrypt_secret
+from .shared_cache import shared_cache
 
 
 WORKER_HEALTH_HEALTHY = "healthy"
@@ -21,6 +26,10 @@ WORKER_HEALTH_MISCONFIGURED = "misconfigured"
 WORKER_HEALTH_API_MISMATCH = "api_mismatch"
 WORKER_HEALTH_REQUEST_FAILED = "request_failed"
 WORKER_HEALTH_UNKNOWN = "unknown"
+WORKER_CIRCUIT_CLOSED = "closed"
+WORKER_CIRCUIT_OPEN = "open"
+WORKER_CIRCUIT_HALF_OPEN = "half_open"
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -46,6 +55,15 @@ class WorkerHealthCacheEntry:
     cached_at_monotonic: float
 
 
+@dataclass
+class WorkerCircuit:
+    state: str = WORKER_CIRCUIT_CLOSED
+    consecutive_failures: int = 0
+    opened_at_monotonic: float = 0.0
+    last_error: str = ""
+    trial_started_at_monotonic: float | None = None
+
+
 class WorkerRequestError(RuntimeError):
     def __init__(self, code: str, message: str, status_code: int = 503):
         super().__init__(message)
@@ -88,7 +106,181 @@ def _resolve_worker_health_cache_ttl() -> float:
     return value
 
 
+def resolve_worker_fanout_concurrency() -> int:
+    return resolve_int_env("LYRA_WORKER_FANOUT_CONCURRENCY", 4, 1, 64)
+
+
+def resolve_worker_fanout_deadline() -> float:
+    raw = (os.getenv("LYRA_WORKER_FANOUT_DEADLINE_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 6.0
+    except ValueError:
+        value = 6.0
+    if value < 1.0:
+        return 1.0
+    if value > 60.0:
+        return 60.0
+    return value
+
+
+def _resolve_worker_http_max_connections() -> int:
+    return resolve_int_env("LYRA_WORKER_HTTP_MAX_CONNECTIONS", 20, 1, 200)
+
+
+def _resolve_worker_http_keepalive_expiry() -> float:
+    raw = (os.getenv("LYRA_WORKER_HTTP_KEEPALIVE_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 30.0
+    except ValueError:
+        value = 30.0
+    if value < 1.0:
+        return 1.0
+    if value > 300.0:
+        return 300.0
+    return value
+
+
+def _resolve_worker_circuit_failure_threshold() -> int:
+    return resolve_int_env("LYRA_WORKER_CIRCUIT_FAILURE_THRESHOLD", 3, 1, 20)
+
+
+def _resolve_worker_circuit_reset_seconds() -> float:
+    raw = (os.getenv("LYRA_WORKER_CIRCUIT_RESET_SECONDS", "") or "").strip()
+    try:
+        value = float(raw) if raw else 15.0
+    except ValueError:
+        value = 15.0
+    if value < 1.0:
+        return 1.0
+    if value > 300.0:
+        return 300.0
+    return value
+
+
+def _is_worker_http2_enabled() -> bool:
+    raw = (os.getenv("LYRA_WORKER_HTTP2", "") or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+WORKER_TOKEN_CACHE_SIZE = 256
+SHARED_WORKER_HEALTH_RETENTION_SECONDS = 300.0
 _worker_health_cache: dict[str, WorkerHealthCacheEntry] = {}
+# Decrypted API tokens keyed by (worker id, ciphertext); a token update changes the
+# ciphertext, so stale plaintext can never be served for the new value.
+_worker_token_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+_health_prober_active = False
+# One long-lived client per worker base URL, so main->worker calls reuse
+# keep-alive connections instead of paying a TCP/TLS handshake each time.
+_worker_http_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_closing_worker_http_clients: set[asyncio.Future] = set()
+
+
+_worker_circuits: dict[str, WorkerCircuit] = {}
+
+
+def get_worker_circuit_state(worker_id: str) -> str:
+    circuit = _worker_circuits.get(str(worker_id))
+    return circuit.state if circuit else WORKER_CIRCUIT_CLOSED
+
+
+def record_worker_success(worker_id: str) -> None:
+    _worker_circuits[str(worker_id)] = WorkerCircuit()
+
+
+def record_worker_failure(worker_id: str, message: str, *, trip: bool = False) -> None:
+    circuit = _worker_circuits.setdefault(str(worker_id), WorkerCircuit())
+    circuit.consecutive_failures += 1
+    circuit.last_error = message
+    circuit.trial_started_at_monotonic = None
+    if trip or circuit.state == WORKER_CIRCUIT_HALF_OPEN or (
+        circuit.consecutive_failures >= _resolve_worker_circuit_failure_threshold()
+    ):
+        circuit.state = WORKER_CIRCUIT_OPEN
+        circuit.opened_at_monotonic = time.monotonic()
+
+
+def _acquire_worker_circuit(worker_id: str) -> None:
+    circuit = _worker_circuits.get(str(worker_id))
+    if circuit is None or circuit.state == WORKER_CIRCUIT_CLOSED:
+        return
+    now_monotonic = time.monotonic()
+    reset_seconds = _resolve_worker_circuit_reset_seconds()
+    if circuit.state == WORKER_CIRCUIT_OPEN and now_monotonic - circuit.opened_at_monotonic >= reset_seconds:
+        circuit.state = WORKER_CIRCUIT_HALF_OPEN
+    # Half-open lets a single trial request through (a cancelled trial expires after
+    # the reset window); everything else keeps failing fast.
+    trial_pending = (
+        circuit.trial_started_at_monotonic is not None
+        and now_monotonic - circuit.trial_started_at_monotonic < reset_seconds
+    )
+    if circuit.state == WORKER_CIRCUIT_OPEN or trial_pending:
+        raise WorkerRequestError("worker_circuit_open", circuit.last_error or "Worker is unavailable", status_code=503)
+    circuit.trial_started_at_monotonic = now_monotonic
+
+
+def _create_worker_http_client() -> httpx.AsyncClient:
+    max_connections = _resolve_worker_http_max_connections()
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=_resolve_worker_http_keepalive_expiry(),
+    )
+    if _is_worker_http2_enabled():
+        try:
+            return httpx.AsyncClient(limits=limits, http2=True)
+        except ImportError:
+            logger.warning("LYRA_WORKER_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+    return httpx.AsyncClient(limits=limits)
+
+
+def _get_worker_http_client(base_url: str) -> httpx.AsyncClient:
+    key = normalize_worker_base_url(base_url)
+    loop = asyncio.get_running_loop()
+    entry = _worker_http_clients.get(key)
+    if entry is not None:
+        client_loop, client = entry
+        if client_loop is loop and not client.is_closed:
+            return client
+        _close_worker_http_client_on_owner_loop(client_loop, client)
+    client = _create_worker_http_client()
+    _worker_http_clients[key] = (loop, client)
+    return client
+
+
+def _on_worker_http_client_closed(future: asyncio.Future) -> None:
+    _closing_worker_http_clients.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Failed to close worker HTTP client: %s", future.exception())
+
+
+def _close_worker_http_client_on_owner_loop(
+    client_loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient
+) -> asyncio.Future | None:
+    # Pooled connections belong to the loop that opened them, so they are closed there while
+    # it still runs; once it has stopped, the current loop is the only one left to close them.
+    if client.is_closed:
+        return None
+    if client_loop is not asyncio.get_running_loop() and client_loop.is_running():
+        future = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), client_loop))
+    else:
+        future = asyncio.ensure_future(client.aclose())
+    _closing_worker_http_clients.add(future)
+    future.add_done_callback(_on_worker_http_client_closed)
+    return future
+
+
+async def close_worker_http_client(base_url: str) -> None:
+    entry = _worker_http_clients.pop(normalize_worker_base_url(base_url), None)
+    if entry is None:
+        return
+    future = _close_worker_http_client_on_owner_loop(*entry)
+    if future is not None:
+        await asyncio.wait([future])
+
+
+async def close_all_worker_http_clients() -> None:
+    for base_url in list(_worker_http_clients):
+        await close_worker_http_client(base_url)
 
 
 def _build_worker_api_url(base_url: str, path: str) -> str:
@@ -102,8 +294,8 @@ async def _request_worker_health(base_url: str, api_token: str, timeout: float)
     url = _build_worker_api_url(base_url, "/api/worker/health")
     headers = {"Authorization": f"Bearer {api_token}"}
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.get(url, headers=headers)
+    client = _get_worker_http_client(base_url)
+    response = await client.get(url, headers=headers, timeout=timeout)
     payload: dict[str, Any] = {}
     try:
         payload = response.json() if response.content else {}
@@ -123,8 +315,8 @@ async def _request_worker_json(
 ) -> tuple[int, Any]:
     url = _build_worker_api_url(base_url, path)
     headers = {"Authorization": f"Bearer {api_token}"}
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.request(method=method.upper(), url=url, headers=headers, json=payload)
+    client = _get_worker_http_client(base_url)
+    response = await client.request(method=method.upper(), url=url, headers=headers, json=payload, timeout=timeout)
 
     body: Any = {}
     try:
@@ -136,8 +328,28 @@ async def _request_worker_json(
     return response.status_code, body
 
 
-def build_worker_connection_config(worker: WorkerServer) -> WorkerConnectionConfig:
+def _decrypt_worker_token(worker: WorkerServer) -> str:
+    if worker.id is None:
+        return decrypt_secret(worker.api_token_encrypted)
+    cache_key = (str(worker.id), worker.api_token_encrypted or "")
+    token = _worker_token_cache.get(cache_key)
+    if token is not None:
+        _worker_token_cache.move_to_end(cache_key)
+        return token
     token = decrypt_secret(worker.api_token_encrypted)
+    _worker_token_cache[cache_key] = token
+    while len(_worker_token_cache) > WORKER_TOKEN_CACHE_SIZE:
+        _worker_token_cache.popitem(last=False)
+    return token
+
+
+def invalidate_worker_connection_config(worker_id: str) -> None:
+    for cache_key in [key for key in _worker_token_cache if key[0] == str(worker_id)]:
+        _worker_token_cache.pop(cache_key, None)
+
+
+def build_worker_connection_config(worker: WorkerServer) -> WorkerConnectionConfig:
+    token = _decrypt_worker_token(worker)
     return WorkerConnectionConfig(
         id=str(worker.id),
         name=worker.name,
@@ -218,6 +430,50 @@ async def check_worker_health(config: WorkerConnectionConfig, timeout: float | N
     )
 
 
+async def _load_cached_worker_health(cache_key: str, cache_ttl_seconds: float) -> WorkerHealthCacheEntry | None:
+    # While the background prober runs it keeps the cache current, so request
+    # paths read its last result instead of probing inline.
+    now_monotonic = time.monotonic()
+    local = _worker_health_cache.get(cache_key)
+    if local and (now_monotonic - local.cached_at_monotonic) <= cache_ttl_seconds:
+        return local
+
+    if shared_cache.is_shared:
+        shared = await shared_cache.get(f"worker_health:{cache_key}")
+        if isinstance(shared, dict) and shared.get("status"):
+            try:
+                checked_at = datetime.fromisoformat(str(shared.get("checked_at")))
+            except ValueError:
+                checked_at = None
+            if checked_at is not None:
+                age_seconds = max(0.0, (_now_utc() - checked_at).total_seconds())
+                if (local is None or checked_at > local.checked_at) and (
+                    _health_prober_active or age_seconds <= cache_ttl_seconds
+                ):
+                    result = WorkerHealthResult(
+                        status=str(shared["status"]),
+                        message=str(shared.get("message") or ""),
+                        http_status=shared.get("http_status"),
+                        latency_ms=shared.get("latency_ms"),
+                    )
+                    # Another process probed this worker; keep the local circuit in step.
+                    if result.status == WORKER_HEALTH_HEALTHY:
+                        record_worker_success(cache_key)
+                    elif result.status in {WORKER_HEALTH_UNREACHABLE, WORKER_HEALTH_REQUEST_FAILED}:
+                        record_worker_failure(cache_key, result.message, trip=True)
+                    entry = WorkerHealthCacheEntry(
+                        checked_at=checked_at,
+                        result=result,
+                        cached_at_monotonic=now_monotonic - age_seconds,
+                    )
+                    _worker_health_cache[cache_key] = entry
+                    return entry
+
+    if local and _health_prober_active:
+        return local
+    return None
+
+
 async def refresh_worker_health(
     db: AsyncSession,
     worker: WorkerServer,
@@ -228,9 +484,9 @@ async def refresh_worker_health(
     cache_ttl_seconds = _resolve_worker_health_cache_ttl()
     cache_key = str(worker.id)
     now_monotonic = time.monotonic()
-    if use_cache and cache_ttl_seconds > 0:
-        cached = _worker_health_cache.get(cache_key)
-        if cached and (now_monotonic - cached.cached_at_monotonic) <= cache_ttl_seconds:
+    if use_cache and (cache_ttl_seconds > 0 or _health_prober_active):
+        cached = await _load_cached_worker_health(cache_key, cache_ttl_seconds)
+        if cached:
             worker.last_health_status = cached.result.status
             worker.last_health_checked_at = cached.checked_at
             worker.last_error_message = None if cached.result.status == WORKER_HEALTH_HEALTHY else cached.result.message
@@ -245,12 +501,28 @@ async def refresh_worker_health(
         result = WorkerHealthResult(status=WORKER_HEALTH_MISCONFIGURED, message=f"Worker config error: {error}")
     else:
         result = await check_worker_health(config)
+        if result.status == WORKER_HEALTH_HEALTHY:
+            record_worker_success(cache_key)
+        elif result.status in {WORKER_HEALTH_UNREACHABLE, WORKER_HEALTH_REQUEST_FAILED}:
+            record_worker_failure(cache_key, result.message, trip=True)
 
     _worker_health_cache[cache_key] = WorkerHealthCacheEntry(
         checked_at=checked_at,
         result=result,
         cached_at_monotonic=now_monotonic,
     )
+    if shared_cache.is_shared:
+        await shared_cache.set(
+            f"worker_health:{cache_key}",
+            {
+                "status": result.status,
+                "message": result.message,
+                "http_status": result.http_status,
+                "latency_ms": result.latency_ms,
+                "checked_at": checked_at.isoformat(),
+            },
+            SHARED_WORKER_HEALTH_RETENTION_SECONDS,
+        )
     worker.last_health_status = result.status
     worker.last_health_checked_at = checked_at
     worker.last_error_message = None if result.status == WORKER_HEALTH_HEALTHY else result.message
@@ -261,18 +533,22 @@ async def refresh_worker_health(
 
 def invalidate_worker_health_cache(worker_id: str) -> None:
     _worker_health_cache.pop(str(worker_id), None)
+    _worker_circuits.pop(str(worker_id), None)
+
+
+def set_health_prober_active(active: bool) -> None:
+    global _health_prober_active
+    _health_prober_active = active
 
 
 async def refresh_all_worker_health(db: AsyncSession) -> list[tuple[WorkerServer, WorkerHealthResult]]:
     result = await db.execute(select(WorkerServer))
     workers = result.scalars().all()
-    output: list[tuple[WorkerServer, WorkerHealthResult]] = []
-
-    for worker in workers:
-        health = await refresh_worker_health(db, worker)
-        output.append((worker, health))
-
-    return output
+    results = await asyncio.gather(
+        *[refresh_worker_health(db, worker, use_cache=False, persist=False) for worker in workers]
+    )
+    await db.flush()
+    return list(zip(workers, results, strict=False))
 
 
 async def call_worker_api(
@@ -291,6 +567,7 @@ async def call_worker_api(
         raise WorkerRequestError("worker_misconfigured", f"Worker config error: {error}", status_code=503) from error
 
     request_timeout = timeout if timeout is not None else _resolve_worker_timeout()
+    _acquire_worker_circuit(config.id)
     try:
         http_status, body = await _request_worker_json(
             base_url=config.base_url,
@@ -301,13 +578,19 @@ async def call_worker_api(
             payload=payload,
         )
     except httpx.TimeoutException as error:
+        record_worker_failure(config.id, "Worker request timed out")
         raise WorkerRequestError("worker_unreachable", "Worker request timed out", status_code=503) from error
     except httpx.ConnectError as error:
+        record_worker_failure(config.id, "Failed to connect to worker")
         raise WorkerRequestError("worker_unreachable", "Failed to connect to worker", status_code=503) from error
     except httpx.HTTPError as error:
+        record_worker_failure(config.id, f"Worker HTTP error: {error}")
         raise WorkerRequestError("worker_request_failed", f"Worker HTTP error: {error}", status_code=503) from error
     except Exception as error:  # noqa: BLE001
+        record_worker_failure(config.id, f"Worker request failed: {error}")
         raise WorkerRequestError("worker_request_failed", f"Worker request failed: {error}", status_code=503) from error
+    # Any HTTP response, even an error status, proves the worker is reachable.
+    record_worker_success(config.id)
 
     if body is None:
         body = {}
@@ -3,12 +3,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from .database import engine, Base
 from .routers import environments, terminal, resources, settings, templates, filesystem, worker_api, worker_servers
 from .models import Setting
+from .core.container_state import start_container_state_watcher, stop_container_state_watcher
+from .core.docker_executor import shutdown_docker_executor
 from .core.security import require_secret_key
+from .core.shared_cache import shared_cache
+from .core.worker_health_prober import start_worker_health_prober, stop_worker_health_prober
+from .core.worker_registry import close_all_worker_http_clients
 from .core.worker_auth import WORKER_ROLE, ensure_worker_api_token, get_node_role
 from sqlalchemy.future import select
 from contextlib import asynccontextmanager
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,8 +36,23 @@ async def lifespan(app: FastAPI):
             session.add(Setting(key="app_name", value="Lyra"))
             await session.commit()
 
+        try:
+            await environments.rebuild_port_map(session)
+        except Exception as error:  # noqa: BLE001
+            # Port allocation rebuilds the map lazily on first use.
+            logger.warning("Failed to build host port map at startup: %s", error)
+
+    start_container_state_watcher()
+    if get_node_role() != WORKER_ROLE:
+        start_worker_health_prober()
+
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await stop_worker_health_prober()
+    stop_container_state_watcher()
+    await close_all_worker_http_clients()
+    await shared_cache.close()
+    shutdown_docker_executor()
 
 
 app = FastAPI(
@@ -49,6 +72,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ARRAY, Boolean, ForeignKey, text
+from sqlalchemy import Column, String, Integer, Text, DateTime, ARRAY, Boolean, ForeignKey, Index, LargeBinary, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -40,10 +40,30 @@ class Environment(Base):
     enable_code_server = Column(Boolean, nullable=False, server_default=text("true"))
     mount_config = Column(JSONB, nullable=True)  # List of {host_path, container_path, mode}
     dockerfile_content = Column(Text, nullable=True)
+    image_ref = Column(String(255), nullable=True)  # Image tag the container runs (shared per Dockerfile hash)
+    custom_ports = Column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))  # List of {host_port, container_port}
+    jupyter_token = Column(Text, nullable=True)
+    build_error = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     worker_server = relationship("WorkerServer", back_populates="environments")
 
+    __table_args__ = (
+        Index("ix_environments_status", "status"),
+        Index("ix_environments_worker_server_id", "worker_server_id"),
+        Index("ix_environments_created_at_id", "created_at", "id"),
+    )
+
+
+class EnvironmentBuildLog(Base):
+    __tablename__ = "environment_build_logs"
+
+    environment_id = Column(UUID(as_uuid=True), ForeignKey("environments.id", ondelete="CASCADE"), primary_key=True)
+    log_gzip = Column(LargeBinary, nullable=False)
+    line_count = Column(Integer, nullable=False, server_default=text("0"))
+    status = Column(String(32), nullable=False)  # succeeded, failed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class Template(Base):
     __tablename__ = "templates"
@@ -60,3 +80,51 @@ class Setting(Base):
 
     key = Column(String(100), primary_key=True)
     value = Column(Text, nullable=False)
+
+
+class WarmContainer(Base):
+    __tablename__ = "warm_containers"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    template_id = Column(UUID(as_uuid=True), ForeignKey("templates.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    enable_jupyter = Column(Boolean, nullable=False, server_default=text("true"))
+    enable_code_server = Column(Boolean, nullable=False, server_default=text("true"))
+    status = Column(String(32), nullable=False, server_default=text("'warming'"))  # warming, ready, claimed
+    container_name = Column(String(255), unique=True, nullable=False)
+    image_ref = Column(String(255), nullable=True)
+    ssh_port = Column(Integer, unique=True, nullable=False)
+    jupyter_port = Column(Integer, unique=True, nullable=False)
+    code_port = Column(Integer, unique=True, nullable=False)
+    jupyter_token = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_warm_containers_claim", "content_hash", "status"),
+        Index("ix_warm_containers_template_id", "template_id"),
+    )
+
+
+class PortReservation(Base):
+    __tablename__ = "port_reservations"
+
+    node = Column(String(64), primary_key=True)
+    port = Column(Integer, primary_key=True)
+    kind = Column(String(16), nullable=False)  # ssh, jupyter, code, custom, surrogate
+    # Environment or warm container id; not a foreign key because ports are reserved before the owner row is inserted.
+    owner_id = Column(UUID(as_uuid=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_port_reservations_owner_id", "owner_id"),)
+
+
+class GpuAllocation(Base):
+    __tablename__ = "gpu_allocations"
+
+    node = Column(String(64), primary_key=True)
+    gpu_index = Column(Integer, primary_key=True)
+    # Not a foreign key: rows of stopped or deleted environments are taken over by the next claim.
+    environment_id = Column(UUID(as_uuid=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_gpu_allocations_environment_id", "environment_id"),)
@@ -1,39 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import text
+from sqlalchemy import delete, func, tuple_, update
+from sqlalchemy.orm import defer
 from types import SimpleNamespace
-from typing import List
-from uuid import UUID
-from ..database import get_db
-from ..models import Environment, Setting, WorkerServer
+from typing import Annotated, List
+from uuid import UUID, uuid4
+from ..database import AsyncSessionLocal, get_db
+from ..models import Environment, EnvironmentBuildLog, Template, WarmContainer, WorkerServer
+from ..core.build_log import build_log_backlog_key, build_log_channel, decompress_build_log, page_build_log_lines
+from ..core.container_state import (
+    LYRA_ENVIRONMENT_ID_LABEL,
+    LYRA_MANAGED_LABEL,
+    ContainerState,
+    container_state_index,
+)
+from ..core.docker_executor import run_docker
+from ..core.gpu_allocator import (
+    LOCAL_GPU_NODE,
+    claim_gpus,
+    count_host_gpus,
+    held_gpu_indices,
+    lock_gpu_node,
+    release_gpus,
+)
+from ..core.port_allocator import (
+    ENVIRONMENT_PORT_KINDS,
+    LOCAL_PORT_NODE,
+    PortsExhausted,
+    port_allocator,
+    release_owner_ports,
+    reserve_ports,
+    reserve_specific_ports,
+    sync_port_map,
+)
+from ..core.provisioning import provisioning_state_key
+from ..core.image_cache import compute_image_content_hash, extract_dockerfile_base_image, image_has_apt_get
+from ..core.environment_stream import EnvironmentStreamHub, format_sse_event
+from ..core.task_redis import create_async_task_redis
+from ..core.shared_cache import resolve_environment_status_cache_seconds, shared_cache
 from ..core.security import SecretCipherError, SecretKeyError, decrypt_secret, encrypt_secret
+from ..core.warm_pool import (
+    WARM_CONTAINER_CLAIMED,
+    WARM_CONTAINER_READY,
+    remove_warm_containers,
+    schedule_warm_pool_refill,
+)
 from ..core.worker_registry import (
     WORKER_HEALTH_HEALTHY,
     WorkerRequestError,
     call_worker_api,
     refresh_worker_health,
+    resolve_worker_fanout_concurrency,
+    resolve_worker_fanout_deadline,
 )
 from ..schemas import (
     CustomPortAllocateRequest,
     CustomPortAllocateResponse,
     CustomPortMapping,
+    EnvironmentBulkCreate,
     EnvironmentCreate,
     EnvironmentRootPasswordResetRequest,
     EnvironmentResponse,
+    EnvironmentSummaryResponse,
+)
+from ..tasks import (
+    create_environment_batch_task,
+    create_environment_task,
+    prefetch_base_image_task,
 )
-from ..tasks import create_environment_task
 import docker
-from docker.errors import ContainerError, ImageNotFound
 import secrets
 import time
 import random
 import logging
 import socket
 from sqlalchemy.exc import IntegrityError
+from redis.exceptions import RedisError
 import json
+import base64
+from datetime import datetime
 from urllib.parse import urlsplit, urlunsplit
 import re
 
@@ -43,18 +91,20 @@ router = APIRouter(
 )
 
 JUPYTER_LAUNCH_TTL_SECONDS = 60
-jupyter_launch_tickets: dict[str, dict[str, str | float | bool]] = {}
 CODE_LAUNCH_TTL_SECONDS = 60
-code_launch_tickets: dict[str, dict[str, str | float | bool]] = {}
-MAX_PORT_ALLOCATION_RETRIES = 8
-CUSTOM_HOST_PORT_RANGE = (35001, 60000)
+# Redeemed/expired tickets are kept a little longer so reuse reports 410 instead of 404.
+LAUNCH_TICKET_RETENTION_SECONDS = 300
 CUSTOM_CONTAINER_PORT_RANGE = (10000, 20000)
 RESERVED_CONTAINER_PORTS = {22, 8080, 8888}
-GPU_ALLOCATION_LOCK_KEY = 93821
-GPU_OCCUPIED_STATUSES = {"creating", "building", "running", "starting"}
-REMOTE_SURROGATE_PORT_RANGE = (61001, 65535)
+ENVIRONMENT_STREAM_LIMIT = 100
+ENVIRONMENT_PAGE_MAX_LIMIT = 500
+ENVIRONMENT_NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ENVIRONMENT_STREAM_KEEPALIVE_SECONDS = 15.0
+BUILD_LOG_PAGE_MAX_LIMIT = 2000
+BUILD_STREAM_WORKER_POLL_SECONDS = 1.0
+BASE_IMAGE_PREFETCH_DEDUPE_SECONDS = 600
+BULK_CREATE_MAX_COUNT = 100
 logger = logging.getLogger(__name__)
-BUILD_ERROR_SETTING_PREFIX = "build_error:"
 
 
 def _write_exec_stdin(sock: object, payload: bytes) -> None:
@@ -94,10 +144,25 @@ def _close_exec_stdin(sock: object) -> None:
             pass
 
 
+def _start_chpasswd_exec(docker_api: object, container_id: str, password: str) -> str:
+    exec_id = docker_api.exec_create(  # type: ignore[attr-defined]
+        container_id,
+        cmd=["chpasswd"],
+        stdin=True,
+        tty=False,
+    )["Id"]
+    sock = docker_api.exec_start(exec_id, detach=False, tty=False, socket=True)  # type: ignore[attr-defined]
+    try:
+        _write_exec_stdin(sock, f"root:{password}\n".encode("utf-8"))
+    finally:
+        _close_exec_stdin(sock)
+    return exec_id
+
+
 async def _wait_exec_exit_code(docker_api: object, exec_id: str, timeout_seconds: float = 2.0) -> int | None:
     deadline = time.time() + timeout_seconds
     while True:
-        info = docker_api.exec_inspect(exec_id)  # type: ignore[attr-defined]
+        info = await run_docker(docker_api.exec_inspect, exec_id)  # type: ignore[attr-defined]
         exit_code = info.get("ExitCode")
         if exit_code is not None:
             try:
@@ -109,39 +174,19 @@ async def _wait_exec_exit_code(docker_api: object, exec_id: str, timeout_seconds
         await asyncio.sleep(0.05)
 
 
-def _extract_dockerfile_base_image(dockerfile_content: str) -> str | None:
-    if not dockerfile_content:
-        return None
-    for raw_line in dockerfile_content.splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
-        match = re.match(r"^FROM\s+(?:--[^\s]+\s+)*([^\s]+)(?:\s+AS\s+\S+)?$", line, flags=re.IGNORECASE)
-        if match:
-            return match.group(1)
-    return None
+def _image_has_apt_get(image_ref: str) -> bool | None:
+    # Never pulls: an unknown base image is prefetched in the background instead.
+    return image_has_apt_get(docker.from_env(), image_ref, pull=False)
 
 
-def _image_has_apt_get(image_ref: str) -> bool:
-    client = docker.from_env()
+async def _schedule_base_image_prefetch(image_ref: str) -> None:
+    if not await shared_cache.add(f"base_image_prefetch:{image_ref}", 1, BASE_IMAGE_PREFETCH_DEDUPE_SECONDS):
+        return
     try:
-        try:
-            client.images.get(image_ref)
-        except ImageNotFound:
-            client.images.pull(image_ref)
-
-        client.containers.run(
-            image_ref,
-            ["command -v apt-get >/dev/null 2>&1"],
-            entrypoint=["sh", "-lc"],
-            remove=True,
-            stdout=True,
-            stderr=True,
-            detach=False,
-        )
-        return True
-    except ContainerError:
-        return False
+        prefetch_base_image_task.delay(image_ref)
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Failed to enqueue base image prefetch for %s: %s", image_ref, error)
+        await shared_cache.delete(f"base_image_prefetch:{image_ref}")
 
 
 def _is_name_unique_violation(error: IntegrityError) -> bool:
@@ -151,23 +196,6 @@ def _is_name_unique_violation(error: IntegrityError) -> bool:
     return "environments_name_key" in text or ("duplicate key value" in text and "(name)" in text)
 
 
-def _is_port_unique_violation(error: IntegrityError) -> bool:
-    text = f"{error}".lower()
-    if error.orig is not None:
-        text += f" {error.orig}".lower()
-    return any(
-        key in text
-        for key in (
-            "environments_ssh_port_key",
-            "environments_jupyter_port_key",
-            "environments_code_port_key",
-            "(ssh_port)",
-            "(jupyter_port)",
-            "(code_port)",
-        )
-    )
-
-
 def _is_worker_environment_not_found(error: WorkerRequestError) -> bool:
     if error.status_code == 404:
         return True
@@ -191,26 +219,46 @@ async def _is_worker_environment_absent(worker: WorkerServer, environment_id: st
         return _is_worker_environment_not_found(error)
 
 
-def _cleanup_expired_jupyter_tickets():
-    now = time.time()
-    expired = [
-        ticket
-        for ticket, meta in jupyter_launch_tickets.items()
-        if meta.get("used") or float(meta.get("expires_at", 0)) < now
-    ]
-    for ticket in expired:
-        jupyter_launch_tickets.pop(ticket, None)
+async def _issue_launch_ticket(
+    kind: str,
+    environment_id: str,
+    ttl_seconds: int,
+    remote_launch_url: str | None = None,
+) -> str:
+    launch_ticket = secrets.token_urlsafe(24)
+    ticket_meta: dict[str, str | float | bool] = {
+        "environment_id": environment_id,
+        "expires_at": time.time() + ttl_seconds,
+        "used": False,
+    }
+    if remote_launch_url:
+        ticket_meta["remote_launch_url"] = remote_launch_url
+    await shared_cache.set(f"launch_ticket:{kind}:{launch_ticket}", ticket_meta, LAUNCH_TICKET_RETENTION_SECONDS)
+    return launch_ticket
 
 
-def _cleanup_expired_code_tickets():
-    now = time.time()
-    expired = [
-        ticket
-        for ticket, meta in code_launch_tickets.items()
-        if meta.get("used") or float(meta.get("expires_at", 0)) < now
-    ]
-    for ticket in expired:
-        code_launch_tickets.pop(ticket, None)
+async def _load_launch_ticket(kind: str, launch_ticket: str, environment_id: str) -> dict:
+    ticket_key = f"launch_ticket:{kind}:{launch_ticket}"
+    ticket_meta = await shared_cache.get(ticket_key)
+    if not ticket_meta:
+        raise HTTPException(status_code=404, detail="Launch ticket not found or expired")
+    if ticket_meta.get("used"):
+        raise HTTPException(status_code=410, detail="Launch ticket already used")
+    if ticket_meta.get("environment_id") != environment_id:
+        raise HTTPException(status_code=400, detail="Launch ticket does not match environment")
+    if float(ticket_meta.get("expires_at", 0)) < time.time():
+        await shared_cache.delete(ticket_key)
+        raise HTTPException(status_code=410, detail="Launch ticket expired")
+    return ticket_meta
+
+
+async def _consume_launch_ticket(kind: str, launch_ticket: str) -> None:
+    # take() is atomic, so a ticket is redeemed once even across API processes.
+    ticket_key = f"launch_ticket:{kind}:{launch_ticket}"
+    claimed = await shared_cache.take(ticket_key)
+    if not claimed or claimed.get("used"):
+        raise HTTPException(status_code=410, detail="Launch ticket already used")
+    await shared_cache.set(ticket_key, {**claimed, "used": True}, LAUNCH_TICKET_RETENTION_SECONDS)
 
 
 def _build_worker_service_url(base_url: str, service_port: int, launch_path: str) -> str:
@@ -260,6 +308,9 @@ def _parse_worker_service_port(raw_port) -> int | None:
 
 def _is_host_environment_running_now(env: Environment) -> bool:
     container_name = f"lyra-{env.name}-{env.id}"
+    if container_state_index.is_synced:
+        state = container_state_index.find(str(env.id), container_name)
+        return state is not None and state.status == "running"
     try:
         client = docker.from_env()
         container = client.containers.get(container_name)
@@ -293,50 +344,16 @@ def _format_container_state_summary(container) -> str:
     return "\n".join(details)
 
 
-def _detect_total_gpus() -> int:
-    import pynvml
-
+async def _detect_total_gpus() -> int:
     try:
-        pynvml.nvmlInit()
-        total_gpus = pynvml.nvmlDeviceGetCount()
-        pynvml.nvmlShutdown()
-        return int(total_gpus)
+        return await run_docker(count_host_gpus)
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to detect GPUs on host") from exc
 
 
-async def _collect_used_gpu_indices(db: AsyncSession, worker_server_id: UUID | None = None) -> set[int]:
-    stmt = select(Environment).where(Environment.status.in_(GPU_OCCUPIED_STATUSES))
-    if worker_server_id is None:
-        stmt = stmt.where(Environment.worker_server_id.is_(None))
-    else:
-        stmt = stmt.where(Environment.worker_server_id == worker_server_id)
-    result = await db.execute(stmt)
-    active_envs = result.scalars().all()
-    used_indices: set[int] = set()
-    for active in active_envs:
-        if active.status not in GPU_OCCUPIED_STATUSES:
-            continue
-        if active.gpu_indices:
-            used_indices.update(active.gpu_indices)
-    return used_indices
-
-
 async def _get_jupyter_token(db: AsyncSession, environment_id: str) -> str | None:
-    key = f"jupyter_token:{environment_id}"
-    result = await db.execute(select(Setting).where(Setting.key == key))
-    token_setting = result.scalars().first()
-    return token_setting.value if token_setting else None
-
-
-async def _get_build_error_message(db: AsyncSession, environment_id: str) -> str | None:
-    key = f"{BUILD_ERROR_SETTING_PREFIX}{environment_id}"
-    result = await db.execute(select(Setting).where(Setting.key == key))
-    setting = result.scalars().first()
-    if not setting:
-        return None
-    value = str(setting.value or "").strip()
-    return value or None
+    result = await db.execute(select(Environment.jupyter_token).where(Environment.id == environment_id))
+    return result.scalars().first()
 
 
 def _normalize_custom_ports(raw_ports) -> list[dict]:
@@ -356,32 +373,6 @@ def _normalize_custom_ports(raw_ports) -> list[dict]:
     return normalized
 
 
-async def _get_custom_ports_map(db: AsyncSession) -> dict[str, list[dict]]:
-    result = await db.execute(select(Setting).where(Setting.key.like("custom_ports:%")))
-    settings = result.scalars().all()
-    custom_ports_map: dict[str, list[dict]] = {}
-    for setting in settings:
-        try:
-            env_id = setting.key.split("custom_ports:", 1)[1]
-            parsed = json.loads(setting.value)
-            custom_ports_map[env_id] = _normalize_custom_ports(parsed)
-        except Exception:
-            continue
-    return custom_ports_map
-
-
-async def _get_custom_ports_for_environment(db: AsyncSession, environment_id: str) -> list[dict]:
-    result = await db.execute(select(Setting).where(Setting.key == f"custom_ports:{environment_id}"))
-    setting = result.scalars().first()
-    if not setting:
-        return []
-    try:
-        parsed = json.loads(setting.value)
-        return _normalize_custom_ports(parsed)
-    except Exception:
-        return []
-
-
 async def _get_worker_server_by_id(db: AsyncSession, worker_server_id: UUID | str | None) -> WorkerServer | None:
     if not worker_server_id:
         return None
@@ -418,17 +409,6 @@ def _map_worker_request_error(error: WorkerRequestError) -> HTTPException:
     )
 
 
-async def _allocate_remote_surrogate_ports(db: AsyncSession) -> tuple[int, int, int]:
-    blocked = await _collect_blocked_host_ports(db)
-    start, end = REMOTE_SURROGATE_PORT_RANGE
-    ssh_port = _pick_free_port(start, end, blocked)
-    blocked.add(ssh_port)
-    jupyter_port = _pick_free_port(start, end, blocked)
-    blocked.add(jupyter_port)
-    code_port = _pick_free_port(start, end, blocked)
-    return ssh_port, jupyter_port, code_port
-
-
 def _get_docker_used_ports() -> set[int]:
     used_ports: set[int] = set()
     try:
@@ -449,63 +429,60 @@ def _get_docker_used_ports() -> set[int]:
     return used_ports
 
 
-def _pick_free_port(start: int, end: int, blocked_ports: set[int]) -> int:
-    candidates = list(range(start, end + 1))
-    random.shuffle(candidates)
-    for port in candidates:
-        if port in blocked_ports:
-            continue
-        return port
-    raise HTTPException(
-        status_code=503,
-        detail=f"No available host ports in range {start}-{end}",
-    )
+async def rebuild_port_map(db: AsyncSession) -> None:
+    docker_used_ports = await run_docker(_get_docker_used_ports)
+    await sync_port_map(db, docker_used_ports=docker_used_ports)
+
+
+async def _ensure_port_map(db: AsyncSession) -> None:
+    if port_allocator.needs_sync(LOCAL_PORT_NODE):
+        await rebuild_port_map(db)
+
+
+async def _reserve_port_triples(db: AsyncSession, owner_ids: list, kinds: tuple[str, ...]) -> list[tuple[int, int, int]]:
+    await _ensure_port_map(db)
+    try:
+        ports = await reserve_ports(db, [(owner_id, kind) for owner_id in owner_ids for kind in kinds])
+    except PortsExhausted as error:
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "port_allocation_failed", "message": str(error)},
+        ) from error
+    return [tuple(ports[index:index + 3]) for index in range(0, len(ports), 3)]
+
+
+async def _allocate_ports(db: AsyncSession, owner_id) -> tuple[int, int, int]:
+    return (await _reserve_port_triples(db, [owner_id], ENVIRONMENT_PORT_KINDS))[0]
+
+
+async def _allocate_remote_surrogate_ports(db: AsyncSession, owner_id) -> tuple[int, int, int]:
+    return (await _reserve_port_triples(db, [owner_id], ("surrogate",) * 3))[0]
 
 
-async def _allocate_ports(db: AsyncSession) -> tuple[int, int, int]:
-    result = await db.execute(select(Environment.ssh_port, Environment.jupyter_port, Environment.code_port))
-    rows = result.all()
-    blocked_ports: set[int] = set()
-    for ssh_port, jupyter_port, code_port in rows:
-        blocked_ports.add(ssh_port)
-        blocked_ports.add(jupyter_port)
-        blocked_ports.add(code_port)
-
-    custom_ports_map = await _get_custom_ports_map(db)
-    for mappings in custom_ports_map.values():
-        for mapping in mappings:
-            host_port = mapping.get("host_port")
-            if isinstance(host_port, int):
-                blocked_ports.add(host_port)
-
-    blocked_ports.update(_get_docker_used_ports())
-
-    ssh_port = _pick_free_port(20000, 25000, blocked_ports)
-    blocked_ports.add(ssh_port)
-    jupyter_port = _pick_free_port(25001, 30000, blocked_ports)
-    blocked_ports.add(jupyter_port)
-    code_port = _pick_free_port(30001, 35000, blocked_ports)
-    return ssh_port, jupyter_port, code_port
-
-
-async def _collect_blocked_host_ports(db: AsyncSession) -> set[int]:
-    blocked_ports: set[int] = set()
-    result = await db.execute(select(Environment.ssh_port, Environment.jupyter_port, Environment.code_port))
-    rows = result.all()
-    for ssh_port, jupyter_port, code_port in rows:
-        blocked_ports.add(ssh_port)
-        blocked_ports.add(jupyter_port)
-        blocked_ports.add(code_port)
-
-    custom_ports_map = await _get_custom_ports_map(db)
-    for mappings in custom_ports_map.values():
-        for mapping in mappings:
-            host_port = mapping.get("host_port")
-            if isinstance(host_port, int):
-                blocked_ports.add(host_port)
-
-    blocked_ports.update(_get_docker_used_ports())
-    return blocked_ports
+async def _allocate_port_batch(db: AsyncSession, owner_ids: list) -> list[tuple[int, int, int]]:
+    return await _reserve_port_triples(db, owner_ids, ENVIRONMENT_PORT_KINDS)
+
+
+async def _reserve_custom_host_ports(db: AsyncSession, owner_id, custom_ports: list[dict]) -> list[int]:
+    host_ports = [mapping["host_port"] for mapping in custom_ports]
+    if not host_ports:
+        return []
+    await _ensure_port_map(db)
+    conflicts = await reserve_specific_ports(db, owner_id, "custom", host_ports)
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "custom_host_port_conflict",
+                "message": f"Custom host port {conflicts[0]} is already in use. Please regenerate ports.",
+            },
+        )
+    return host_ports
+
+
+def _release_map_ports(ports: list[int]) -> None:
+    # The reservation rows rolled back with the transaction; free the ports in the local map too.
+    port_allocator.release(LOCAL_PORT_NODE, ports)
 
 
 def _validate_custom_ports(custom_ports: list[dict]):
@@ -542,6 +519,26 @@ def _validate_custom_ports(custom_ports: list[dict]):
         container_ports.add(container_port)
 
 
+def _pick_container_ports(count: int, blocked_ports: set[int]) -> list[int]:
+    # Container ports are private to each container, so only this request's own mappings
+    # can collide: walk from a random offset instead of materialising the whole range.
+    start, end = CUSTOM_CONTAINER_PORT_RANGE
+    span = end - start + 1
+    offset = random.randrange(span)
+    ports: list[int] = []
+    for step in range(span):
+        port = start + (offset + step) % span
+        if port in blocked_ports:
+            continue
+        ports.append(port)
+        if len(ports) == count:
+            return ports
+    raise HTTPException(
+        status_code=503,
+        detail=f"No available container ports in range {start}-{end}",
+    )
+
+
 async def _allocate_custom_port_mappings(
     db: AsyncSession,
     count: int,
@@ -549,26 +546,23 @@ async def _allocate_custom_port_mappings(
 ) -> list[dict]:
     if count <= 0:
         return []
-    blocked_host_ports = await _collect_blocked_host_ports(db)
+    await _ensure_port_map(db)
     existing = _normalize_custom_ports(current_ports or [])
-    for mapping in existing:
-        blocked_host_ports.add(mapping["host_port"])
+    host_ports = port_allocator.suggest(
+        LOCAL_PORT_NODE, "custom", count, exclude={mapping["host_port"] for mapping in existing}
+    )
+    if len(host_ports) < count:
+        raise HTTPException(status_code=503, detail=str(PortsExhausted("custom")))
 
     blocked_container_ports = set(RESERVED_CONTAINER_PORTS)
     for mapping in existing:
         blocked_container_ports.add(mapping["container_port"])
 
-    mappings: list[dict] = []
-    host_start, host_end = CUSTOM_HOST_PORT_RANGE
-    container_start, container_end = CUSTOM_CONTAINER_PORT_RANGE
-    for _ in range(count):
-        host_port = _pick_free_port(host_start, host_end, blocked_host_ports)
-        blocked_host_ports.add(host_port)
-        container_port = _pick_free_port(container_start, container_end, blocked_container_ports)
-        blocked_container_ports.add(container_port)
-        mappings.append({"host_port": host_port, "container_port": container_port})
-
-    return mappings
+    container_ports = _pick_container_ports(count, blocked_container_ports)
+    return [
+        {"host_port": host_port, "container_port": container_port}
+        for host_port, container_port in zip(host_ports, container_ports)
+    ]
 
 
 @router.post("/ports/allocate", response_model=CustomPortAllocateResponse)
@@ -578,6 +572,168 @@ async def allocate_custom_ports(payload: CustomPortAllocateRequest, db: AsyncSes
     return {"mappings": mappings}
 
 
+async def _assert_host_base_image_supported(dockerfile_content: str) -> None:
+    base_image = extract_dockerfile_base_image(dockerfile_content)
+    if not base_image:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "unsupported_base_image",
+                "message": "Only Debian/Ubuntu-based base images are supported",
+            },
+        )
+    try:
+        has_apt = await run_docker(_image_has_apt_get, base_image)
+    except Exception as error:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "base_image_validation_failed",
+                "message": f"Failed to validate base image: {error}",
+            },
+        ) from error
+    if has_apt is None:
+        # Not on this node yet: the build task pulls it and enforces the same check.
+        await _schedule_base_image_prefetch(base_image)
+    elif not has_apt:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "unsupported_base_image",
+                "message": "Only Debian/Ubuntu-based base images are supported",
+            },
+        )
+
+
+def _is_warm_pool_eligible(env: EnvironmentCreate) -> bool:
+    # Ports, mounts, GPUs and the user are fixed when a container is created, so only plain requests
+    # (matching Dockerfile and service flags, checked at claim time) can reuse one.
+    return not (
+        env.worker_server_id
+        or env.mount_config
+        or env.custom_ports
+        or env.gpu_count > 0
+        or env.selected_gpu_indices
+        or env.container_user != "root"
+    )
+
+
+async def _discard_warm_container(db: AsyncSession, warm_id, container_name: str) -> None:
+    try:
+        async with db.begin():
+            await db.execute(delete(WarmContainer).where(WarmContainer.id == warm_id))
+            await release_owner_ports(db, [warm_id])
+    except Exception as error:  # noqa: BLE001
+        await db.rollback()
+        logger.warning("Failed to drop warm container row %s: %s", warm_id, error)
+    try:
+        await run_docker(remove_warm_containers, [container_name])
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Failed to remove warm container %s: %s", container_name, error)
+
+
+async def _bind_warm_container(container_name: str, target_name: str, root_password: str) -> bool:
+    client = await run_docker(docker.from_env)
+    try:
+        container = await run_docker(client.containers.get, container_name)
+    except docker.errors.NotFound:
+        return False
+    if container.status != "running":
+        return False
+    exec_id = await run_docker(_start_chpasswd_exec, client.api, container.id, root_password)
+    exit_code = await _wait_exec_exit_code(client.api, exec_id)
+    if exit_code is None or exit_code != 0:
+        return False
+    await run_docker(container.rename, target_name)
+    return True
+
+
+async def _claim_warm_environment(db: AsyncSession, env: EnvironmentCreate, encrypted_root_password: str) -> dict | None:
+    content_hash = compute_image_content_hash(env.dockerfile_content)
+    await db.rollback()
+    async with db.begin():
+        result = await db.execute(
+            select(WarmContainer)
+            .where(
+                WarmContainer.content_hash == content_hash,
+                WarmContainer.enable_jupyter == env.enable_jupyter,
+                WarmContainer.enable_code_server == env.enable_code_server,
+                WarmContainer.status == WARM_CONTAINER_READY,
+            )
+            .order_by(WarmContainer.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        entry = result.scalars().first()
+        if entry is None:
+            return None
+        entry.status = WARM_CONTAINER_CLAIMED
+        warm = SimpleNamespace(
+            id=entry.id,
+            template_id=entry.template_id,
+            container_name=entry.container_name,
+            image_ref=entry.image_ref,
+            ssh_port=entry.ssh_port,
+            jupyter_port=entry.jupyter_port,
+            code_port=entry.code_port,
+            jupyter_token=entry.jupyter_token,
+        )
+
+    # The container was labelled with this id and its ports reserved under it when it was started.
+    env_id = warm.id
+    target_name = f"lyra-{env.name}-{env_id}"
+    try:
+        bound = await _bind_warm_container(warm.container_name, target_name, env.root_password)
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Failed to bind warm container %s: %s", warm.container_name, error)
+        bound = False
+    if not bound:
+        await _discard_warm_container(db, warm.id, warm.container_name)
+        schedule_warm_pool_refill(warm.template_id)
+        return None
+
+    try:
+        async with db.begin():
+            new_env = Environment(
+                id=env_id,
+                name=env.name,
+                container_user=env.container_user,
+                root_password="__redacted__",
+                root_password_encrypted=encrypted_root_password,
+                dockerfile_content=env.dockerfile_content,
+                enable_jupyter=env.enable_jupyter,
+                enable_code_server=env.enable_code_server,
+                mount_config=[],
+                gpu_indices=[],
+                ssh_port=warm.ssh_port,
+                jupyter_port=warm.jupyter_port,
+                code_port=warm.code_port,
+                image_ref=warm.image_ref,
+                custom_ports=[],
+                jupyter_token=warm.jupyter_token,
+                status="running",
+            )
+            await db.execute(delete(WarmContainer).where(WarmContainer.id == warm.id))
+            db.add(new_env)
+            await db.flush()
+    except IntegrityError as error:
+        await db.rollback()
+        await _discard_warm_container(db, warm.id, target_name)
+        schedule_warm_pool_refill(warm.template_id)
+        if _is_name_unique_violation(error):
+            raise HTTPException(
+                status_code=409,
+                detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
+            ) from error
+        return None
+
+    schedule_warm_pool_refill(warm.template_id)
+    environment_stream_hub.notify()
+    env_dict = {**new_env.__dict__, "custom_ports": []}
+    env_dict.pop("_sa_instance_state", None)
+    return env_dict
+
+
 @router.post("/", response_model=EnvironmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(get_db)):
     if not env.dockerfile_content or not env.dockerfile_content.strip():
@@ -667,54 +823,42 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
         await db.rollback()
 
         try:
-            created_env = None
-            for _ in range(MAX_PORT_ALLOCATION_RETRIES):
-                try:
-                    async with db.begin():
-                        surrogate_ssh_port, surrogate_jupyter_port, surrogate_code_port = (
-                            await _allocate_remote_surrogate_ports(db)
-                        )
-                        created_env = Environment(
-                            id=remote_env_id,
-                            name=env.name,
-                            worker_server_id=worker_id,
-                            container_user=env.container_user,
-                            root_password="__redacted__",
-                            root_password_encrypted=encrypted_root_password,
-                            dockerfile_content=env.dockerfile_content,
-                            enable_jupyter=env.enable_jupyter,
-                            enable_code_server=env.enable_code_server,
-                            mount_config=[m.model_dump() for m in env.mount_config],
-                            gpu_indices=gpu_indices,
-                            ssh_port=surrogate_ssh_port,
-                            jupyter_port=surrogate_jupyter_port,
-                            code_port=surrogate_code_port,
-                            status=str(remote_env.get("status") or "building"),
-                        )
-                        db.add(created_env)
-                        db.add(Setting(key=f"custom_ports:{created_env.id}", value=json.dumps(custom_ports)))
-                        await db.flush()
-                    break
-                except IntegrityError as error:
-                    await db.rollback()
-                    created_env = None
-                    if _is_name_unique_violation(error):
-                        raise HTTPException(
-                            status_code=409,
-                            detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
-                        ) from error
-                    if _is_port_unique_violation(error):
-                        continue
-                    raise
-
-            if created_env is None:
-                raise HTTPException(
-                    status_code=503,
-                    detail={
-                        "code": "port_allocation_failed",
-                        "message": "Failed to allocate unique ports after several retries. Please try again.",
-                    },
-                )
+            surrogate_ports: list[int] = []
+            try:
+                async with db.begin():
+                    surrogate_ssh_port, surrogate_jupyter_port, surrogate_code_port = (
+                        await _allocate_remote_surrogate_ports(db, remote_env_id)
+                    )
+                    surrogate_ports = [surrogate_ssh_port, surrogate_jupyter_port, surrogate_code_port]
+                    created_env = Environment(
+                        id=remote_env_id,
+                        name=env.name,
+                        worker_server_id=worker_id,
+                        container_user=env.container_user,
+                        root_password="__redacted__",
+                        root_password_encrypted=encrypted_root_password,
+                        dockerfile_content=env.dockerfile_content,
+                        enable_jupyter=env.enable_jupyter,
+                        enable_code_server=env.enable_code_server,
+                        mount_config=[m.model_dump() for m in env.mount_config],
+                        gpu_indices=gpu_indices,
+                        ssh_port=surrogate_ssh_port,
+                        jupyter_port=surrogate_jupyter_port,
+                        code_port=surrogate_code_port,
+                        custom_ports=custom_ports,
+                        status=str(remote_env.get("status") or "building"),
+                    )
+                    db.add(created_env)
+                    await db.flush()
+            except Exception as error:
+                await db.rollback()
+                _release_map_ports(surrogate_ports)
+                if isinstance(error, IntegrityError) and _is_name_unique_violation(error):
+                    raise HTTPException(
+                        status_code=409,
+                        detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
+                    ) from error
+                raise
 
             env_dict = {**created_env.__dict__, "custom_ports": custom_ports}
             env_dict.pop("_sa_instance_state", None)
@@ -723,34 +867,13 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
             await _cleanup_remote_environment()
             raise
 
+    if _is_warm_pool_eligible(env):
+        claimed_env = await _claim_warm_environment(db, env, encrypted_root_password)
+        if claimed_env is not None:
+            return claimed_env
+
     # Host-targeted provisioning validates base image capability on host Docker daemon.
-    base_image = _extract_dockerfile_base_image(env.dockerfile_content)
-    if not base_image:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "code": "unsupported_base_image",
-                "message": "Only Debian/Ubuntu-based base images are supported",
-            },
-        )
-    try:
-        has_apt = _image_has_apt_get(base_image)
-    except Exception as error:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "code": "base_image_validation_failed",
-                "message": f"Failed to validate base image: {error}",
-            },
-        ) from error
-    if not has_apt:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "code": "unsupported_base_image",
-                "message": "Only Debian/Ubuntu-based base images are supported",
-            },
-        )
+    await _assert_host_base_image_supported(env.dockerfile_content)
 
     # GPU allocation logic
     gpu_indices: list[int] = []
@@ -762,7 +885,7 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
                 detail={"code": "invalid_gpu_selection", "message": "Duplicate GPU indices are not allowed"},
             )
 
-        total_gpus = _detect_total_gpus()
+        total_gpus = await _detect_total_gpus()
         invalid = sorted(idx for idx in requested_indices if idx < 0 or idx >= total_gpus)
         if invalid:
             raise HTTPException(
@@ -772,8 +895,8 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
 
         gpu_indices = sorted(requested_indices)
     elif env.gpu_count > 0:
-        total_gpus = _detect_total_gpus()
-        used_indices = await _collect_used_gpu_indices(db, env.worker_server_id)
+        total_gpus = await _detect_total_gpus()
+        used_indices = await held_gpu_indices(db, LOCAL_GPU_NODE)
         available_indices = [i for i in range(total_gpus) if i not in used_indices]
         if len(available_indices) < env.gpu_count:
             raise HTTPException(
@@ -787,45 +910,19 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
 
     custom_ports = _normalize_custom_ports(env.custom_ports)
     _validate_custom_ports(custom_ports)
-    blocked_host_ports = await _collect_blocked_host_ports(db)
-    for mapping in custom_ports:
-        if mapping["host_port"] in blocked_host_ports:
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "code": "custom_host_port_conflict",
-                    "message": f"Custom host port {mapping['host_port']} is already in use. Please regenerate ports.",
-                },
-            )
 
     await db.rollback()
 
-    new_env = None
-    jupyter_token = secrets.token_urlsafe(32)
-    for _ in range(MAX_PORT_ALLOCATION_RETRIES):
-        try:
-            async with db.begin():
-                # Serialize GPU allocation + environment insert.
-                await db.execute(
-                    text("SELECT pg_advisory_xact_lock(:lock_key)"),
-                    {"lock_key": GPU_ALLOCATION_LOCK_KEY},
-                )
-
-                if requested_indices:
-                    latest_used_indices = await _collect_used_gpu_indices(db, env.worker_server_id)
-                    conflicted = sorted(idx for idx in requested_indices if idx in latest_used_indices)
-                    if conflicted:
-                        raise HTTPException(
-                            status_code=409,
-                            detail={
-                                "code": "gpu_already_allocated",
-                                "message": f"Requested GPUs are already in use: {conflicted}",
-                            },
-                        )
-                    gpu_indices = sorted(requested_indices)
-                elif env.gpu_count > 0:
-                    total_gpus = _detect_total_gpus()
-                    latest_used_indices = await _collect_used_gpu_indices(db, env.worker_server_id)
+    env_id = uuid4()
+    reserved_ports: list[int] = []
+    try:
+        async with db.begin():
+            if requested_indices or env.gpu_count > 0:
+                # Only GPU creates on this node serialize; the unique (node, gpu_index) rows catch the rest.
+                await lock_gpu_node(db, LOCAL_GPU_NODE)
+                if not requested_indices:
+                    total_gpus = await _detect_total_gpus()
+                    latest_used_indices = await held_gpu_indices(db, LOCAL_GPU_NODE)
                     available_indices = [i for i in range(total_gpus) if i not in latest_used_indices]
                     if len(available_indices) < env.gpu_count:
                         raise HTTPException(
@@ -836,59 +933,49 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
                             },
                         )
                     gpu_indices = available_indices[: env.gpu_count]
+                conflicted = await claim_gpus(db, LOCAL_GPU_NODE, [(env_id, idx) for idx in gpu_indices])
+                if conflicted:
+                    raise HTTPException(
+                        status_code=409,
+                        detail={
+                            "code": "gpu_already_allocated",
+                            "message": f"Requested GPUs are already in use: {conflicted}",
+                        },
+                    )
 
-                try:
-                    ssh_port, jupyter_port, code_port = await _allocate_ports(db)
-                except HTTPException as port_error:
-                    if port_error.status_code == 503:
-                        raise HTTPException(
-                            status_code=503,
-                            detail={
-                                "code": "port_allocation_failed",
-                                "message": "Failed to allocate unique ports. Please try again.",
-                            },
-                        ) from port_error
-                    raise
-
-                candidate_env = Environment(
-                    name=env.name,
-                    container_user=env.container_user,
-                    root_password="__redacted__",
-                    root_password_encrypted=encrypted_root_password,
-                    dockerfile_content=env.dockerfile_content,
-                    enable_jupyter=env.enable_jupyter,
-                    enable_code_server=env.enable_code_server,
-                    mount_config=[m.dict() for m in env.mount_config],
-                    gpu_indices=gpu_indices,
-                    ssh_port=ssh_port,
-                    jupyter_port=jupyter_port,
-                    code_port=code_port,
-                    status="creating",
-                )
-                db.add(candidate_env)
-                await db.flush()
-
-                db.add(Setting(key=f"jupyter_token:{candidate_env.id}", value=jupyter_token))
-                db.add(Setting(key=f"custom_ports:{candidate_env.id}", value=json.dumps(custom_ports)))
-                new_env = candidate_env
-
-            break
-        except IntegrityError as error:
-            await db.rollback()
-            if _is_name_unique_violation(error):
-                raise HTTPException(
-                    status_code=409,
-                    detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
-                ) from error
-
-    if new_env is None:
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "code": "port_allocation_failed",
-                "message": "Failed to allocate unique ports after several retries. Please try again.",
-            },
-        )
+            reserved_ports += await _reserve_custom_host_ports(db, env_id, custom_ports)
+            ssh_port, jupyter_port, code_port = await _allocate_ports(db, env_id)
+            reserved_ports += [ssh_port, jupyter_port, code_port]
+
+            new_env = Environment(
+                id=env_id,
+                name=env.name,
+                container_user=env.container_user,
+                root_password="__redacted__",
+                root_password_encrypted=encrypted_root_password,
+                dockerfile_content=env.dockerfile_content,
+                enable_jupyter=env.enable_jupyter,
+                enable_code_server=env.enable_code_server,
+                mount_config=[m.dict() for m in env.mount_config],
+                gpu_indices=gpu_indices,
+                ssh_port=ssh_port,
+                jupyter_port=jupyter_port,
+                code_port=code_port,
+                custom_ports=custom_ports,
+                jupyter_token=secrets.token_urlsafe(32),
+                status="creating",
+            )
+            db.add(new_env)
+            await db.flush()
+    except Exception as error:
+        await db.rollback()
+        _release_map_ports(reserved_ports)
+        if isinstance(error, IntegrityError) and _is_name_unique_violation(error):
+            raise HTTPException(
+                status_code=409,
+                detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
+            ) from error
+        raise
 
     try:
         create_environment_task.delay(str(new_env.id))
@@ -899,18 +986,8 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
                 rollback_env = await db.execute(select(Environment).where(Environment.id == new_env.id))
                 env_to_remove = rollback_env.scalars().first()
                 if env_to_remove:
-                    token_result = await db.execute(select(Setting).where(Setting.key == f"jupyter_token:{new_env.id}"))
-                    token_setting = token_result.scalars().first()
-                    if token_setting:
-                        await db.delete(token_setting)
-
-                    custom_ports_result = await db.execute(
-                        select(Setting).where(Setting.key == f"custom_ports:{new_env.id}")
-                    )
-                    custom_ports_setting = custom_ports_result.scalars().first()
-                    if custom_ports_setting:
-                        await db.delete(custom_ports_setting)
-
+                    await release_owner_ports(db, [new_env.id])
+                    await release_gpus(db, [new_env.id])
                     await db.delete(env_to_remove)
                 compensation_done = True
         except Exception:
@@ -941,11 +1018,178 @@ async def create_environment(env: EnvironmentCreate, db: AsyncSession = Depends(
             created_env.status = "building"
             new_env = created_env
 
+    environment_stream_hub.notify()
     env_dict = {**new_env.__dict__, "custom_ports": custom_ports}
     env_dict.pop("_sa_instance_state", None)
     return env_dict
 
 
+@router.post("/bulk", response_model=List[EnvironmentResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_environments(payload: EnvironmentBulkCreate, db: AsyncSession = Depends(get_db)):
+    if payload.count > BULK_CREATE_MAX_COUNT:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "bulk_count_exceeded",
+                "message": f"At most {BULK_CREATE_MAX_COUNT} environments can be created at once",
+            },
+        )
+    template = await db.get(Template, payload.template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    template_config = template.config or {}
+    dockerfile_content = template_config.get("dockerfile_content")
+    if not isinstance(dockerfile_content, str) or not dockerfile_content.strip():
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "dockerfile_required", "message": "Template has no Dockerfile content"},
+        )
+    enable_jupyter = (
+        payload.enable_jupyter if payload.enable_jupyter is not None else bool(template_config.get("enable_jupyter", True))
+    )
+    enable_code_server = (
+        payload.enable_code_server
+        if payload.enable_code_server is not None
+        else bool(template_config.get("enable_code_server", True))
+    )
+
+    names = [
+        payload.name_pattern.replace("{index}", str(index))
+        for index in range(payload.start_index, payload.start_index + payload.count)
+    ]
+    existing = await db.execute(select(Environment.name).where(Environment.name.in_(names)))
+    taken = sorted(existing.scalars().all())
+    if taken:
+        raise HTTPException(
+            status_code=409,
+            detail={"code": "duplicate_environment_name", "message": f"Environment names already exist: {taken}"},
+        )
+
+    try:
+        encrypted_root_password = encrypt_secret(payload.root_password)
+    except SecretKeyError as error:
+        raise HTTPException(
+            status_code=500,
+            detail={"code": "security_key_missing", "message": str(error)},
+        ) from error
+    except SecretCipherError as error:
+        raise HTTPException(
+            status_code=500,
+            detail={"code": "password_encryption_failed", "message": str(error)},
+        ) from error
+
+    await _assert_host_base_image_supported(dockerfile_content)
+    await db.rollback()
+
+    env_ids = [uuid4() for _ in names]
+    reserved_ports: list[int] = []
+    try:
+        async with db.begin():
+            # One reservation round, one GPU claim and one flush for the whole batch.
+            gpu_batches: list[list[int]] = [[] for _ in names]
+            if payload.gpu_count > 0:
+                await lock_gpu_node(db, LOCAL_GPU_NODE)
+                total_gpus = await _detect_total_gpus()
+                used_indices = await held_gpu_indices(db, LOCAL_GPU_NODE)
+                available_indices = [i for i in range(total_gpus) if i not in used_indices]
+                needed = payload.gpu_count * len(names)
+                if len(available_indices) < needed:
+                    raise HTTPException(
+                        status_code=409,
+                        detail={
+                            "code": "gpu_capacity_insufficient",
+                            "message": f"Not enough GPUs available. Requested: {needed}, "
+                            f"Available: {len(available_indices)}",
+                        },
+                    )
+                gpu_batches = [
+                    available_indices[position * payload.gpu_count:(position + 1) * payload.gpu_count]
+                    for position in range(len(names))
+                ]
+                conflicted = await claim_gpus(
+                    db,
+                    LOCAL_GPU_NODE,
+                    [(env_id, idx) for env_id, indices in zip(env_ids, gpu_batches) for idx in indices],
+                )
+                if conflicted:
+                    raise HTTPException(
+                        status_code=409,
+                        detail={
+                            "code": "gpu_already_allocated",
+                            "message": f"Requested GPUs are already in use: {conflicted}",
+                        },
+                    )
+
+            port_batches = await _allocate_port_batch(db, env_ids)
+            reserved_ports = [port for ports in port_batches for port in ports]
+
+            new_envs: list[Environment] = []
+            for env_id, name, gpu_indices, (ssh_port, jupyter_port, code_port) in zip(
+                env_ids, names, gpu_batches, port_batches
+            ):
+                candidate_env = Environment(
+                    id=env_id,
+                    name=name,
+                    container_user=payload.container_user,
+                    root_password="__redacted__",
+                    root_password_encrypted=encrypted_root_password,
+                    dockerfile_content=dockerfile_content,
+                    enable_jupyter=enable_jupyter,
+                    enable_code_server=enable_code_server,
+                    mount_config=[],
+                    gpu_indices=gpu_indices,
+                    ssh_port=ssh_port,
+                    jupyter_port=jupyter_port,
+                    code_port=code_port,
+                    custom_ports=[],
+                    jupyter_token=secrets.token_urlsafe(32),
+                    status="creating",
+                )
+                db.add(candidate_env)
+                new_envs.append(candidate_env)
+            await db.flush()
+    except Exception as error:
+        await db.rollback()
+        _release_map_ports(reserved_ports)
+        if isinstance(error, IntegrityError) and _is_name_unique_violation(error):
+            raise HTTPException(
+                status_code=409,
+                detail={"code": "duplicate_environment_name", "message": "Environment name already exists"},
+            ) from error
+        raise
+
+    try:
+        create_environment_batch_task.delay([str(env_id) for env_id in env_ids])
+    except Exception as enqueue_error:
+        try:
+            async with db.begin():
+                await release_owner_ports(db, env_ids)
+                await release_gpus(db, env_ids)
+                await db.execute(delete(Environment).where(Environment.id.in_(env_ids)))
+        except Exception:
+            await db.rollback()
+            async with db.begin():
+                await db.execute(update(Environment).where(Environment.id.in_(env_ids)).values(status="error"))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "code": "task_enqueue_failed",
+                "message": "Failed to enqueue provisioning task. Please try again.",
+            },
+        ) from enqueue_error
+
+    async with db.begin():
+        await db.execute(update(Environment).where(Environment.id.in_(env_ids)).values(status="building"))
+
+    environment_stream_hub.notify()
+    env_dicts = []
+    for new_env in new_envs:
+        env_dict = {**new_env.__dict__, "status": "building", "custom_ports": []}
+        env_dict.pop("_sa_instance_state", None)
+        env_dicts.append(env_dict)
+    return env_dicts
+
+
 def _resolve_environment_status(
     current_status: str,
     container_status: str,
@@ -963,40 +1207,375 @@ def _resolve_environment_status(
             return "running"
         return current_status
 
-    if current_status == "stopping":
-        if state_status in ["created", "restarting", "starting"]:
-            return "stopping"
-        return "stopped"
+    if current_status == "stopping":
+        if state_status in ["created", "restarting", "starting"]:
+            return "stopping"
+        return "stopped"
+
+    if current_status == "starting":
+        if state_status in ["created", "restarting", "starting"] and exit_code is None:
+            return "starting"
+        if exit_code is None:
+            return "stopped"
+        if exit_code in [0, 143]:
+            return "stopped"
+        if exit_code == 137:
+            if oom_killed or str(error_msg).strip():
+                return "error"
+            return "stopped"
+        return "error"
+
+    if exit_code is None:
+        return "stopped"
+    if exit_code in [0, 143]:
+        return "stopped"
+    if exit_code == 137:
+        if oom_killed or str(error_msg).strip():
+            return "error"
+        return "stopped"
+    return "error"
+
+
+def _normalize_container_id(raw_container_id) -> str | None:
+    if not isinstance(raw_container_id, str) or not raw_container_id.strip():
+        return None
+    return raw_container_id.strip()[:12]
+
+
+class _HostContainerSnapshot:
+    def __init__(self):
+        self.by_name: dict[str, object] = {}
+        self.by_environment_id: dict[str, object] = {}
+
+    def add(self, container) -> None:
+        attrs = getattr(container, "attrs", None) or {}
+        for raw_name in attrs.get("Names") or []:
+            self.by_name[str(raw_name).lstrip("/")] = container
+        environment_id = (attrs.get("Labels") or {}).get(LYRA_ENVIRONMENT_ID_LABEL)
+        if environment_id:
+            self.by_environment_id[str(environment_id)] = container
+
+    def find(self, env: Environment):
+        container = self.by_environment_id.get(str(env.id))
+        if container is None:
+            container = self.by_name.get(f"lyra-{env.name}-{env.id}")
+        return container
+
+
+def _load_host_container_snapshot(client, envs: list) -> _HostContainerSnapshot:
+    # sparse=True keeps this to a single list call instead of one inspect per container.
+    snapshot = _HostContainerSnapshot()
+    for container in client.containers.list(all=True, sparse=True, filters={"label": LYRA_MANAGED_LABEL}):
+        snapshot.add(container)
+    if any(snapshot.find(env) is None for env in envs):
+        # Containers created before labelling can only be matched by name.
+        for container in client.containers.list(all=True, sparse=True, filters={"name": "lyra-"}):
+            snapshot.add(container)
+    return snapshot
+
+
+def _load_host_container_snapshot_or_none(client, envs: list) -> _HostContainerSnapshot | None:
+    if not envs:
+        return None
+    try:
+        return _load_host_container_snapshot(client, envs)
+    except Exception as error:
+        logger.warning("Docker container snapshot failed. Falling back to per-environment lookups: %s", error)
+        return None
+
+
+def _read_container_state(client, container) -> dict:
+    state = container.attrs.get("State", {})
+    if isinstance(state, dict):
+        return state
+
+    # Sparse list entries only carry a state string and a human readable status.
+    exit_code = None
+    match = re.search(r"Exited \((-?\d+)\)", str(container.attrs.get("Status") or ""))
+    if match:
+        exit_code = int(match.group(1))
+    if exit_code == 137:
+        # Only a full inspect can tell an OOM kill apart from a plain SIGKILL.
+        return client.containers.get(container.id).attrs.get("State", {})
+    return {"Status": str(state or ""), "ExitCode": exit_code, "OOMKilled": False, "Error": ""}
+
+
+def _missing_container_status(env: Environment) -> str:
+    if env.status in ["running", "stopping", "starting"]:
+        return "stopped"
+    return env.status
+
+
+def _resolve_host_environment_status(
+    client,
+    env: Environment,
+    snapshot: _HostContainerSnapshot | None = None,
+) -> tuple[str, str | None]:
+    container_name = f"lyra-{env.name}-{env.id}"
+    try:
+        if snapshot is not None:
+            container = snapshot.find(env)
+            if container is None:
+                return _missing_container_status(env), None
+        else:
+            container = client.containers.get(container_name)
+        container_id = _normalize_container_id(container.short_id or container.id)
+        state_info = _read_container_state(client, container)
+        new_status = _resolve_environment_status(
+            current_status=env.status,
+            container_status=container.status,
+            state_status=state_info.get("Status", ""),
+            exit_code=state_info.get("ExitCode"),
+            oom_killed=state_info.get("OOMKilled", False),
+            error_msg=state_info.get("Error", ""),
+        )
+        return new_status, container_id
+    except docker.errors.NotFound:
+        return _missing_container_status(env), None
+    except docker.errors.DockerException as error:
+        logger.warning(
+            "Docker status lookup failed for env %s. Falling back to DB status: %s",
+            env.id,
+            error,
+        )
+    except Exception as error:
+        logger.warning(
+            "Unexpected status resolution failure for env %s. Falling back to DB status: %s",
+            env.id,
+            error,
+        )
+    return env.status, None
+
+
+def _get_host_docker_client_or_none():
+    try:
+        return docker.from_env()
+    except docker.errors.DockerException as error:
+        logger.warning("Docker daemon unavailable while reading environments: %s", error)
+    except Exception as error:
+        logger.warning("Unexpected Docker client initialization failure: %s", error)
+    return None
+
+
+def _resolve_host_environment_statuses(envs: list, use_snapshot: bool = True) -> dict[str, tuple[str, str | None]]:
+    if not envs:
+        return {}
+    client = _get_host_docker_client_or_none()
+    if client is None:
+        return {}
+    snapshot = _load_host_container_snapshot_or_none(client, envs) if use_snapshot else None
+    return {str(env.id): _resolve_host_environment_status(client, env, snapshot) for env in envs}
+
+
+def _resolve_indexed_environment_status(env: Environment, state: ContainerState | None) -> tuple[str, str | None]:
+    if state is None:
+        return _missing_container_status(env), None
+    new_status = _resolve_environment_status(
+        current_status=env.status,
+        container_status=state.status,
+        state_status=state.status,
+        exit_code=state.exit_code,
+        oom_killed=state.oom_killed,
+        error_msg=state.error,
+    )
+    return new_status, _normalize_container_id(state.short_id)
+
+
+async def _read_host_environment_statuses(envs: list, use_snapshot: bool = True) -> dict[str, tuple[str, str | None]]:
+    if not envs:
+        return {}
+    if container_state_index.is_synced:
+        # The Docker event watcher keeps this index current, so no daemon round-trip is needed.
+        return {
+            str(env.id): _resolve_indexed_environment_status(
+                env,
+                container_state_index.find(str(env.id), f"lyra-{env.name}-{env.id}"),
+            )
+            for env in envs
+        }
+    return await run_docker(_resolve_host_environment_statuses, envs, use_snapshot)
+
+
+async def _invalidate_environment_status_cache(environment_id) -> None:
+    await shared_cache.delete(f"env_status:{environment_id}")
+
+
+def _remote_status_entry(
+    status: str,
+    container_id: str | None = None,
+    worker_error_code: str | None = None,
+    worker_error_message: str | None = None,
+) -> dict:
+    return {
+        "status": status,
+        "container_id": container_id,
+        "worker_error_code": worker_error_code,
+        "worker_error_message": worker_error_message,
+    }
+
+
+async def _fetch_worker_environment_statuses_individually(
+    worker: WorkerServer,
+    envs: list,
+    concurrency: int,
+) -> dict[str, dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch_one(env) -> tuple[str, dict]:
+        async with semaphore:
+            try:
+                remote_env = await call_worker_api(
+                    worker,
+                    method="GET",
+                    path=f"/api/worker/environments/{env.id}",
+                )
+            except WorkerRequestError as error:
+                return str(env.id), _remote_status_entry("unknown", None, error.code, error.message)
+        return str(env.id), _remote_status_entry(
+            str(remote_env.get("status") or env.status),
+            _normalize_container_id(remote_env.get("container_id")),
+        )
+
+    return dict(await asyncio.gather(*[_fetch_one(env) for env in envs]))
+
+
+async def _fetch_worker_environment_statuses(
+    db: AsyncSession,
+    worker: WorkerServer,
+    envs: list,
+    concurrency: int = 1,
+) -> dict[str, dict]:
+    health = await refresh_worker_health(db, worker, persist=False)
+    if health.status != WORKER_HEALTH_HEALTHY:
+        return {
+            str(env.id): _remote_status_entry(
+                "unknown",
+                None,
+                f"worker_health_{worker.last_health_status}",
+                health.message or "Worker server is unreachable",
+            )
+            for env in envs
+        }
+
+    try:
+        remote_payload = await call_worker_api(
+            worker,
+            method="POST",
+            path="/api/worker/environments/status",
+            payload={"environment_ids": [str(env.id) for env in envs]},
+        )
+    except WorkerRequestError as error:
+        if error.status_code in {404, 405}:
+            # Worker predates the batch status endpoint.
+            return await _fetch_worker_environment_statuses_individually(worker, envs, concurrency)
+        return {str(env.id): _remote_status_entry("unknown", None, error.code, error.message) for env in envs}
+
+    remote_items = remote_payload.get("environments") if isinstance(remote_payload, dict) else None
+    remote_by_id: dict[str, dict] = {}
+    for item in remote_items or []:
+        if isinstance(item, dict) and item.get("id"):
+            remote_by_id[str(item.get("id"))] = item
+
+    statuses: dict[str, dict] = {}
+    for env in envs:
+        item = remote_by_id.get(str(env.id))
+        if item is None:
+            statuses[str(env.id)] = _remote_status_entry(
+                "unknown", None, "environment_not_found", "Environment not found on worker"
+            )
+            continue
+        statuses[str(env.id)] = _remote_status_entry(
+            str(item.get("status") or env.status),
+            _normalize_container_id(item.get("container_id")),
+        )
+    return statuses
+
 
-    if current_status == "starting":
-        if state_status in ["created", "restarting", "starting"] and exit_code is None:
-            return "starting"
-        if exit_code is None:
-            return "stopped"
-        if exit_code in [0, 143]:
-            return "stopped"
-        if exit_code == 137:
-            if oom_killed or str(error_msg).strip():
-                return "error"
-            return "stopped"
-        return "error"
+def _encode_environment_cursor(env: Environment) -> str:
+    created_at = env.created_at.isoformat() if env.created_at else ""
+    raw = json.dumps({"created_at": created_at, "id": str(env.id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
 
-    if exit_code is None:
-        return "stopped"
-    if exit_code in [0, 143]:
-        return "stopped"
-    if exit_code == 137:
-        if oom_killed or str(error_msg).strip():
-            return "error"
-        return "stopped"
-    return "error"
+
+def _decode_environment_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return datetime.fromisoformat(payload["created_at"]), UUID(str(payload["id"]))
+    except (ValueError, TypeError, KeyError, UnicodeError) as error:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "invalid_cursor", "message": "Pagination cursor is invalid"},
+        ) from error
 
 
-@router.get("/", response_model=List[EnvironmentResponse])
-async def read_environments(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Environment).offset(skip).limit(limit))
+def _build_environment_list_query(
+    cursor: str | None = None,
+    statuses: list[str] | None = None,
+    worker_server_id: str | None = None,
+    uses_gpu: bool | None = None,
+    name_prefix: str | None = None,
+):
+    # List views never show the Dockerfile or secrets; keep those columns out of the query.
+    stmt = (
+        select(Environment)
+        .options(defer(Environment.dockerfile_content), defer(Environment.jupyter_token))
+        .order_by(Environment.created_at, Environment.id)
+    )
+    if cursor:
+        created_at, env_id = _decode_environment_cursor(cursor)
+        stmt = stmt.where(tuple_(Environment.created_at, Environment.id) > tuple_(created_at, env_id))
+    wanted_statuses = [value.strip() for raw in statuses or [] for value in raw.split(",") if value.strip()]
+    if wanted_statuses:
+        stmt = stmt.where(Environment.status.in_(wanted_statuses))
+    if worker_server_id:
+        if worker_server_id == "host":
+            stmt = stmt.where(Environment.worker_server_id.is_(None))
+        else:
+            try:
+                stmt = stmt.where(Environment.worker_server_id == UUID(worker_server_id))
+            except ValueError as error:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"code": "invalid_worker_server_id", "message": "worker_server_id must be a UUID or 'host'"},
+                ) from error
+    if uses_gpu is not None:
+        gpu_count = func.coalesce(func.cardinality(Environment.gpu_indices), 0)
+        stmt = stmt.where(gpu_count > 0 if uses_gpu else gpu_count == 0)
+    if name_prefix:
+        stmt = stmt.where(Environment.name.startswith(name_prefix, autoescape=True))
+    return stmt
+
+
+@router.get("/", response_model=List[EnvironmentSummaryResponse])
+async def read_environments(
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    status_filter: Annotated[list[str] | None, Query(alias="status")] = None,
+    worker_server_id: str | None = None,
+    uses_gpu: bool | None = None,
+    name_prefix: str | None = None,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    limit = max(1, min(limit, ENVIRONMENT_PAGE_MAX_LIMIT))
+    stmt = _build_environment_list_query(
+        cursor=cursor,
+        statuses=status_filter,
+        worker_server_id=worker_server_id,
+        uses_gpu=uses_gpu,
+        name_prefix=name_prefix,
+    )
+    if cursor is None and skip > 0:
+        stmt = stmt.offset(skip)
+    # Fetch one extra row to learn whether another page exists.
+    result = await db.execute(stmt.limit(limit + 1))
     envs = result.scalars().all()
-    custom_ports_map = await _get_custom_ports_map(db)
+    if len(envs) > limit:
+        envs = envs[:limit]
+        response.headers[ENVIRONMENT_NEXT_CURSOR_HEADER] = _encode_environment_cursor(envs[-1])
     worker_ids = {getattr(env, "worker_server_id", None) for env in envs if getattr(env, "worker_server_id", None)}
     worker_map: dict[UUID, WorkerServer] = {}
     if worker_ids:
@@ -1004,131 +1583,95 @@ async def read_environments(skip: int = 0, limit: int = 100, db: AsyncSession =
         workers = workers_result.scalars().all()
         worker_map = {worker.id: worker for worker in workers}
 
-    worker_health_cache: dict[UUID, bool] = {}
-    worker_health_message_cache: dict[UUID, str] = {}
+    # Resolve worker-bound environments with one batch status call per worker.
+    remote_envs_by_worker: dict[UUID, list] = {}
+    for env in envs:
+        env_worker_server_id = getattr(env, "worker_server_id", None)
+        if env_worker_server_id and env_worker_server_id in worker_map:
+            remote_envs_by_worker.setdefault(env_worker_server_id, []).append(env)
+
+    # Recently resolved worker statuses are shared between API processes, so
+    # concurrent list requests do not each fan out to the same workers.
+    remote_status_map: dict[str, dict] = {}
+    status_cache_seconds = resolve_environment_status_cache_seconds()
+    if status_cache_seconds > 0 and remote_envs_by_worker:
+        remote_ids = [str(env.id) for worker_envs in remote_envs_by_worker.values() for env in worker_envs]
+        cached_states = await shared_cache.get_many([f"env_status:{env_id}" for env_id in remote_ids])
+        for env_id, cached_state in zip(remote_ids, cached_states, strict=False):
+            if isinstance(cached_state, dict):
+                remote_status_map[env_id] = cached_state
+        remote_envs_by_worker = {
+            worker_id: pending
+            for worker_id, worker_envs in remote_envs_by_worker.items()
+            if (pending := [env for env in worker_envs if str(env.id) not in remote_status_map])
+        }
 
-    client = None
-    docker_available = True
-    try:
-        client = docker.from_env()
-    except docker.errors.DockerException as error:
-        docker_available = False
-        logger.warning("Docker daemon unavailable while reading environments: %s", error)
-    except Exception as error:
-        docker_available = False
-        logger.warning("Unexpected Docker client initialization failure: %s", error)
+    # Workers are queried concurrently under one shared deadline, so a slow
+    # worker only degrades its own environments to "unknown".
+    worker_batches = list(remote_envs_by_worker.items())
+    if worker_batches:
+        concurrency = resolve_worker_fanout_concurrency()
+        deadline = resolve_worker_fanout_deadline()
+        batch_results = await asyncio.gather(
+            *[
+                asyncio.wait_for(
+                    _fetch_worker_environment_statuses(db, worker_map[worker_id], worker_envs, concurrency),
+                    timeout=deadline,
+                )
+                for worker_id, worker_envs in worker_batches
+            ],
+            return_exceptions=True,
+        )
+        for (worker_id, worker_envs), batch_result in zip(worker_batches, batch_results, strict=False):
+            if isinstance(batch_result, asyncio.TimeoutError):
+                logger.warning("Worker %s did not respond within %.1fs while listing environments", worker_id, deadline)
+                failed_state = _remote_status_entry(
+                    "unknown", None, "worker_timeout", "Worker did not respond before the request deadline"
+                )
+            elif isinstance(batch_result, Exception):
+                logger.warning("Worker %s status lookup failed while listing environments: %s", worker_id, batch_result)
+                failed_state = _remote_status_entry(
+                    "unknown", None, "worker_request_failed", f"Worker request failed: {batch_result}"
+                )
+            else:
+                remote_status_map.update(batch_result)
+                await shared_cache.set_many(
+                    {
+                        f"env_status:{env_id}": state
+                        for env_id, state in batch_result.items()
+                        if not state.get("worker_error_code")
+                    },
+                    status_cache_seconds,
+                )
+                continue
+            for env in worker_envs:
+                remote_status_map[str(env.id)] = dict(failed_state)
+
+    host_envs = [env for env in envs if not getattr(env, "worker_server_id", None)]
+    host_states = await _read_host_environment_statuses(host_envs)
 
     env_responses = []
 
     for env in envs:
-        container_name = f"lyra-{env.name}-{env.id}"
-        container_id: str | None = None
-        response_status = env.status
-
         env_worker_server_id = getattr(env, "worker_server_id", None)
         if env_worker_server_id:
             worker = worker_map.get(env_worker_server_id)
             if not worker:
-                env_dict = {
-                    **env.__dict__,
-                    "status": "unknown",
-                    "worker_server_name": None,
-                    "worker_server_base_url": None,
-                    "worker_error_code": "worker_not_found",
-                    "worker_error_message": "Worker server not found",
-                    "container_id": None,
-                    "custom_ports": custom_ports_map.get(str(env.id), []),
-                }
-                env_dict.pop("_sa_instance_state", None)
-                env_responses.append(env_dict)
-                continue
-
-            healthy = worker_health_cache.get(worker.id)
-            if healthy is None:
-                health = await refresh_worker_health(db, worker, persist=False)
-                healthy = health.status == WORKER_HEALTH_HEALTHY
-                worker_health_cache[worker.id] = healthy
-                worker_health_message_cache[worker.id] = health.message
-
-            if not healthy:
-                env_dict = {
-                    **env.__dict__,
-                    "status": "unknown",
-                    "worker_server_name": worker.name,
-                    "worker_server_base_url": worker.base_url,
-                    "worker_error_code": f"worker_health_{worker.last_health_status}",
-                    "worker_error_message": worker_health_message_cache.get(worker.id)
-                    or "Worker server is unreachable",
-                    "container_id": None,
-                    "custom_ports": custom_ports_map.get(str(env.id), []),
-                }
-                env_dict.pop("_sa_instance_state", None)
-                env_responses.append(env_dict)
-                continue
-
-            try:
-                remote_env = await call_worker_api(
-                    worker,
-                    method="GET",
-                    path=f"/api/worker/environments/{env.id}",
-                )
-                remote_status = str(remote_env.get("status") or env.status)
-                response_status = remote_status
-                container_id = remote_env.get("container_id")
-                if isinstance(container_id, str) and len(container_id) > 12:
-                    container_id = container_id[:12]
-            except WorkerRequestError as error:
-                response_status = "unknown"
-                worker_error_code = error.code
-                worker_error_message = error.message
-                container_id = None
+                remote_state = _remote_status_entry("unknown", None, "worker_not_found", "Worker server not found")
             else:
-                worker_error_code = None
-                worker_error_message = None
-
+                remote_state = remote_status_map[str(env.id)]
             env_dict = {
                 **env.__dict__,
-                "status": response_status,
-                "worker_server_name": worker.name,
-                "worker_server_base_url": worker.base_url,
-                "worker_error_code": worker_error_code,
-                "worker_error_message": worker_error_message,
-                "container_id": container_id,
-                "custom_ports": custom_ports_map.get(str(env.id), []),
+                **remote_state,
+                "worker_server_name": worker.name if worker else None,
+                "worker_server_base_url": worker.base_url if worker else None,
+                "custom_ports": _normalize_custom_ports(getattr(env, "custom_ports", None)),
             }
             env_dict.pop("_sa_instance_state", None)
             env_responses.append(env_dict)
             continue
 
-        if docker_available and client is not None:
-            try:
-                container = client.containers.get(container_name)
-                container_id = container.short_id or (container.id[:12] if container.id else None)
-                state_info = container.attrs.get("State", {})
-                new_status = _resolve_environment_status(
-                    current_status=env.status,
-                    container_status=container.status,
-                    state_status=state_info.get("Status", ""),
-                    exit_code=state_info.get("ExitCode"),
-                    oom_killed=state_info.get("OOMKilled", False),
-                    error_msg=state_info.get("Error", ""),
-                )
-                response_status = new_status
-            except docker.errors.NotFound:
-                if env.status in ["running", "stopping", "starting"]:
-                    response_status = "stopped"
-            except docker.errors.DockerException as error:
-                logger.warning(
-                    "Docker status lookup failed for env %s. Falling back to DB status: %s",
-                    env.id,
-                    error,
-                )
-            except Exception as error:
-                logger.warning(
-                    "Unexpected status resolution failure for env %s. Falling back to DB status: %s",
-                    env.id,
-                    error,
-                )
+        response_status, container_id = host_states.get(str(env.id), (env.status, None))
 
         env_dict = {
             **env.__dict__,
@@ -1138,7 +1681,7 @@ async def read_environments(skip: int = 0, limit: int = 100, db: AsyncSession =
             "worker_error_code": None,
             "worker_error_message": None,
             "container_id": container_id,
-            "custom_ports": custom_ports_map.get(str(env.id), []),
+            "custom_ports": _normalize_custom_ports(getattr(env, "custom_ports", None)),
         }
         env_dict.pop("_sa_instance_state", None)
         env_responses.append(env_dict)
@@ -1146,6 +1689,70 @@ async def read_environments(skip: int = 0, limit: int = 100, db: AsyncSession =
     return env_responses
 
 
+async def read_environment_statuses(environment_ids: list | None, db: AsyncSession) -> dict:
+    stmt = select(Environment).options(defer(Environment.dockerfile_content))
+    if environment_ids is not None:
+        wanted_ids = []
+        for raw_id in environment_ids:
+            try:
+                wanted_ids.append(UUID(str(raw_id)))
+            except (TypeError, ValueError):
+                continue
+        if not wanted_ids:
+            return {"environments": []}
+        stmt = stmt.where(Environment.id.in_(wanted_ids))
+    result = await db.execute(stmt)
+    envs = result.scalars().all()
+
+    host_states = await _read_host_environment_statuses(envs)
+    statuses = []
+    for env in envs:
+        response_status, container_id = host_states.get(str(env.id), (env.status, None))
+        statuses.append({"id": str(env.id), "status": response_status, "container_id": container_id})
+    return {"environments": statuses}
+
+
+async def _load_environment_stream_state() -> tuple[list[dict], list[dict]]:
+    async with AsyncSessionLocal() as db:
+        rows = await read_environments(skip=0, limit=ENVIRONMENT_STREAM_LIMIT, response=Response(), db=db)
+        workers_result = await db.execute(select(WorkerServer))
+        workers = [
+            {"id": str(worker.id), "name": worker.name, "health_status": worker.last_health_status}
+            for worker in workers_result.scalars().all()
+        ]
+    environments = [EnvironmentSummaryResponse.model_validate(row).model_dump(mode="json") for row in rows]
+    return environments, workers
+
+
+environment_stream_hub = EnvironmentStreamHub(_load_environment_stream_state)
+container_state_index.add_listener(environment_stream_hub.notify_threadsafe)
+
+
+@router.get("/stream")
+async def stream_environments(request: Request):
+    queue = await environment_stream_hub.subscribe()
+
+    async def _events():
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=ENVIRONMENT_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse_event(event, data)
+        finally:
+            environment_stream_hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{environment_id}", response_model=EnvironmentResponse)
 async def read_environment(environment_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Environment).where(Environment.id == environment_id))
@@ -1171,11 +1778,8 @@ async def read_environment(environment_id: str, db: AsyncSession = Depends(get_d
                     method="GET",
                     path=f"/api/worker/environments/{env.id}",
                 )
-                remote_status = str(remote_env.get("status") or env.status)
-                response_status = remote_status
-                remote_container_id = remote_env.get("container_id")
-                if isinstance(remote_container_id, str) and remote_container_id.strip():
-                    container_id = remote_container_id[:12]
+                response_status = str(remote_env.get("status") or env.status)
+                container_id = _normalize_container_id(remote_env.get("container_id"))
             except WorkerRequestError as error:
                 response_status = "unknown"
                 worker_error_code = error.code
@@ -1185,31 +1789,10 @@ async def read_environment(environment_id: str, db: AsyncSession = Depends(get_d
             worker_error_code = "worker_not_found"
             worker_error_message = "Worker server not found"
     else:
-        container_name = f"lyra-{env.name}-{env.id}"
-        try:
-            client = docker.from_env()
-            container = client.containers.get(container_name)
-            container_id = container.short_id or (container.id[:12] if container.id else None)
-            state_info = container.attrs.get("State", {})
-            response_status = _resolve_environment_status(
-                current_status=env.status,
-                container_status=container.status,
-                state_status=state_info.get("Status", ""),
-                exit_code=state_info.get("ExitCode"),
-                oom_killed=state_info.get("OOMKilled", False),
-                error_msg=state_info.get("Error", ""),
-            )
-            if isinstance(container_id, str) and len(container_id) > 12:
-                container_id = container_id[:12]
-        except docker.errors.NotFound:
-            container_id = None
-            if env.status in ["running", "stopping", "starting"]:
-                response_status = "stopped"
-        except Exception as error:
-            logger.warning("Failed to resolve container id for environment %s: %s", env.id, error)
-            container_id = None
+        host_states = await _read_host_environment_statuses([env], False)
+        response_status, container_id = host_states.get(str(env.id), (env.status, None))
 
-    custom_ports = await _get_custom_ports_for_environment(db, str(env.id))
+    custom_ports = _normalize_custom_ports(getattr(env, "custom_ports", None))
     env_dict = {
         **env.__dict__,
         "status": response_status,
@@ -1224,6 +1807,26 @@ async def read_environment(environment_id: str, db: AsyncSession = Depends(get_d
     return env_dict
 
 
+def _read_host_environment_logs(env: Environment) -> dict:
+    client = docker.from_env()
+    container_name = f"lyra-{env.name}-{env.id}"
+
+    # Check if container exists (even if stopped/exited)
+    container = client.containers.get(container_name)
+    logs = container.logs(tail=50)
+    logs_text = logs.decode('utf-8').strip() if logs else ""
+    state_summary = _format_container_state_summary(container)
+
+    if not logs_text:
+        return {"logs": f"{state_summary}\n\nNo logs produced by this container."}
+
+    # For failed/stopped containers, include state diagnostics above recent logs.
+    if env.status == "error" or container.status in {"exited", "dead"}:
+        return {"logs": f"{state_summary}\n\n[Recent Logs]\n{logs_text}"}
+
+    return {"logs": logs_text}
+
+
 @router.get("/{environment_id}/logs")
 async def get_environment_logs(environment_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Environment).where(Environment.id == environment_id))
@@ -1242,27 +1845,11 @@ async def get_environment_logs(environment_id: str, db: AsyncSession = Depends(g
         except WorkerRequestError as error:
             raise _map_worker_request_error(error) from error
 
-    client = docker.from_env()
-    container_name = f"lyra-{env.name}-{env.id}"
-
     try:
-        # Check if container exists (even if stopped/exited)
-        container = client.containers.get(container_name)
-        logs = container.logs(tail=50)
-        logs_text = logs.decode('utf-8').strip() if logs else ""
-        state_summary = _format_container_state_summary(container)
-
-        if not logs_text:
-            return {"logs": f"{state_summary}\n\nNo logs produced by this container."}
-
-        # For failed/stopped containers, include state diagnostics above recent logs.
-        if env.status == "error" or container.status in {"exited", "dead"}:
-            return {"logs": f"{state_summary}\n\n[Recent Logs]\n{logs_text}"}
-
-        return {"logs": logs_text}
+        return await run_docker(_read_host_environment_logs, env)
     except docker.errors.NotFound:
         if env.status == "error":
-            build_error_message = await _get_build_error_message(db, str(env.id))
+            build_error_message = (getattr(env, "build_error", None) or "").strip()
             if build_error_message:
                 return {
                     "logs": (
@@ -1279,6 +1866,202 @@ async def get_environment_logs(environment_id: str, db: AsyncSession = Depends(g
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _read_build_log_backlog(environment_id) -> list[dict]:
+    client = create_async_task_redis()
+    try:
+        raw_events = await client.lrange(build_log_backlog_key(str(environment_id)), 0, -1)
+    except (RedisError, OSError) as error:
+        logger.warning("Failed to read build log backlog for environment %s: %s", environment_id, error)
+        return []
+    finally:
+        await client.aclose()
+    return [json.loads(raw_event) for raw_event in raw_events]
+
+
+async def _load_stored_build_log(db: AsyncSession, environment_id) -> tuple[list[str], str] | None:
+    stored = await db.get(EnvironmentBuildLog, environment_id)
+    if stored is None:
+        return None
+    text_log = await asyncio.to_thread(decompress_build_log, stored.log_gzip)
+    return text_log.splitlines(keepends=True), stored.status
+
+
+@router.get("/{environment_id}/build/log")
+async def get_environment_build_log(
+    environment_id: str,
+    offset: int = 0,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(
+        select(Environment).options(defer(Environment.dockerfile_content)).where(Environment.id == environment_id)
+    )
+    env = result.scalars().first()
+    if env is None:
+        raise HTTPException(status_code=404, detail="Environment not found")
+    offset = max(0, offset)
+    limit = max(1, min(limit, BUILD_LOG_PAGE_MAX_LIMIT))
+
+    if env.worker_server_id:
+        worker = await _assert_worker_is_ready(db, env.worker_server_id)
+        try:
+            return await call_worker_api(
+                worker,
+                method="GET",
+                path=f"/api/worker/environments/{env.id}/build/log?offset={offset}&limit={limit}",
+            )
+        except WorkerRequestError as error:
+            raise _map_worker_request_error(error) from error
+
+    stored = await _load_stored_build_log(db, env.id)
+    if stored is not None:
+        lines, build_status = stored
+        return {**page_build_log_lines(lines, offset, limit, complete=True), "status": build_status}
+
+    # Still building: page whatever the task has published so far.
+    events = await _read_build_log_backlog(env.id)
+    lines = [str(event["line"]) for event in events if event.get("line")]
+    done = next((event for event in events if event.get("type") == "done"), None)
+    return {
+        **page_build_log_lines(lines, offset, limit, complete=done is not None),
+        "status": done.get("status") if done else None,
+    }
+
+
+async def _read_provisioning_state(environment_id) -> dict | None:
+    client = create_async_task_redis()
+    try:
+        raw_state = await client.get(provisioning_state_key(str(environment_id)))
+    except (RedisError, OSError) as error:
+        logger.warning("Failed to read provisioning state for environment %s: %s", environment_id, error)
+        return None
+    finally:
+        await client.aclose()
+    return json.loads(raw_state) if raw_state else None
+
+
+@router.get("/{environment_id}/provisioning")
+async def get_environment_provisioning(environment_id: str, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(Environment).options(defer(Environment.dockerfile_content)).where(Environment.id == environment_id)
+    )
+    env = result.scalars().first()
+    if env is None:
+        raise HTTPException(status_code=404, detail="Environment not found")
+
+    if env.worker_server_id:
+        worker = await _assert_worker_is_ready(db, env.worker_server_id)
+        try:
+            return await call_worker_api(
+                worker,
+                method="GET",
+                path=f"/api/worker/environments/{env.id}/provisioning",
+            )
+        except WorkerRequestError as error:
+            raise _map_worker_request_error(error) from error
+
+    state = await _read_provisioning_state(env.id)
+    if state is None:
+        # Claimed from a warm pool, or provisioned before step tracking existed.
+        return {"environment_id": str(env.id), "status": None, "current_step": None, "steps": []}
+    return state
+
+
+async def _replay_stored_build_log(lines: list[str], build_status: str):
+    for line in lines:
+        yield format_sse_event("log", {"type": "log", "line": line})
+    yield format_sse_event("done", {"type": "done", "status": build_status})
+
+
+async def _tail_host_build_log(environment_id: str, request: Request):
+    client = create_async_task_redis()
+    pubsub = client.pubsub()
+    try:
+        # Subscribe before reading the backlog so nothing published in between is lost;
+        # sequence numbers drop the overlap.
+        await pubsub.subscribe(build_log_channel(environment_id))
+        last_seq = 0
+        for raw_event in await client.lrange(build_log_backlog_key(environment_id), 0, -1):
+            event = json.loads(raw_event)
+            last_seq = max(last_seq, int(event.get("seq") or 0))
+            yield format_sse_event(str(event.get("type") or "log"), event)
+            if event.get("type") == "done":
+                return
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=ENVIRONMENT_STREAM_KEEPALIVE_SECONDS
+            )
+            if message is None:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            event = json.loads(message["data"])
+            seq = int(event.get("seq") or 0)
+            if seq and seq <= last_seq:
+                continue
+            last_seq = max(last_seq, seq)
+            yield format_sse_event(str(event.get("type") or "log"), event)
+            if event.get("type") == "done":
+                return
+    except (RedisError, OSError) as error:
+        logger.warning("Build log stream failed for environment %s: %s", environment_id, error)
+        yield format_sse_event("error", {"type": "error", "line": "Live build log is unavailable.\n"})
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+async def _relay_worker_build_log(worker: WorkerServer, environment_id: str, request: Request):
+    # Workers publish to their own Redis, so follow the worker's paged log instead.
+    offset = 0
+    while True:
+        try:
+            page = await call_worker_api(
+                worker,
+                method="GET",
+                path=f"/api/worker/environments/{environment_id}/build/log?offset={offset}&limit={BUILD_LOG_PAGE_MAX_LIMIT}",
+            )
+        except WorkerRequestError as error:
+            yield format_sse_event("error", {"type": "error", "line": f"{error.message}\n"})
+            return
+        for line in page.get("lines") or []:
+            yield format_sse_event("log", {"type": "log", "line": line})
+        offset = int(page.get("next_offset") or offset)
+        if page.get("complete") and offset >= int(page.get("total") or 0):
+            yield format_sse_event("done", {"type": "done", "status": page.get("status")})
+            return
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(BUILD_STREAM_WORKER_POLL_SECONDS)
+
+
+@router.get("/{environment_id}/build/stream")
+async def stream_environment_build(environment_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(Environment).options(defer(Environment.dockerfile_content)).where(Environment.id == environment_id)
+    )
+    env = result.scalars().first()
+    if env is None:
+        raise HTTPException(status_code=404, detail="Environment not found")
+
+    if env.worker_server_id:
+        worker = await _assert_worker_is_ready(db, env.worker_server_id)
+        events = _relay_worker_build_log(worker, str(env.id), request)
+    else:
+        stored = await _load_stored_build_log(db, env.id)
+        if stored is not None:
+            events = _replay_stored_build_log(*stored)
+        else:
+            events = _tail_host_build_log(str(env.id), request)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/{environment_id}/jupyter/launch")
 async def create_jupyter_launch_url(environment_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Environment).where(Environment.id == environment_id))
@@ -1316,17 +2099,12 @@ async def create_jupyter_launch_url(environment_id: str, db: AsyncSession = Depe
                 remote_launch_path = f"/{remote_launch_path}"
             remote_launch_url = f"{base_url}{remote_launch_path}"
 
-        _cleanup_expired_jupyter_tickets()
-        launch_ticket = secrets.token_urlsafe(24)
-        jupyter_launch_tickets[launch_ticket] = {
-            "environment_id": str(env.id),
-            "expires_at": time.time() + JUPYTER_LAUNCH_TTL_SECONDS,
-            "used": False,
-            "remote_launch_url": remote_launch_url,
-        }
+        launch_ticket = await _issue_launch_ticket(
+            "jupyter", str(env.id), JUPYTER_LAUNCH_TTL_SECONDS, remote_launch_url
+        )
         return {"launch_url": f"/api/environments/{environment_id}/jupyter/launch/{launch_ticket}"}
 
-    if env.status != "running" and not _is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(_is_host_environment_running_now, env):
         raise HTTPException(status_code=409, detail="Environment must be running")
     if env.status != "running":
         env.status = "running"
@@ -1336,13 +2114,7 @@ async def create_jupyter_launch_url(environment_id: str, db: AsyncSession = Depe
     if not token:
         raise HTTPException(status_code=409, detail="Jupyter token is not configured. Recreate the environment.")
 
-    _cleanup_expired_jupyter_tickets()
-    launch_ticket = secrets.token_urlsafe(24)
-    jupyter_launch_tickets[launch_ticket] = {
-        "environment_id": str(env.id),
-        "expires_at": time.time() + JUPYTER_LAUNCH_TTL_SECONDS,
-        "used": False,
-    }
+    launch_ticket = await _issue_launch_ticket("jupyter", str(env.id), JUPYTER_LAUNCH_TTL_SECONDS)
 
     return {"launch_url": f"/api/environments/{environment_id}/jupyter/launch/{launch_ticket}"}
 
@@ -1351,17 +2123,7 @@ async def create_jupyter_launch_url(environment_id: str, db: AsyncSession = Depe
 async def launch_jupyter_with_ticket(
     environment_id: str, launch_ticket: str, request: Request, db: AsyncSession = Depends(get_db)
 ):
-    _cleanup_expired_jupyter_tickets()
-    ticket_meta = jupyter_launch_tickets.get(launch_ticket)
-    if not ticket_meta:
-        raise HTTPException(status_code=404, detail="Launch ticket not found or expired")
-    if ticket_meta.get("used"):
-        raise HTTPException(status_code=410, detail="Launch ticket already used")
-    if ticket_meta.get("environment_id") != environment_id:
-        raise HTTPException(status_code=400, detail="Launch ticket does not match environment")
-    if float(ticket_meta.get("expires_at", 0)) < time.time():
-        jupyter_launch_tickets.pop(launch_ticket, None)
-        raise HTTPException(status_code=410, detail="Launch ticket expired")
+    ticket_meta = await _load_launch_ticket("jupyter", launch_ticket, environment_id)
 
     result = await db.execute(select(Environment).where(Environment.id == environment_id))
     env = result.scalars().first()
@@ -1372,10 +2134,10 @@ async def launch_jupyter_with_ticket(
 
     remote_launch_url = str(ticket_meta.get("remote_launch_url") or "").strip()
     if env.worker_server_id and remote_launch_url:
-        ticket_meta["used"] = True
+        await _consume_launch_ticket("jupyter", launch_ticket)
         return RedirectResponse(url=remote_launch_url, status_code=307)
 
-    if env.status != "running" and not _is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(_is_host_environment_running_now, env):
         raise HTTPException(status_code=409, detail="Environment must be running")
     if env.status != "running":
         env.status = "running"
@@ -1385,7 +2147,7 @@ async def launch_jupyter_with_ticket(
     if not token:
         raise HTTPException(status_code=409, detail="Jupyter token is not configured. Recreate the environment.")
 
-    ticket_meta["used"] = True
+    await _consume_launch_ticket("jupyter", launch_ticket)
 
     scheme = request.headers.get("x-forwarded-proto", request.url.scheme)
     host = request.url.hostname or "localhost"
@@ -1430,29 +2192,16 @@ async def create_code_launch_url(environment_id: str, db: AsyncSession = Depends
                 remote_launch_path = f"/{remote_launch_path}"
             remote_launch_url = f"{base_url}{remote_launch_path}"
 
-        _cleanup_expired_code_tickets()
-        launch_ticket = secrets.token_urlsafe(24)
-        code_launch_tickets[launch_ticket] = {
-            "environment_id": str(env.id),
-            "expires_at": time.time() + CODE_LAUNCH_TTL_SECONDS,
-            "used": False,
-            "remote_launch_url": remote_launch_url,
-        }
+        launch_ticket = await _issue_launch_ticket("code", str(env.id), CODE_LAUNCH_TTL_SECONDS, remote_launch_url)
         return {"launch_url": f"/api/environments/{environment_id}/code/launch/{launch_ticket}"}
 
-    if env.status != "running" and not _is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(_is_host_environment_running_now, env):
         raise HTTPException(status_code=409, detail="Environment must be running")
     if env.status != "running":
         env.status = "running"
         await db.commit()
 
-    _cleanup_expired_code_tickets()
-    launch_ticket = secrets.token_urlsafe(24)
-    code_launch_tickets[launch_ticket] = {
-        "environment_id": str(env.id),
-        "expires_at": time.time() + CODE_LAUNCH_TTL_SECONDS,
-        "used": False,
-    }
+    launch_ticket = await _issue_launch_ticket("code", str(env.id), CODE_LAUNCH_TTL_SECONDS)
     return {"launch_url": f"/api/environments/{environment_id}/code/launch/{launch_ticket}"}
 
 
@@ -1460,17 +2209,7 @@ async def create_code_launch_url(environment_id: str, db: AsyncSession = Depends
 async def launch_code_with_ticket(
     environment_id: str, launch_ticket: str, request: Request, db: AsyncSession = Depends(get_db)
 ):
-    _cleanup_expired_code_tickets()
-    ticket_meta = code_launch_tickets.get(launch_ticket)
-    if not ticket_meta:
-        raise HTTPException(status_code=404, detail="Launch ticket not found or expired")
-    if ticket_meta.get("used"):
-        raise HTTPException(status_code=410, detail="Launch ticket already used")
-    if ticket_meta.get("environment_id") != environment_id:
-        raise HTTPException(status_code=400, detail="Launch ticket does not match environment")
-    if float(ticket_meta.get("expires_at", 0)) < time.time():
-        code_launch_tickets.pop(launch_ticket, None)
-        raise HTTPException(status_code=410, detail="Launch ticket expired")
+    ticket_meta = await _load_launch_ticket("code", launch_ticket, environment_id)
 
     result = await db.execute(select(Environment).where(Environment.id == environment_id))
     env = result.scalars().first()
@@ -1481,22 +2220,32 @@ async def launch_code_with_ticket(
 
     remote_launch_url = str(ticket_meta.get("remote_launch_url") or "").strip()
     if env.worker_server_id and remote_launch_url:
-        ticket_meta["used"] = True
+        await _consume_launch_ticket("code", launch_ticket)
         return RedirectResponse(url=remote_launch_url, status_code=307)
 
-    if env.status != "running" and not _is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(_is_host_environment_running_now, env):
         raise HTTPException(status_code=409, detail="Environment must be running")
     if env.status != "running":
         env.status = "running"
         await db.commit()
 
-    ticket_meta["used"] = True
+    await _consume_launch_ticket("code", launch_ticket)
     scheme = request.headers.get("x-forwarded-proto", request.url.scheme)
     host = request.url.hostname or "localhost"
     redirect_url = f"{scheme}://{host}:{env.code_port}"
     return RedirectResponse(url=redirect_url, status_code=307)
 
 
+def _remove_host_container(env: Environment) -> None:
+    client = docker.from_env()
+    container_name = f"lyra-{env.name}-{env.id}"
+    try:
+        container = client.containers.get(container_name)
+        container.remove(force=True)
+    except docker.errors.NotFound:
+        pass  # Container already gone
+
+
 @router.delete("/{environment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_environment(
     environment_id: str,
@@ -1556,13 +2305,7 @@ async def delete_environment(
     # For host environments, container removal failures should fail deletion.
     # For worker-bound environments on main, ignore local daemon issues.
     try:
-        client = docker.from_env()
-        container_name = f"lyra-{env.name}-{env.id}"
-        try:
-            container = client.containers.get(container_name)
-            container.remove(force=True)
-        except docker.errors.NotFound:
-            pass  # Container already gone
+        await run_docker(_remove_host_container, env)
     except Exception as e:
         if env.worker_server_id is None:
             raise HTTPException(
@@ -1573,24 +2316,8 @@ async def delete_environment(
 
     logger.info("Delete stage(local-db) started for environment %s", env.id)
     try:
-        token_key = f"jupyter_token:{env.id}"
-        token_result = await db.execute(select(Setting).where(Setting.key == token_key))
-        token_setting = token_result.scalars().first()
-        if token_setting:
-            await db.delete(token_setting)
-
-        custom_ports_key = f"custom_ports:{env.id}"
-        custom_ports_result = await db.execute(select(Setting).where(Setting.key == custom_ports_key))
-        custom_ports_setting = custom_ports_result.scalars().first()
-        if custom_ports_setting:
-            await db.delete(custom_ports_setting)
-
-        build_error_key = f"{BUILD_ERROR_SETTING_PREFIX}{env.id}"
-        build_error_result = await db.execute(select(Setting).where(Setting.key == build_error_key))
-        build_error_setting = build_error_result.scalars().first()
-        if build_error_setting:
-            await db.delete(build_error_setting)
-
+        await release_owner_ports(db, [env.id])
+        await release_gpus(db, [env.id])
         await db.delete(env)
         await db.commit()
     except Exception as error:
@@ -1607,8 +2334,8 @@ async def delete_environment(
         raise
 
     logger.info("Delete completed for environment %s", env.id)
-    _cleanup_expired_jupyter_tickets()
-    _cleanup_expired_code_tickets()
+    await _invalidate_environment_status_cache(env.id)
+    environment_stream_hub.notify()
 
     return None
 
@@ -1628,27 +2355,43 @@ async def start_environment(environment_id: str, db: AsyncSession = Depends(get_
                 method="POST",
                 path=f"/api/worker/environments/{env.id}/start",
             )
+            await _invalidate_environment_status_cache(env.id)
             env.status = "running"
             await db.commit()
             return response
         except WorkerRequestError as error:
+            await _invalidate_environment_status_cache(env.id)
             env.status = "error"
             await db.commit()
             raise _map_worker_request_error(error) from error
 
     container_name = f"lyra-{env.name}-{env.id}"
-    client = docker.from_env()
+    client = await run_docker(docker.from_env)
 
     try:
-        container = client.containers.get(container_name)
+        container = await run_docker(client.containers.get, container_name)
         if container.status == "running":
             env.status = "running"
             await db.commit()
             return {"message": "Environment is already running"}
 
+        if env.gpu_indices:
+            # A stopped environment's GPUs may have been claimed by a newer one in the meantime.
+            # The node lock is held until the commit below so a concurrent create sees this claim.
+            await lock_gpu_node(db, LOCAL_GPU_NODE)
+            conflicted = await claim_gpus(db, LOCAL_GPU_NODE, [(env.id, idx) for idx in env.gpu_indices])
+            if conflicted:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=409,
+                    detail={
+                        "code": "gpu_already_allocated",
+                        "message": f"GPUs are in use by another environment: {conflicted}",
+                    },
+                )
         env.status = "starting"
         await db.commit()
-        container.start()
+        await run_docker(container.start)
         env.status = "running"
         await db.commit()
         return {"message": f"Environment {env.name} started"}
@@ -1656,6 +2399,8 @@ async def start_environment(environment_id: str, db: AsyncSession = Depends(get_
         env.status = "error"
         await db.commit()
         raise HTTPException(status_code=409, detail="Container not found. Please recreate the environment.")
+    except HTTPException:
+        raise
     except Exception as e:
         env.status = "error"
         await db.commit()
@@ -1677,19 +2422,21 @@ async def stop_environment(environment_id: str, db: AsyncSession = Depends(get_d
                 method="POST",
                 path=f"/api/worker/environments/{env.id}/stop",
             )
+            await _invalidate_environment_status_cache(env.id)
             env.status = "stopping"
             await db.commit()
             return response
         except WorkerRequestError as error:
+            await _invalidate_environment_status_cache(env.id)
             env.status = "error"
             await db.commit()
             raise _map_worker_request_error(error) from error
 
     container_name = f"lyra-{env.name}-{env.id}"
-    client = docker.from_env()
+    client = await run_docker(docker.from_env)
 
     try:
-        container = client.containers.get(container_name)
+        container = await run_docker(client.containers.get, container_name)
         if container.status != "running":
             env.status = "stopped"
             await db.commit()
@@ -1697,7 +2444,7 @@ async def stop_environment(environment_id: str, db: AsyncSession = Depends(get_d
 
         env.status = "stopping"
         await db.commit()
-        container.stop(timeout=0)
+        await run_docker(container.stop, timeout=0)
         return {"message": f"Environment {env.name} is stopping"}
     except docker.errors.NotFound:
         env.status = "stopped"
@@ -1801,7 +2548,7 @@ async def reset_environment_root_password(
             ) from error
         return response if isinstance(response, dict) else {"message": "Root password updated"}
 
-    if env.status != "running" and not _is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(_is_host_environment_running_now, env):
         raise HTTPException(
             status_code=409,
             detail={"code": "env_not_running", "message": "Environment must be running"},
@@ -1819,27 +2566,16 @@ async def reset_environment_root_password(
         ) from error
 
     container_name = f"lyra-{env.name}-{env.id}"
-    client = docker.from_env()
+    client = await run_docker(docker.from_env)
     try:
-        container = client.containers.get(container_name)
+        container = await run_docker(client.containers.get, container_name)
         if container.status != "running":
             raise HTTPException(
                 status_code=409,
                 detail={"code": "env_not_running", "message": "Environment must be running"},
             )
 
-        exec_id = client.api.exec_create(
-            container.id,
-            cmd=["chpasswd"],
-            stdin=True,
-            tty=False,
-        )["Id"]
-        sock = client.api.exec_start(exec_id, detach=False, tty=False, socket=True)
-        try:
-            _write_exec_stdin(sock, f"root:{new_password}\n".encode("utf-8"))
-        finally:
-            _close_exec_stdin(sock)
-
+        exec_id = await run_docker(_start_chpasswd_exec, client.api, container.id, new_password)
         exit_code = await _wait_exec_exit_code(client.api, exec_id)
         if exit_code is None or exit_code != 0:
             raise HTTPException(
@@ -1874,17 +2610,7 @@ async def reset_environment_root_password(
         if previous_encrypted_password:
             try:
                 previous_password = decrypt_secret(previous_encrypted_password)
-                rollback_exec_id = client.api.exec_create(
-                    container.id,
-                    cmd=["chpasswd"],
-                    stdin=True,
-                    tty=False,
-                )["Id"]
-                rollback_sock = client.api.exec_start(rollback_exec_id, detach=False, tty=False, socket=True)
-                try:
-                    _write_exec_stdin(rollback_sock, f"root:{previous_password}\n".encode("utf-8"))
-                finally:
-                    _close_exec_stdin(rollback_sock)
+                rollback_exec_id = await run_docker(_start_chpasswd_exec, client.api, container.id, previous_password)
                 rollback_exit = await _wait_exec_exit_code(client.api, rollback_exec_id)
                 restored = rollback_exit is not None and rollback_exit == 0
             except Exception as rollback_error:  # noqa: BLE001
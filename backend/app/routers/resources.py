@@ -2,9 +2,14 @@ import docker
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from ..database import get_db
+from sqlalchemy.orm import defer
+from ..core.docker_executor import get_docker_executor_metrics, run_docker
+from ..core.gpu_allocator import count_host_gpus
+from ..core.provisioning import PROVISIONING_HISTOGRAM_INDEX_KEY, PROVISIONING_KEY_PREFIX, parse_provisioning_histogram
+from ..core.task_redis import create_async_task_redis
+from ..database import AsyncSessionLocal, get_db
 from ..models import Environment
-import pynvml
+from redis.exceptions import RedisError
 import random
 
 
@@ -19,9 +24,7 @@ async def get_gpu_resources(db: AsyncSession = Depends(get_db)):
     # 1. Get total GPUs from System
     total_gpus = 0
     try:
-        pynvml.nvmlInit()
-        total_gpus = pynvml.nvmlDeviceGetCount()
-        pynvml.nvmlShutdown()
+        total_gpus = await run_docker(count_host_gpus)
     except Exception as e:
         print(f"Failed to initialize NVML: {e}")
         # For testing purposes on non-GPU environment
@@ -31,7 +34,9 @@ async def get_gpu_resources(db: AsyncSession = Depends(get_db)):
     # 2. Get Used GPUs from Database
     # Host resource view must exclude worker-bound environments.
     result = await db.execute(
-        select(Environment).where(
+        select(Environment)
+        .options(defer(Environment.dockerfile_content))
+        .where(
             Environment.status.in_(["running", "building"]),
             Environment.worker_server_id.is_(None),
         )
@@ -64,6 +69,38 @@ async def get_node_resources():
     return [{"id": "node-1", "name": "Local Node", "status": "online", "gpus": 0, "load": random.randint(10, 80)}]
 
 
+@router.get("/docker/executor")
+async def get_docker_executor_status():
+    return get_docker_executor_metrics()
+
+
+@router.get("/provisioning/histograms")
+async def get_provisioning_histograms():
+    client = create_async_task_redis()
+    try:
+        keys = sorted(await client.smembers(PROVISIONING_HISTOGRAM_INDEX_KEY))
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        raw_histograms = await pipe.execute() if keys else []
+    except (RedisError, OSError) as error:
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "provisioning_metrics_unavailable", "message": str(error)},
+        ) from error
+    finally:
+        await client.aclose()
+
+    nodes: dict[str, dict] = {}
+    histogram_prefix = f"{PROVISIONING_KEY_PREFIX}histogram:"
+    for key, raw in zip(keys, raw_histograms):
+        node, _, step = key[len(histogram_prefix):].rpartition(":")
+        if not node or not raw:
+            continue
+        nodes.setdefault(node, {})[step] = parse_provisioning_histogram(raw)
+    return {"nodes": nodes}
+
+
 def _format_image_tags(tags):
     if not tags:
         return ["<none>:<none>"]
@@ -93,8 +130,21 @@ def _collect_used_docker_resources(client):
     return used_image_ids, used_volume_names
 
 
-def _list_unused_images(client, mode: str):
+async def _load_referenced_image_refs() -> set[str]:
+    # Content-addressed images are shared, so an image stays referenced while any
+    # host environment records it, even if that environment has no container right now.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Environment.image_ref)
+            .where(Environment.image_ref.is_not(None), Environment.worker_server_id.is_(None))
+            .distinct()
+        )
+        return {image_ref for image_ref in result.scalars().all() if image_ref}
+
+
+def _list_unused_images(client, mode: str, referenced_image_refs: set[str] | None = None):
     used_image_ids, _ = _collect_used_docker_resources(client)
+    referenced_image_refs = referenced_image_refs or set()
     images = client.images.list(all=True)
     candidates = []
     for image in images:
@@ -104,6 +154,8 @@ def _list_unused_images(client, mode: str):
 
         if image_id in used_image_ids:
             continue
+        if image_id in referenced_image_refs or referenced_image_refs.intersection(tags):
+            continue
         if mode == "dangling" and not is_dangling:
             continue
 
@@ -119,18 +171,21 @@ def _list_unused_images(client, mode: str):
     return candidates
 
 
-@router.get("/docker/images/unused")
-async def list_unused_images(mode: str = Query(default="dangling", pattern="^(dangling|unused)$")):
+def _list_unused_images_sync(mode: str, referenced_image_refs: set[str] | None = None) -> dict:
     try:
         client = docker.from_env()
-        candidates = _list_unused_images(client, mode=mode)
+        candidates = _list_unused_images(client, mode=mode, referenced_image_refs=referenced_image_refs)
         return {"mode": mode, "count": len(candidates), "images": candidates}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/docker/images/prune")
-async def prune_unused_images(payload: dict):
+@router.get("/docker/images/unused")
+async def list_unused_images(mode: str = Query(default="dangling", pattern="^(dangling|unused)$")):
+    return await run_docker(_list_unused_images_sync, mode, await _load_referenced_image_refs())
+
+
+def _prune_unused_images_sync(payload: dict, referenced_image_refs: set[str] | None = None) -> dict:
     mode = str(payload.get("mode", "dangling"))
     if mode not in {"dangling", "unused"}:
         raise HTTPException(status_code=400, detail="mode must be dangling or unused")
@@ -138,7 +193,7 @@ async def prune_unused_images(payload: dict):
 
     try:
         client = docker.from_env()
-        candidates = _list_unused_images(client, mode=mode)
+        candidates = _list_unused_images(client, mode=mode, referenced_image_refs=referenced_image_refs)
         candidate_map = {img["id"]: img for img in candidates}
         target_ids = selected_ids if selected_ids else set(candidate_map.keys())
 
@@ -201,8 +256,12 @@ async def prune_unused_images(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/docker/volumes/unused")
-async def list_unused_volumes():
+@router.post("/docker/images/prune")
+async def prune_unused_images(payload: dict):
+    return await run_docker(_prune_unused_images_sync, payload, await _load_referenced_image_refs())
+
+
+def _list_unused_volumes_sync() -> dict:
     try:
         client = docker.from_env()
         _, used_volume_names = _collect_used_docker_resources(client)
@@ -229,8 +288,12 @@ async def list_unused_volumes():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/docker/volumes/prune")
-async def prune_unused_volumes(payload: dict):
+@router.get("/docker/volumes/unused")
+async def list_unused_volumes():
+    return await run_docker(_list_unused_volumes_sync)
+
+
+def _prune_unused_volumes_sync(payload: dict) -> dict:
     selected_names = set(payload.get("volume_names") or [])
 
     try:
@@ -258,8 +321,12 @@ async def prune_unused_volumes(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/docker/build-cache")
-async def get_build_cache_summary():
+@router.post("/docker/volumes/prune")
+async def prune_unused_volumes(payload: dict):
+    return await run_docker(_prune_unused_volumes_sync, payload)
+
+
+def _get_build_cache_summary_sync() -> dict:
     try:
         client = docker.from_env()
         data = client.api.df()
@@ -270,8 +337,12 @@ async def get_build_cache_summary():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/docker/build-cache/prune")
-async def prune_build_cache(payload: dict):
+@router.get("/docker/build-cache")
+async def get_build_cache_summary():
+    return await run_docker(_get_build_cache_summary_sync)
+
+
+def _prune_build_cache_sync(payload: dict) -> dict:
     prune_all = bool(payload.get("all", True))
     try:
         client = docker.from_env()
@@ -284,3 +355,8 @@ async def prune_build_cache(payload: dict):
         return {"space_reclaimed": reclaimed, "raw": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/docker/build-cache/prune")
+async def prune_build_cache(payload: dict):
+    return await run_docker(_prune_build_cache_sync, payload)
@@ -1,20 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
 from typing import List
 from ..database import get_db
-from ..models import Template
-from ..schemas import TemplateCreate, TemplateResponse
+from ..models import Template, WarmContainer
+from ..schemas import TemplateCreate, TemplateResponse, WarmPoolResponse, WarmPoolUpdate
+from ..core.docker_executor import run_docker
+from ..core.port_allocator import release_owner_ports
+from ..core.warm_pool import (
+    WARM_POOL_CONFIG_KEY,
+    parse_warm_pool_config,
+    remove_warm_containers,
+    schedule_warm_pool_refill,
+)
+import logging
 import uuid
 
 router = APIRouter(
     prefix="/templates",
     tags=["templates"],
 )
+logger = logging.getLogger(__name__)
+
+
+def _validate_warm_pool(config: dict):
+    try:
+        return parse_warm_pool_config(config)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "invalid_warm_pool", "message": str(error)},
+        ) from error
+
+
+async def _get_template_or_404(db: AsyncSession, template_id: str) -> Template:
+    try:
+        uuid_id = uuid.UUID(template_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid UUID format")
+
+    result = await db.execute(select(Template).where(Template.id == uuid_id))
+    template = result.scalars().first()
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
+
+
+async def _warm_pool_response(db: AsyncSession, template: Template) -> dict:
+    result = await db.execute(
+        select(WarmContainer.status, func.count())
+        .where(WarmContainer.template_id == template.id)
+        .group_by(WarmContainer.status)
+    )
+    return {
+        "template_id": template.id,
+        "config": (template.config or {}).get(WARM_POOL_CONFIG_KEY),
+        "counts": {row_status: count for row_status, count in result.all()},
+    }
 
 
 @router.post("/", response_model=TemplateResponse, status_code=status.HTTP_201_CREATED)
 async def create_template(template: TemplateCreate, db: AsyncSession = Depends(get_db)):
+    warm_pool = _validate_warm_pool(template.config)
     new_template = Template(
         name=template.name,
         description=template.description,
@@ -23,6 +71,8 @@ async def create_template(template: TemplateCreate, db: AsyncSession = Depends(g
     db.add(new_template)
     await db.commit()
     await db.refresh(new_template)
+    if warm_pool is not None and warm_pool.size > 0:
+        schedule_warm_pool_refill(new_template.id)
     return new_template
 
 
@@ -34,30 +84,45 @@ async def read_templates(skip: int = 0, limit: int = 100, db: AsyncSession = Dep
 
 @router.get("/{template_id}", response_model=TemplateResponse)
 async def read_template(template_id: str, db: AsyncSession = Depends(get_db)):
-    try:
-        uuid_id = uuid.UUID(template_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid UUID format")
+    return await _get_template_or_404(db, template_id)
 
-    result = await db.execute(select(Template).where(Template.id == uuid_id))
-    template = result.scalars().first()
-    if template is None:
-        raise HTTPException(status_code=404, detail="Template not found")
-    return template
+
+@router.get("/{template_id}/warm-pool", response_model=WarmPoolResponse)
+async def read_warm_pool(template_id: str, db: AsyncSession = Depends(get_db)):
+    template = await _get_template_or_404(db, template_id)
+    return await _warm_pool_response(db, template)
+
+
+@router.put("/{template_id}/warm-pool", response_model=WarmPoolResponse)
+async def update_warm_pool(template_id: str, payload: WarmPoolUpdate, db: AsyncSession = Depends(get_db)):
+    template = await _get_template_or_404(db, template_id)
+    config = {**(template.config or {}), WARM_POOL_CONFIG_KEY: payload.model_dump(exclude_none=True)}
+    warm_pool = _validate_warm_pool(config)
+    config[WARM_POOL_CONFIG_KEY] = warm_pool.to_config()
+    template.config = config
+    await db.commit()
+    await db.refresh(template)
+    schedule_warm_pool_refill(template.id)
+    return await _warm_pool_response(db, template)
 
 
 @router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_template(template_id: str, db: AsyncSession = Depends(get_db)):
-    try:
-        uuid_id = uuid.UUID(template_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid UUID format")
+    template = await _get_template_or_404(db, template_id)
 
-    result = await db.execute(select(Template).where(Template.id == uuid_id))
-    template = result.scalars().first()
-    if template is None:
-        raise HTTPException(status_code=404, detail="Template not found")
+    result = await db.execute(
+        select(WarmContainer.id, WarmContainer.container_name).where(WarmContainer.template_id == template.id)
+    )
+    warm_containers = result.all()
+    warm_container_names = [container_name for _warm_id, container_name in warm_containers]
 
+    if warm_containers:
+        await release_owner_ports(db, [warm_id for warm_id, _container_name in warm_containers])
     await db.delete(template)
     await db.commit()
+    if warm_container_names:
+        try:
+            await run_docker(remove_warm_containers, warm_container_names)
+        except Exception as error:  # noqa: BLE001
+            logger.warning("Failed to remove warm containers for template %s: %s", template_id, error)
     return None
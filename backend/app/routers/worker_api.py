@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Awaitable, Callable
 
+from ..core.docker_executor import get_docker_executor_metrics, run_docker
 from ..core.worker_auth import require_worker_api_auth, require_worker_role
 from ..database import get_db
 from ..models import Environment
@@ -10,6 +11,7 @@ from ..routers import environments as env_router
 from ..routers import resources as resource_router
 from ..schemas import EnvironmentCreate
 from ..schemas import EnvironmentRootPasswordResetRequest
+from ..schemas import EnvironmentStatusBatchRequest
 
 
 router = APIRouter(
@@ -64,6 +66,11 @@ async def worker_gpu_resources(db: AsyncSession = Depends(get_db)):
     )
 
 
+@router.get("/resources/docker/executor")
+async def worker_get_docker_executor_status():
+    return _ok(get_docker_executor_metrics(), message="Docker executor metrics loaded")
+
+
 @router.get("/resources/docker/images/unused")
 async def worker_list_unused_images(mode: str = "dangling"):
     async def _action() -> dict:
@@ -152,9 +159,14 @@ async def worker_create_environment(env: EnvironmentCreate, db: AsyncSession = D
 
 
 @router.get("/environments")
-async def worker_list_environments(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+async def worker_list_environments(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
     async def _action() -> dict:
-        environments = await env_router.read_environments(skip=skip, limit=limit, db=db)
+        environments = await env_router.read_environments(skip=skip, limit=limit, response=response, db=db)
         return {"environments": environments}
 
     return await _run_worker_action(
@@ -164,6 +176,24 @@ async def worker_list_environments(skip: int = 0, limit: int = 100, db: AsyncSes
     )
 
 
+@router.post("/environments/status")
+async def worker_get_environment_statuses(
+    payload: EnvironmentStatusBatchRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    async def _action() -> dict:
+        environment_ids = None
+        if payload.environment_ids is not None:
+            environment_ids = [str(environment_id) for environment_id in payload.environment_ids]
+        return await env_router.read_environment_statuses(environment_ids=environment_ids, db=db)
+
+    return await _run_worker_action(
+        _action,
+        fallback_code="get_environment_statuses_failed",
+        success_message="Environment statuses loaded",
+    )
+
+
 @router.get("/environments/{environment_id}")
 async def worker_get_environment(environment_id: str, db: AsyncSession = Depends(get_db)):
     async def _action() -> dict:
@@ -188,6 +218,37 @@ async def worker_get_environment_logs(environment_id: str, db: AsyncSession = De
     )
 
 
+@router.get("/environments/{environment_id}/build/log")
+async def worker_get_environment_build_log(
+    environment_id: str,
+    offset: int = 0,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_db),
+):
+    async def _action() -> dict:
+        return await env_router.get_environment_build_log(
+            environment_id=environment_id, offset=offset, limit=limit, db=db
+        )
+
+    return await _run_worker_action(
+        _action,
+        fallback_code="get_environment_build_log_failed",
+        success_message="Environment build log loaded",
+    )
+
+
+@router.get("/environments/{environment_id}/provisioning")
+async def worker_get_environment_provisioning(environment_id: str, db: AsyncSession = Depends(get_db)):
+    async def _action() -> dict:
+        return await env_router.get_environment_provisioning(environment_id=environment_id, db=db)
+
+    return await _run_worker_action(
+        _action,
+        fallback_code="get_environment_provisioning_failed",
+        success_message="Environment provisioning state loaded",
+    )
+
+
 @router.post("/environments/{environment_id}/start")
 async def worker_start_environment(environment_id: str, db: AsyncSession = Depends(get_db)):
     async def _action() -> dict:
@@ -253,7 +314,7 @@ async def worker_create_jupyter_launch_url(environment_id: str, db: AsyncSession
         raise HTTPException(
             status_code=409, detail={"code": "jupyter_disabled", "message": "Jupyter is disabled for this environment"}
         )
-    if env.status != "running" and not env_router._is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(env_router._is_host_environment_running_now, env):
         raise HTTPException(
             status_code=409, detail={"code": "environment_not_running", "message": "Environment must be running"}
         )
@@ -287,7 +348,7 @@ async def worker_create_code_launch_url(environment_id: str, db: AsyncSession =
             status_code=409,
             detail={"code": "code_server_disabled", "message": "code-server is disabled for this environment"},
         )
-    if env.status != "running" and not env_router._is_host_environment_running_now(env):
+    if env.status != "running" and not await run_docker(env_router._is_host_environment_running_now, env):
         raise HTTPException(
             status_code=409, detail={"code": "environment_not_running", "message": "Environment must be running"}
         )
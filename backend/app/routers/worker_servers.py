@@ -13,7 +13,9 @@ from ..core.worker_registry import (
     WORKER_HEALTH_REQUEST_FAILED,
     WorkerRequestError,
     call_worker_api,
+    close_worker_http_client,
     refresh_worker_health,
+    invalidate_worker_connection_config,
     invalidate_worker_health_cache,
 )
 from ..database import get_db
@@ -170,6 +172,7 @@ async def update_worker_server(worker_id: str, payload: WorkerServerUpdate, db:
     worker = result.scalars().first()
     if not worker:
         raise HTTPException(status_code=404, detail={"code": "worker_not_found", "message": "Worker server not found"})
+    previous_base_url = worker.base_url
 
     if payload.name is not None:
         name = payload.name.strip()
@@ -213,6 +216,12 @@ async def update_worker_server(worker_id: str, payload: WorkerServerUpdate, db:
                 status_code=500, detail={"code": "token_encryption_failed", "message": str(error)}
             ) from error
 
+    if payload.api_token is not None:
+        invalidate_worker_connection_config(str(worker.id))
+    if payload.api_token is not None or worker.base_url != previous_base_url:
+        # Drop pooled connections opened for the old endpoint/credentials.
+        await close_worker_http_client(previous_base_url)
+
     try:
         await db.flush()
         await refresh_worker_health(db, worker, use_cache=False)
@@ -439,7 +448,10 @@ async def delete_worker_server(worker_id: str, db: AsyncSession = Depends(get_db
             },
         )
 
+    base_url = worker.base_url
     await db.delete(worker)
     await db.commit()
     invalidate_worker_health_cache(worker_id)
+    invalidate_worker_connection_config(worker_id)
+    await close_worker_http_client(base_url)
     return None
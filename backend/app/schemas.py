@@ -33,6 +33,19 @@ class EnvironmentCreate(EnvironmentBase):
     dockerfile_content: str
 
 
+class EnvironmentBulkCreate(BaseModel):
+    template_id: UUID
+    count: int = Field(ge=1)
+    # "{index}" is replaced with start_index, start_index + 1, ...
+    name_pattern: str = Field(pattern=r"^[a-zA-Z0-9-]*\{index\}[a-zA-Z0-9-]*$")
+    start_index: int = Field(default=1, ge=0)
+    root_password: str
+    container_user: str = "root"
+    gpu_count: int = Field(default=0, ge=0)
+    enable_jupyter: Optional[bool] = None
+    enable_code_server: Optional[bool] = None
+
+
 class EnvironmentResponse(EnvironmentBase):
     id: UUID
     status: str
@@ -51,10 +64,39 @@ class EnvironmentResponse(EnvironmentBase):
         from_attributes = True
 
 
+class EnvironmentSummaryResponse(BaseModel):
+    id: UUID
+    name: str
+    status: str
+    worker_server_id: Optional[UUID] = None
+    worker_server_name: Optional[str] = None
+    worker_server_base_url: Optional[str] = None
+    worker_error_code: Optional[str] = None
+    worker_error_message: Optional[str] = None
+    container_user: str = "root"
+    container_id: str | None = None
+    enable_jupyter: bool = True
+    enable_code_server: bool = True
+    mount_config: List[MountConfig] = []
+    custom_ports: List[CustomPortMapping] = []
+    gpu_indices: List[int]
+    ssh_port: int
+    jupyter_port: int
+    code_port: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class EnvironmentRootPasswordResetRequest(BaseModel):
     new_password: str
 
 
+class EnvironmentStatusBatchRequest(BaseModel):
+    environment_ids: Optional[List[UUID]] = None
+
+
 class CustomPortAllocateRequest(BaseModel):
     count: int = 1
     current_ports: List[CustomPortMapping] = []
@@ -96,6 +138,19 @@ class TemplateResponse(TemplateBase):
         from_attributes = True
 
 
+class WarmPoolUpdate(BaseModel):
+    size: int = 0
+    dockerfile_content: Optional[str] = None
+    enable_jupyter: bool = True
+    enable_code_server: bool = True
+
+
+class WarmPoolResponse(BaseModel):
+    template_id: UUID
+    config: Optional[Dict[str, Any]] = None
+    counts: Dict[str, int]
+
+
 class WorkerServerBase(BaseModel):
     name: str
     base_url: str
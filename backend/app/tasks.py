@@ -2,14 +2,45 @@ from .worker import celery_app
 from .database import DATABASE_URL
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from .models import Environment, Setting
+from .models import Environment, EnvironmentBuildLog, Template, WarmContainer
+from .core.build_admission import BuildAdmission
+from .core.env import resolve_int_env
+from .core.build_log import BuildLogPublisher, compress_build_log
+from .core.container_state import LYRA_ENVIRONMENT_ID_LABEL, LYRA_MANAGED_LABEL
+from .core.port_allocator import (
+    ENVIRONMENT_PORT_KINDS,
+    LOCAL_PORT_NODE,
+    port_allocator,
+    release_owner_ports_sync,
+    reserve_ports_sync,
+    sync_port_map_sync,
+)
+from .core.provisioning import ProvisioningTracker
+from .core.image_cache import (
+    ensure_content_addressed_image,
+    extract_dockerfile_base_image,
+    image_has_apt_get,
+    load_cached_image_probe,
+    store_image_probe,
+)
 from .core.security import SecretCipherError, SecretKeyError, decrypt_secret
+from .core.task_docker import close_task_docker, get_task_docker
+from .core.task_redis import get_task_redis
+from .core.warm_pool import (
+    WARM_CONTAINER_CLAIMED,
+    WARM_CONTAINER_NAME_PREFIX,
+    WARM_CONTAINER_READY,
+    WARM_CONTAINER_WARMING,
+    parse_warm_pool_config,
+    remove_warm_containers,
+)
+from redis.exceptions import RedisError
+from celery import group
+from celery.signals import worker_process_init, worker_process_shutdown
 import docker
-import tempfile
-import os
+import logging
 import secrets
-import random
-import json
+import uuid
 from typing import Optional
 
 
@@ -17,32 +48,66 @@ from typing import Optional
 # Replace 'postgresql+asyncpg' with 'postgresql' for sync driver if needed,
 # but usually we use a separate sync URL string.
 SYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
-engine = create_engine(SYNC_DATABASE_URL)
+
+
+engine = create_engine(
+    SYNC_DATABASE_URL,
+    pool_size=resolve_int_env("LYRA_TASK_DB_POOL_SIZE", 2, 1, 50),
+    max_overflow=resolve_int_env("LYRA_TASK_DB_MAX_OVERFLOW", 2, 0, 100),
+    pool_pre_ping=True,
+    pool_recycle=resolve_int_env("LYRA_TASK_DB_POOL_RECYCLE_SECONDS", 1800, 60, 86400),
+)
 SessionLocal = sessionmaker(bind=engine)
 CONTAINER_RUN_PORT_RETRIES = 3
-CUSTOM_HOST_PORT_RANGE = (35001, 60000)
-BUILD_ERROR_SETTING_PREFIX = "build_error:"
+WARM_POOL_REFILL_LOCK_SECONDS = 1800
+logger = logging.getLogger(__name__)
 
 
-def _build_error_key(environment_id: str) -> str:
-    return f"{BUILD_ERROR_SETTING_PREFIX}{environment_id}"
+@worker_process_init.connect
+def _init_worker_process(**_kwargs) -> None:
+    # Pooled connections inherited from the parent must not be shared after fork.
+    engine.dispose(close=False)
+    get_task_docker()
 
 
-def _set_build_error(db, environment_id: str, message: str) -> None:
-    key = _build_error_key(environment_id)
-    value = (message or "").strip()[:12000]
-    setting = db.query(Setting).filter(Setting.key == key).first()
-    if setting:
-        setting.value = value
-    else:
-        db.add(Setting(key=key, value=value))
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**_kwargs) -> None:
+    close_task_docker()
+    engine.dispose()
+
+
+def _set_build_error(env, message: str) -> None:
+    env.build_error = (message or "").strip()[:12000]
+
+
+def _clear_build_error(env) -> None:
+    env.build_error = None
+
 
+def _store_build_log(db, environment_id, build_log: BuildLogPublisher, status: str) -> None:
+    build_log.finish(status)
+    db.merge(
+        EnvironmentBuildLog(
+            environment_id=environment_id,
+            log_gzip=compress_build_log(build_log.text),
+            line_count=build_log.line_count,
+            status=status,
+        )
+    )
+
+
+def _report_build_wait(build_log: BuildLogPublisher, tracker: ProvisioningTracker):
+    def _on_wait(wait: dict) -> None:
+        tracker.report_wait(wait)
+        if wait["reason"] == "disk":
+            build_log.log(
+                f"Waiting for disk space under the Docker root: {wait['free_bytes'] // 1024 ** 3} GiB free, "
+                f"{wait['required_bytes'] // 1024 ** 3} GiB required"
+            )
+        else:
+            build_log.log(f"Waiting for a build slot on this node (position {wait['position']})")
 
-def _clear_build_error(db, environment_id: str) -> None:
-    key = _build_error_key(environment_id)
-    setting = db.query(Setting).filter(Setting.key == key).first()
-    if setting:
-        db.delete(setting)
+    return _on_wait
 
 
 def _is_enabled(value, default: bool = True) -> bool:
@@ -71,9 +136,25 @@ def _build_ports_config(env, custom_ports: list[dict]) -> dict:
     return ports_config
 
 
+IMAGE_PROBE_OUTPUT_PREFIX = "lyra-probe:"
+# One container run reports every runtime capability instead of one run per check.
+IMAGE_PROBE_SCRIPT = "; ".join(
+    [
+        'has() { command -v "$1" >/dev/null 2>&1; }',
+        'if has sshd || [ -x /usr/sbin/sshd ]; then echo "lyra-probe:sshd=1"; else echo "lyra-probe:sshd=0"; fi',
+        'if has chpasswd; then echo "lyra-probe:chpasswd=1"; else echo "lyra-probe:chpasswd=0"; fi',
+        'if has code-server; then echo "lyra-probe:code_server=1"; else echo "lyra-probe:code_server=0"; fi',
+        'if has jupyter; then echo "lyra-probe:jupyter_mode=jupyter"; '
+        'elif has python3 && python3 -m jupyter --version >/dev/null 2>&1; then echo "lyra-probe:jupyter_mode=python_module"; '
+        'else echo "lyra-probe:jupyter_mode=none"; fi',
+    ]
+)
+IMAGE_PROBE_KEYS = {"sshd", "chpasswd", "code_server", "jupyter_mode"}
+
+
 def _run_image_probe(client, image_name: str, probe_command: str) -> tuple[bool, str]:
     try:
-        client.containers.run(
+        output = client.containers.run(
             image_name,
             [probe_command],
             entrypoint=["sh", "-lc"],
@@ -82,7 +163,9 @@ def _run_image_probe(client, image_name: str, probe_command: str) -> tuple[bool,
             stderr=True,
             detach=False,
         )
-        return True, ""
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", errors="ignore")
+        return True, str(output or "")
     except docker.errors.ContainerError as error:
         stderr = ""
         if error.stderr:
@@ -95,55 +178,67 @@ def _run_image_probe(client, image_name: str, probe_command: str) -> tuple[bool,
         return False, str(error)
 
 
+def _parse_image_probe_output(output: str) -> dict[str, str] | None:
+    capabilities = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith(IMAGE_PROBE_OUTPUT_PREFIX) or "=" not in line:
+            continue
+        key, value = line[len(IMAGE_PROBE_OUTPUT_PREFIX):].split("=", 1)
+        capabilities[key] = value
+    if not IMAGE_PROBE_KEYS.issubset(capabilities):
+        return None
+    return capabilities
+
+
+def _probe_image_capabilities(client, image_name: str) -> tuple[dict[str, str] | None, str]:
+    try:
+        image_id = client.images.get(image_name).id
+    except Exception:
+        image_id = None
+    if image_id:
+        cached = load_cached_image_probe(image_id)
+        if cached is not None:
+            return cached, ""
+
+    ok, output = _run_image_probe(client, image_name, IMAGE_PROBE_SCRIPT)
+    if not ok:
+        return None, output
+    capabilities = _parse_image_probe_output(output)
+    if capabilities is None:
+        return None, output.strip()
+    if image_id:
+        store_image_probe(image_id, capabilities)
+    return capabilities, ""
+
+
 def _validate_runtime_prerequisites(
     client,
     image_name: str,
     enable_jupyter: bool,
     enable_code_server: bool,
 ) -> Optional[str]:
-    ok, detail = _run_image_probe(
-        client,
-        image_name,
-        "if command -v sshd >/dev/null 2>&1; then :; elif [ -x /usr/sbin/sshd ]; then :; else exit 1; fi; command -v chpasswd >/dev/null 2>&1",  # noqa: E501
-    )
-    if not ok:
-        ok_sshd, _ = _run_image_probe(
-            client,
-            image_name,
-            "command -v sshd >/dev/null 2>&1 || [ -x /usr/sbin/sshd ]",
-        )
-        if not ok_sshd:
-            suffix = f" ({detail})" if detail else ""
-            return f"missing_prerequisite:sshd sshd binary must exist in the image{suffix}"
+    capabilities, detail = _probe_image_capabilities(client, image_name)
+    if capabilities is None:
         suffix = f" ({detail})" if detail else ""
-        return f"missing_prerequisite:chpasswd chpasswd must exist to apply root password{suffix}"
+        return f"missing_prerequisite:sshd sshd binary must exist in the image{suffix}"
+    if capabilities["sshd"] != "1":
+        return "missing_prerequisite:sshd sshd binary must exist in the image"
+    if capabilities["chpasswd"] != "1":
+        return "missing_prerequisite:chpasswd chpasswd must exist to apply root password"
 
-    if enable_code_server:
-        ok, detail = _run_image_probe(client, image_name, "command -v code-server >/dev/null 2>&1")
-        if not ok:
-            suffix = f" ({detail})" if detail else ""
-            return f"missing_prerequisite:code_server code-server is enabled but code-server binary is missing{suffix}"
+    if enable_code_server and capabilities["code_server"] != "1":
+        return "missing_prerequisite:code_server code-server is enabled but code-server binary is missing"
 
     if not enable_jupyter:
         return None
 
-    ok, _ = _run_image_probe(client, image_name, "command -v jupyter >/dev/null 2>&1")
-    if ok:
-        return "jupyter"
-
-    ok, detail = _run_image_probe(
-        client,
-        image_name,
-        "command -v python3 >/dev/null 2>&1 && python3 -m jupyter --version >/dev/null 2>&1",
-    )
-    if ok:
-        return "python_module"
+    if capabilities["jupyter_mode"] in {"jupyter", "python_module"}:
+        return capabilities["jupyter_mode"]
 
-    suffix = f" ({detail})" if detail else ""
     return (
         "missing_prerequisite:jupyter "
         "jupyter is enabled but neither 'jupyter' nor 'python3 -m jupyter' is available"
-        f"{suffix}"
     )
 
 
@@ -188,7 +283,7 @@ def _build_runtime_command(jupyter_mode: Optional[str], enable_jupyter: bool, en
 def _get_docker_used_ports() -> set[int]:
     used_ports: set[int] = set()
     try:
-        client = docker.from_env()
+        client = get_task_docker()
         containers = client.containers.list(all=True)
         for container in containers:
             ports = container.attrs.get("NetworkSettings", {}).get("Ports", {}) or {}
@@ -205,81 +300,47 @@ def _get_docker_used_ports() -> set[int]:
     return used_ports
 
 
-def _pick_free_port(start: int, end: int, blocked_ports: set[int]) -> int:
-    candidates = list(range(start, end + 1))
-    random.shuffle(candidates)
-    for port in candidates:
-        if port in blocked_ports:
-            continue
-        return port
-    raise RuntimeError(f"No available host ports in range {start}-{end}")
+def _ensure_port_map(db) -> None:
+    if port_allocator.needs_sync(LOCAL_PORT_NODE):
+        sync_port_map_sync(db, docker_used_ports=_get_docker_used_ports())
 
 
-def _allocate_ports(db, exclude_environment_id=None):
-    query = db.query(Environment.ssh_port, Environment.jupyter_port, Environment.code_port)
-    if exclude_environment_id is not None:
-        query = query.filter(Environment.id != exclude_environment_id)
-    rows = query.all()
+def _reserve_ports(db, owner_id, kinds) -> list[int]:
+    _ensure_port_map(db)
+    return reserve_ports_sync(db, [(owner_id, kind) for kind in kinds])
 
-    blocked_ports = set()
-    for ssh_port, jupyter_port, code_port in rows:
-        blocked_ports.add(ssh_port)
-        blocked_ports.add(jupyter_port)
-        blocked_ports.add(code_port)
 
-    custom_port_settings = db.query(Setting).filter(Setting.key.like("custom_ports:%")).all()
-    for setting in custom_port_settings:
-        try:
-            mappings = json.loads(setting.value)
-        except Exception:
-            continue
-        for mapping in mappings or []:
-            host_port = mapping.get("host_port")
-            if isinstance(host_port, int):
-                blocked_ports.add(host_port)
-            elif isinstance(host_port, str) and host_port.isdigit():
-                blocked_ports.add(int(host_port))
-
-    blocked_ports.update(_get_docker_used_ports())
-
-    ssh_port = _pick_free_port(20000, 25000, blocked_ports)
-    blocked_ports.add(ssh_port)
-    jupyter_port = _pick_free_port(25001, 30000, blocked_ports)
-    blocked_ports.add(jupyter_port)
-    code_port = _pick_free_port(30001, 35000, blocked_ports)
-    return ssh_port, jupyter_port, code_port
-
-
-def _allocate_custom_host_ports(db, count: int, exclude_environment_id=None):
-    blocked_ports = _get_docker_used_ports()
-    rows = db.query(Environment.ssh_port, Environment.jupyter_port, Environment.code_port).all()
-    for ssh_port, jupyter_port, code_port in rows:
-        blocked_ports.add(ssh_port)
-        blocked_ports.add(jupyter_port)
-        blocked_ports.add(code_port)
-
-    custom_port_settings = db.query(Setting).filter(Setting.key.like("custom_ports:%")).all()
-    for setting in custom_port_settings:
-        if exclude_environment_id is not None and setting.key == f"custom_ports:{exclude_environment_id}":
-            continue
-        try:
-            mappings = json.loads(setting.value)
-        except Exception:
-            continue
-        for mapping in mappings or []:
-            host_port = mapping.get("host_port")
-            if isinstance(host_port, int):
-                blocked_ports.add(host_port)
-            elif isinstance(host_port, str) and host_port.isdigit():
-                blocked_ports.add(int(host_port))
-
-    host_start, host_end = CUSTOM_HOST_PORT_RANGE
-    allocated = []
-    for _ in range(count):
-        host_port = _pick_free_port(host_start, host_end, blocked_ports)
-        blocked_ports.add(host_port)
-        allocated.append(host_port)
-    return allocated
+def _reassign_environment_ports(db, env, custom_ports: list[dict]) -> None:
+    # Docker refused the old ports, so something outside Lyra holds them: drop the
+    # reservations but keep the ports marked used in the map.
+    previous_ports = [env.ssh_port, env.jupyter_port, env.code_port, *(m["host_port"] for m in custom_ports)]
+    _ensure_port_map(db)
+    release_owner_ports_sync(db, [env.id])
+    port_allocator.mark_used(LOCAL_PORT_NODE, previous_ports)
+    ports = _reserve_ports(db, env.id, [*ENVIRONMENT_PORT_KINDS, *["custom"] * len(custom_ports)])
+    env.ssh_port, env.jupyter_port, env.code_port = ports[:3]
+    for mapping, host_port in zip(custom_ports, ports[3:]):
+        mapping["host_port"] = host_port
+
+
+def _adopt_existing_container(client, container_name: str) -> bool:
+    # True when a running container with this name can be kept; a stopped one is removed.
+    try:
+        container = client.containers.get(container_name)
+    except docker.errors.NotFound:
+        return False
+    if container.status == "running":
+        return True
+    container.remove(force=True)
+    return False
+
+
+@celery_app.task
+def prefetch_base_image_task(image_ref):
+    # Pulls the base image and caches its apt-get check so later creates answer from cache.
+    client = get_task_docker()
+    has_apt = image_has_apt_get(client, image_ref, pull=True)
+    return f"Prefetched {image_ref} (apt-get: {'yes' if has_apt else 'no'})"
 
 
 @celery_app.task(bind=True)
@@ -290,105 +351,121 @@ def create_environment_task(self, environment_id):
 
     if not env:
         return f"Environment {environment_id} not found"
+    if env.status == "running":
+        # acks_late redelivers the task after a worker crash; an earlier delivery already finished.
+        db.close()
+        return f"Environment {env.name} is already running"
 
+    build_log = None
+    tracker = ProvisioningTracker(env_id, task=self)
+    outcome = "failed"
     try:
         # Update status to building
         env.status = "building"
-        _clear_build_error(db, env_id)
+        _clear_build_error(env)
         db.commit()
 
         print(f"[Task] Processing environment {env.id}")
         print(f"[Task] Dockerfile content length: {len(env.dockerfile_content) if env.dockerfile_content else 0}")
 
-        client = docker.from_env()
+        client = get_task_docker()
 
         # 1. Build Image from user-provided Dockerfile
-        image_name = f"lyra-custom-{str(env.id)}"
-
-        if env.dockerfile_content:
-            print(f"[Task] Building custom image {image_name}...")
-            try:
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    dockerfile_path = os.path.join(temp_dir, 'Dockerfile')
-                    with open(dockerfile_path, 'w') as f:
-                        f.write(env.dockerfile_content)
-
-                    # Build image
-                    # Note: This might block for a while
-                    client.images.build(path=temp_dir, tag=image_name, rm=True)
-                print("[Task] Custom image built successfully.")
-            except Exception as build_error:
-                print(f"[Task] Build failed: {build_error}")
-                env.status = "error"
-                _set_build_error(db, env_id, f"Build failed: {build_error}")
-                db.commit()
-                return f"Failed to build image: {str(build_error)}"
-        else:
-            # Fallback if no content provided
-            image_name = "python:3.11-slim"
-            try:
-                client.images.get(image_name)
-            except docker.errors.ImageNotFound:
-                client.images.pull(image_name)
+        build_log = BuildLogPublisher(env_id)
+        with tracker.step("build") as build_step:
+            if env.dockerfile_content:
+                print("[Task] Resolving content-addressed custom image...")
+                try:
+                    # Note: This might block for a while when the image is not cached yet
+                    image_name, built = ensure_content_addressed_image(
+                        client,
+                        env.dockerfile_content,
+                        on_output=build_log.publish_chunk,
+                        admission=BuildAdmission(client, env_id, on_wait=_report_build_wait(build_log, tracker)),
+                    )
+                    tracker.report_wait(None)
+                    if built:
+                        # create_environment skips this check when the base image was not on the node yet.
+                        base_image = extract_dockerfile_base_image(env.dockerfile_content)
+                        if base_image and image_has_apt_get(client, base_image, pull=False) is False:
+                            raise RuntimeError("unsupported_base_image Only Debian/Ubuntu-based base images are supported")
+                        print(f"[Task] Custom image {image_name} built successfully.")
+                    else:
+                        print(f"[Task] Reusing cached image {image_name}.")
+                        build_log.log(f"Using cached image {image_name}")
+                except Exception as build_error:
+                    print(f"[Task] Build failed: {build_error}")
+                    build_log.log(f"Build failed: {build_error}")
+                    _store_build_log(db, env.id, build_log, "failed")
+                    tracker.fail_step(build_step, str(build_error))
+                    env.status = "error"
+                    _set_build_error(env, f"Build failed: {build_error}")
+                    db.commit()
+                    return f"Failed to build image: {str(build_error)}"
+            else:
+                # Fallback if no content provided
+                image_name = "python:3.11-slim"
+                build_log.log(f"No Dockerfile provided; using {image_name}")
+                try:
+                    client.images.get(image_name)
+                except docker.errors.ImageNotFound:
+                    client.images.pull(image_name)
+        env.image_ref = image_name
+        _store_build_log(db, env.id, build_log, "succeeded")
+        db.commit()
 
         # 2. Run Container
         # Basic container configuration
-        token_key = f"jupyter_token:{env.id}"
-        token_setting = db.query(Setting).filter(Setting.key == token_key).first()
-        if not token_setting:
-            token_setting = Setting(key=token_key, value=secrets.token_urlsafe(32))
-            db.add(token_setting)
+        if not env.jupyter_token:
+            env.jupyter_token = secrets.token_urlsafe(32)
             db.commit()
-        jupyter_token = token_setting.value
+        jupyter_token = env.jupyter_token
 
-        custom_ports_key = f"custom_ports:{env.id}"
-        custom_ports_setting = db.query(Setting).filter(Setting.key == custom_ports_key).first()
-        custom_ports = []
-        if custom_ports_setting:
-            try:
-                custom_ports = json.loads(custom_ports_setting.value) or []
-            except Exception:
-                custom_ports = []
+        custom_ports = [dict(mapping) for mapping in env.custom_ports or []]
 
         enable_jupyter = _is_enabled(getattr(env, "enable_jupyter", True))
         enable_code_server = _is_enabled(getattr(env, "enable_code_server", True))
         print(f"[Task] Service flags: enable_jupyter={enable_jupyter}, " f"enable_code_server={enable_code_server}")
 
-        if not env.root_password_encrypted:
-            env.status = "error"
-            _set_build_error(db, env_id, "Runtime provisioning failed: Missing encrypted root password")
-            db.commit()
-            return "password_decryption_failed Missing encrypted root password"
+        with tracker.step("password") as password_step:
+            if not env.root_password_encrypted:
+                tracker.fail_step(password_step, "Missing encrypted root password")
+                env.status = "error"
+                _set_build_error(env, "Runtime provisioning failed: Missing encrypted root password")
+                db.commit()
+                return "password_decryption_failed Missing encrypted root password"
 
-        try:
-            root_password = decrypt_secret(env.root_password_encrypted)
-        except SecretKeyError as error:
-            env.status = "error"
-            _set_build_error(db, env_id, f"Runtime provisioning failed: {error}")
-            db.commit()
-            return f"password_decryption_failed {error}"
-        except SecretCipherError as error:
-            env.status = "error"
-            _set_build_error(db, env_id, f"Runtime provisioning failed: {error}")
-            db.commit()
-            return f"password_decryption_failed {error}"
+            try:
+                root_password = decrypt_secret(env.root_password_encrypted)
+            except (SecretKeyError, SecretCipherError) as error:
+                tracker.fail_step(password_step, str(error))
+                env.status = "error"
+                _set_build_error(env, f"Runtime provisioning failed: {error}")
+                db.commit()
+                return f"password_decryption_failed {error}"
 
-        jupyter_mode = _validate_runtime_prerequisites(
-            client,
-            image_name,
-            enable_jupyter=enable_jupyter,
-            enable_code_server=enable_code_server,
-        )
-        if isinstance(jupyter_mode, str) and jupyter_mode.startswith("missing_prerequisite:"):
-            env.status = "error"
-            _set_build_error(db, env_id, jupyter_mode)
-            db.commit()
-            return jupyter_mode
+        with tracker.step("probe") as probe_step:
+            jupyter_mode = _validate_runtime_prerequisites(
+                client,
+                image_name,
+                enable_jupyter=enable_jupyter,
+                enable_code_server=enable_code_server,
+            )
+            if isinstance(jupyter_mode, str) and jupyter_mode.startswith("missing_prerequisite:"):
+                tracker.fail_step(probe_step, jupyter_mode)
+                env.status = "error"
+                _set_build_error(env, jupyter_mode)
+                db.commit()
+                return jupyter_mode
 
         container_config = {
             "image": image_name,
             "name": f"lyra-{env.name}-{env.id}",  # Ensure unique name
             "detach": True,
+            "labels": {
+                LYRA_MANAGED_LABEL: "true",
+                LYRA_ENVIRONMENT_ID_LABEL: str(env.id),
+            },
             "environment": {
                 "JUPYTER_TOKEN": jupyter_token,
                 "ENABLE_JUPYTER": "1" if enable_jupyter else "0",
@@ -434,40 +511,199 @@ def create_environment_task(self, environment_id):
         if volumes:
             container_config['volumes'] = volumes
 
-        for attempt in range(CONTAINER_RUN_PORT_RETRIES):
+        # A redelivered task can find the container started by an earlier delivery.
+        adopted = _adopt_existing_container(client, container_config["name"])
+        for attempt in range(0 if adopted else CONTAINER_RUN_PORT_RETRIES):
             container_config["ports"] = _build_ports_config(env, custom_ports)
             try:
-                client.containers.run(**container_config)
+                with tracker.step("container_run", detail=f"attempt {attempt + 1}"):
+                    client.containers.run(**container_config)
                 break
             except docker.errors.APIError as run_error:
                 message = str(run_error).lower()
+                if "already in use by container" in message:
+                    if _adopt_existing_container(client, container_config["name"]):
+                        break
+                    if attempt == CONTAINER_RUN_PORT_RETRIES - 1:
+                        raise
+                    continue
                 is_port_conflict = "port is already allocated" in message or "address already in use" in message
                 if not is_port_conflict or attempt == CONTAINER_RUN_PORT_RETRIES - 1:
                     raise
-                new_ssh_port, new_jupyter_port, new_code_port = _allocate_ports(db, exclude_environment_id=env.id)
-                env.ssh_port = new_ssh_port
-                env.jupyter_port = new_jupyter_port
-                env.code_port = new_code_port
-                if custom_ports:
-                    new_custom_host_ports = _allocate_custom_host_ports(
-                        db, len(custom_ports), exclude_environment_id=env.id
-                    )
-                    for idx, mapping in enumerate(custom_ports):
-                        mapping["host_port"] = new_custom_host_ports[idx]
-                    if custom_ports_setting:
-                        custom_ports_setting.value = json.dumps(custom_ports)
-                db.commit()
+                with tracker.step("port_retry", detail=f"attempt {attempt + 1}"):
+                    _reassign_environment_ports(db, env, custom_ports)
+                    env.custom_ports = custom_ports
+                    db.commit()
 
         env.status = "running"
-        _clear_build_error(db, env_id)
+        _clear_build_error(env)
         db.commit()
+        outcome = "succeeded"
 
         return f"Environment {env.name} created successfully"
 
     except Exception as e:
+        if build_log is not None and not build_log.finished:
+            build_log.log(f"Environment creation failed: {e}")
+            _store_build_log(db, env.id, build_log, "failed")
         env.status = "error"
-        _set_build_error(db, env_id, f"Environment creation failed: {e}")
+        _set_build_error(env, f"Environment creation failed: {e}")
         db.commit()
         return f"Error creating environment: {str(e)}"
+    finally:
+        tracker.finish(outcome)
+        db.close()
+
+
+@celery_app.task
+def create_environment_batch_task(environment_ids):
+    # Builds the shared image once up front, so the per-environment tasks find it
+    # cached and run their containers in parallel.
+    db = SessionLocal()
+    try:
+        rows = db.query(Environment.dockerfile_content).filter(Environment.id.in_(environment_ids)).all()
+    finally:
+        db.close()
+
+    client = get_task_docker()
+    for dockerfile_content in {row[0] for row in rows if row[0]}:
+        try:
+            ensure_content_addressed_image(
+                client, dockerfile_content, admission=BuildAdmission(client, f"batch:{uuid.uuid4()}")
+            )
+        except Exception as error:
+            # Each environment task retries the build and records the failure in its own build log.
+            logger.warning("Shared image build failed for environment batch: %s", error)
+
+    group(create_environment_task.s(str(environment_id)) for environment_id in environment_ids).apply_async()
+    return f"Started provisioning for {len(environment_ids)} environment(s)"
+
+
+def _start_warm_container(db, client, template_id, pool, image_name: str, jupyter_mode: Optional[str]) -> None:
+    entry_id = uuid.uuid4()
+    ssh_port, jupyter_port, code_port = _reserve_ports(db, entry_id, ENVIRONMENT_PORT_KINDS)
+    entry = WarmContainer(
+        id=entry_id,
+        template_id=template_id,
+        content_hash=pool.content_hash,
+        enable_jupyter=pool.enable_jupyter,
+        enable_code_server=pool.enable_code_server,
+        status=WARM_CONTAINER_WARMING,
+        container_name=f"{WARM_CONTAINER_NAME_PREFIX}{entry_id}",
+        image_ref=image_name,
+        ssh_port=ssh_port,
+        jupyter_port=jupyter_port,
+        code_port=code_port,
+        jupyter_token=secrets.token_urlsafe(32),
+    )
+    db.add(entry)
+    db.commit()
+
+    try:
+        client.containers.run(
+            image=image_name,
+            name=entry.container_name,
+            detach=True,
+            # Labels cannot change after creation, so the container is labelled with the
+            # environment id it takes when claimed (the claim reuses the pool entry id).
+            labels={LYRA_MANAGED_LABEL: "true", LYRA_ENVIRONMENT_ID_LABEL: str(entry.id)},
+            environment={
+                "JUPYTER_TOKEN": entry.jupyter_token,
+                "ENABLE_JUPYTER": "1" if pool.enable_jupyter else "0",
+                "ENABLE_CODE_SERVER": "1" if pool.enable_code_server else "0",
+                # Replaced with the owner's password when the container is claimed.
+                "ROOT_PASSWORD": secrets.token_urlsafe(24),
+            },
+            ports=_build_ports_config(entry, []),
+            command=_build_runtime_command(
+                jupyter_mode,
+                enable_jupyter=pool.enable_jupyter,
+                enable_code_server=pool.enable_code_server,
+            ),
+        )
+    except Exception:
+        remove_warm_containers([entry.container_name], client)
+        db.delete(entry)
+        release_owner_ports_sync(db, [entry.id])
+        db.commit()
+        raise
+
+    entry.status = WARM_CONTAINER_READY
+    db.commit()
+
+
+@celery_app.task
+def refill_warm_pool_task(template_id):
+    lock_key = f"lyra:warm-pool-refill:{template_id}"
+    try:
+        if not get_task_redis().set(lock_key, 1, nx=True, ex=WARM_POOL_REFILL_LOCK_SECONDS):
+            return f"Warm pool refill for template {template_id} already running"
+    except (RedisError, OSError) as error:
+        logger.warning("Warm pool refill lock unavailable for template %s: %s", template_id, error)
+
+    db = SessionLocal()
+    try:
+        template = db.query(Template).filter(Template.id == template_id).first()
+        try:
+            pool = parse_warm_pool_config(template.config) if template else None
+        except ValueError:
+            pool = None
+
+        client = get_task_docker()
+        entries = (
+            db.query(WarmContainer)
+            .filter(WarmContainer.template_id == template_id)
+            .order_by(WarmContainer.created_at)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        # Rows locked by a claim are skipped; stale configs are dropped and the rest trimmed to size.
+        keep = []
+        for entry in entries:
+            if entry.status == WARM_CONTAINER_CLAIMED:
+                continue
+            matches = (
+                pool is not None
+                and entry.content_hash == pool.content_hash
+                and entry.enable_jupyter == pool.enable_jupyter
+                and entry.enable_code_server == pool.enable_code_server
+            )
+            if matches and len(keep) < pool.size:
+                keep.append(entry)
+                continue
+            remove_warm_containers([entry.container_name], client)
+            db.delete(entry)
+            release_owner_ports_sync(db, [entry.id])
+        db.commit()
+
+        missing = (pool.size if pool else 0) - len(keep)
+        if missing <= 0:
+            return f"Warm pool for template {template_id} is full"
+
+        image_name, _ = ensure_content_addressed_image(
+            client, pool.dockerfile_content, admission=BuildAdmission(client, f"warm-pool:{template_id}")
+        )
+        base_image = extract_dockerfile_base_image(pool.dockerfile_content)
+        if base_image and image_has_apt_get(client, base_image, pull=False) is False:
+            return f"Warm pool for template {template_id} skipped: unsupported base image"
+        jupyter_mode = _validate_runtime_prerequisites(
+            client,
+            image_name,
+            enable_jupyter=pool.enable_jupyter,
+            enable_code_server=pool.enable_code_server,
+        )
+        if isinstance(jupyter_mode, str) and jupyter_mode.startswith("missing_prerequisite:"):
+            return f"Warm pool for template {template_id} skipped: {jupyter_mode}"
+
+        for _ in range(missing):
+            _start_warm_container(db, client, template_id, pool, image_name, jupyter_mode)
+        return f"Warm pool for template {template_id} refilled with {missing} container(s)"
+    except Exception as error:
+        logger.warning("Warm pool refill failed for template %s: %s", template_id, error)
+        return f"Warm pool refill failed: {error}"
     finally:
         db.close()
+        try:
+            get_task_redis().delete(lock_key)
+        except (RedisError, OSError):
+            pass
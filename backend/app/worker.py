@@ -1,9 +1,26 @@
 from celery import Celery
+from kombu import Queue
+from .core.env import resolve_int_env
 import os
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
 
+BUILD_QUEUE = "lyra.build"
+LIFECYCLE_QUEUE = "lyra.lifecycle"
+MAINTENANCE_QUEUE = "lyra.maintenance"
+# Redis transport: lower number is served first.
+LIFECYCLE_PRIORITY = 0
+BUILD_PRIORITY = 3
+MAINTENANCE_PRIORITY = 6
+
+
+def resolve_celery_visibility_timeout() -> int:
+    # With acks_late an unacked task is redelivered after this long, so it must
+    # outlast the slowest image build.
+    return resolve_int_env("LYRA_CELERY_VISIBILITY_TIMEOUT_SECONDS", 4 * 3600, 300, 48 * 3600)
+
+
 celery_app = Celery(
     "worker",
     broker=CELERY_BROKER_URL,
@@ -17,4 +34,29 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=(
+        Queue(BUILD_QUEUE, routing_key=BUILD_QUEUE),
+        Queue(LIFECYCLE_QUEUE, routing_key=LIFECYCLE_QUEUE),
+        Queue(MAINTENANCE_QUEUE, routing_key=MAINTENANCE_QUEUE),
+    ),
+    task_default_queue=LIFECYCLE_QUEUE,
+    task_default_routing_key=LIFECYCLE_QUEUE,
+    task_default_priority=LIFECYCLE_PRIORITY,
+    task_routes={
+        "app.tasks.create_environment_task": {"queue": BUILD_QUEUE, "priority": BUILD_PRIORITY},
+        "app.tasks.create_environment_batch_task": {"queue": BUILD_QUEUE, "priority": BUILD_PRIORITY},
+        "app.tasks.prefetch_base_image_task": {"queue": MAINTENANCE_QUEUE, "priority": MAINTENANCE_PRIORITY},
+        "app.tasks.refill_warm_pool_task": {"queue": MAINTENANCE_QUEUE, "priority": MAINTENANCE_PRIORITY},
+    },
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # Each worker also consumes "<nodename>.dq" so a task can target one node.
+    worker_direct=True,
+    broker_transport_options={
+        "visibility_timeout": resolve_celery_visibility_timeout(),
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
 )
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core import build_admission, image_cache
+
+
+class _FakeClient:
+    def info(self):
+        return {"ID": "daemon-1", "DockerRootDir": "/nonexistent-docker-root"}
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.removed = []
+
+    def zrem(self, key, member):
+        self.removed.append((key, member))
+
+
+@pytest.fixture(autouse=True)
+def _reset_docker_info(monkeypatch):
+    monkeypatch.setattr(build_admission, "_docker_info", None)
+    monkeypatch.setattr(build_admission, "BUILD_ADMISSION_POLL_SECONDS", 0)
+
+
+def test_build_waits_in_queue_then_releases_slot(monkeypatch):
+    redis = _FakeRedis()
+    waits = []
+    admission = build_admission.BuildAdmission(_FakeClient(), "env-1", on_wait=waits.append, redis_client=redis)
+    positions = iter([2, 2, 1, 0])
+    monkeypatch.setattr(admission, "try_acquire", lambda: next(positions))
+    monkeypatch.setattr(admission, "_renew_lease", lambda: None)
+
+    with admission.slot():
+        pass
+
+    # Unchanged positions are reported once.
+    assert waits == [{"reason": "queue", "position": 2}, {"reason": "queue", "position": 1}]
+    assert redis.removed == [("lyra:build-admission:daemon-1:slots", "env-1")]
+
+
+def test_build_is_deferred_while_disk_is_below_watermark(monkeypatch):
+    monkeypatch.setenv("LYRA_BUILD_MIN_FREE_DISK_GB", "10")
+    free_space = iter([1024 ** 3, 20 * 1024 ** 3])
+    monkeypatch.setattr(build_admission, "free_docker_disk_bytes", lambda _client: next(free_space))
+    waits = []
+    admission = build_admission.BuildAdmission(_FakeClient(), "env-1", on_wait=waits.append, redis_client=_FakeRedis())
+    monkeypatch.setattr(admission, "try_acquire", lambda: 0)
+
+    admission.acquire()
+
+    assert [wait["reason"] for wait in waits] == ["disk"]
+
+
+def test_build_proceeds_without_slot_when_redis_is_down(monkeypatch):
+    admission = build_admission.BuildAdmission(_FakeClient(), "env-1", redis_client=_FakeRedis())
+
+    def _broken():
+        raise RedisConnectionError("down")
+
+    monkeypatch.setattr(admission, "try_acquire", _broken)
+    ran = []
+    with admission.slot():
+        ran.append(True)
+    assert ran == [True]
+
+
+def test_image_built_while_waiting_is_reused(monkeypatch):
+    tag = image_cache.content_addressed_image_tag(image_cache.compute_image_content_hash("FROM ubuntu:22.04\n"))
+    local_images = set()
+    builds = []
+
+    class _Admission:
+        @contextmanager
+        def slot(self):
+            # A concurrent build of the same Dockerfile finished while this one queued.
+            local_images.add(tag)
+            yield
+
+    monkeypatch.setattr(image_cache, "_get_local_image", lambda _client, ref: object() if ref in local_images else None)
+    monkeypatch.setattr(image_cache, "_build_content_addressed_image", lambda *args: builds.append(args))
+
+    result = image_cache.ensure_content_addressed_image(object(), "FROM ubuntu:22.04\n", admission=_Admission())
+
+    assert result == (tag, False)
+    assert builds == []
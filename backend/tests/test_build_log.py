@@ -0,0 +1,112 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+from app.core import build_log
+from app.routers import environments as env_router
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def rpush(self, key, value):
+        self._ops.append(("rpush", key, value))
+
+    def ltrim(self, key, start, end):
+        self._ops.append(("ltrim", key, start, end))
+
+    def expire(self, key, seconds):
+        self._ops.append(("expire", key, seconds))
+
+    def publish(self, channel, value):
+        self._ops.append(("publish", channel, value))
+
+    def execute(self):
+        for op in self._ops:
+            if op[0] == "rpush":
+                self._redis.lists.setdefault(op[1], []).append(op[2])
+            elif op[0] == "publish":
+                self._redis.published.append((op[1], json.loads(op[2])))
+        self._ops = []
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.published = []
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+def test_publisher_streams_events_and_keeps_only_log_lines():
+    redis = _FakeRedis()
+    redis.lists[build_log.build_log_backlog_key("env-1")] = ["stale"]
+    publisher = build_log.BuildLogPublisher("env-1", redis_client=redis)
+
+    publisher.publish_chunk({"stream": "Step 1/2 : FROM ubuntu:22.04\n"})
+    publisher.publish_chunk({"status": "Downloading", "id": "abc", "progress": "[==>   ]"})
+    publisher.publish_chunk({"stream": " ---> 1234\n"})
+    publisher.finish("succeeded")
+
+    assert [event["type"] for _channel, event in redis.published] == ["step", "progress", "log", "done"]
+    assert [event["seq"] for _channel, event in redis.published] == [1, 2, 3, 4]
+    backlog = [json.loads(raw) for raw in redis.lists[build_log.build_log_backlog_key("env-1")]]
+    # Progress is live-only and the previous build's backlog was cleared.
+    assert [event["type"] for event in backlog] == ["step", "log", "done"]
+    assert publisher.text == "Step 1/2 : FROM ubuntu:22.04\n ---> 1234\n"
+    assert build_log.decompress_build_log(build_log.compress_build_log(publisher.text)) == publisher.text
+
+
+def test_publisher_keeps_building_when_redis_fails():
+    class _BrokenRedis:
+        def delete(self, key):
+            raise OSError("connection refused")
+
+    publisher = build_log.BuildLogPublisher("env-1", redis_client=_BrokenRedis())
+    publisher.log("still captured")
+    publisher.finish("failed")
+    assert publisher.text == "still captured\n"
+    assert publisher.finished is True
+
+
+def test_build_log_endpoint_pages_stored_log():
+    env_id = uuid.uuid4()
+    env = SimpleNamespace(id=env_id, status="running", worker_server_id=None)
+    stored = SimpleNamespace(
+        log_gzip=build_log.compress_build_log("".join(f"line {index}\n" for index in range(5))),
+        status="succeeded",
+    )
+
+    class _ScalarResult:
+        def first(self):
+            return env
+
+    class _ExecuteResult:
+        def scalars(self):
+            return _ScalarResult()
+
+    class _FakeDb:
+        async def execute(self, _stmt):
+            return _ExecuteResult()
+
+        async def get(self, model, key):
+            assert model is env_router.EnvironmentBuildLog
+            return stored if key == env_id else None
+
+    page = asyncio.run(env_router.get_environment_build_log(str(env_id), offset=3, limit=10, db=_FakeDb()))
+
+    assert page == {
+        "lines": ["line 3\n", "line 4\n"],
+        "offset": 3,
+        "next_offset": 5,
+        "total": 5,
+        "complete": True,
+        "status": "succeeded",
+    }
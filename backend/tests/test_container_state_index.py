@@ -0,0 +1,146 @@
+import asyncio
+import uuid
+
+import docker
+
+from app.core import container_state
+from app.routers import environments as env_router
+
+
+def _inspect_attrs(container_id, name, environment_id=None, status="running", exit_code=0, oom_killed=False):
+    labels = {container_state.LYRA_MANAGED_LABEL: "true"}
+    if environment_id:
+        labels[container_state.LYRA_ENVIRONMENT_ID_LABEL] = environment_id
+    return {
+        "Id": container_id,
+        "Name": f"/{name}",
+        "Config": {"Labels": labels},
+        "State": {
+            "Status": status,
+            "ExitCode": exit_code,
+            "OOMKilled": oom_killed,
+            "Error": "",
+            "StartedAt": "2026-01-01T00:00:00Z",
+            "FinishedAt": "0001-01-01T00:00:00Z",
+        },
+    }
+
+
+class _Container:
+    def __init__(self, attrs):
+        self.attrs = attrs
+
+
+class _ContainerStore:
+    def __init__(self, attrs_list):
+        self._attrs_list = attrs_list
+        self.list_calls = []
+
+    def list(self, **kwargs):
+        self.list_calls.append(kwargs)
+        return [_Container(attrs) for attrs in self._attrs_list]
+
+
+class _Api:
+    def __init__(self, inspect_map):
+        self._inspect_map = inspect_map
+        self.inspect_calls = []
+
+    def inspect_container(self, container_id):
+        self.inspect_calls.append(container_id)
+        value = self._inspect_map.get(container_id)
+        if value is None:
+            raise docker.errors.NotFound("gone")
+        return value
+
+
+class _Client:
+    def __init__(self, attrs_list=None, inspect_map=None):
+        self.containers = _ContainerStore(attrs_list or [])
+        self.api = _Api(inspect_map or {})
+
+
+def _event(action, container_id, name):
+    return {"Type": "container", "Action": action, "Actor": {"ID": container_id, "Attributes": {"name": name}}}
+
+
+def test_watcher_resync_and_events_update_index():
+    env_id = str(uuid.uuid4())
+    name = f"lyra-demo-{env_id}"
+    index = container_state.ContainerStateIndex()
+    watcher = container_state.ContainerStateWatcher(index)
+    client = _Client(
+        attrs_list=[
+            _inspect_attrs("a" * 64, name, env_id),
+            _inspect_attrs("b" * 64, "not-lyra"),
+        ]
+    )
+
+    watcher.resync(client)
+
+    assert index.is_synced is True
+    assert index.find(env_id, name).status == "running"
+    assert index.find("other", "not-lyra") is None
+
+    client.api = _Api({"a" * 64: _inspect_attrs("a" * 64, name, env_id, status="exited", exit_code=137, oom_killed=True)})
+    watcher.handle_event(client, _event("exec_start: bash", "a" * 64, name))
+    assert client.api.inspect_calls == []
+
+    watcher.handle_event(client, _event("die", "a" * 64, name))
+    state = index.find(env_id, name)
+    assert state.status == "exited"
+    assert state.exit_code == 137
+    assert state.oom_killed is True
+
+    watcher.handle_event(client, _event("destroy", "a" * 64, name))
+    assert index.find(env_id, name) is None
+
+
+def test_read_environment_statuses_serves_from_synced_index(monkeypatch):
+    class _EnvRow:
+        def __init__(self, name, status):
+            self.id = uuid.uuid4()
+            self.name = name
+            self.status = status
+
+    class _Result:
+        def __init__(self, items):
+            self._items = items
+
+        def scalars(self):
+            return self
+
+        def all(self):
+            return self._items
+
+    class _FakeDb:
+        def __init__(self, envs):
+            self._envs = envs
+
+        async def execute(self, *_args, **_kwargs):
+            return _Result(self._envs)
+
+    env_running = _EnvRow("idx-running", "starting")
+    env_missing = _EnvRow("idx-missing", "running")
+    index = container_state.ContainerStateIndex()
+    index.replace_all(
+        [
+            container_state.container_state_from_attrs(
+                _inspect_attrs("c" * 64, f"lyra-{env_running.name}-{env_running.id}", str(env_running.id))
+            )
+        ]
+    )
+
+    def _docker_must_not_be_called():
+        raise AssertionError("docker daemon should not be queried while the index is synced")
+
+    monkeypatch.setattr(env_router, "container_state_index", index)
+    monkeypatch.setattr(env_router.docker, "from_env", _docker_must_not_be_called)
+
+    result = asyncio.run(env_router.read_environment_statuses(environment_ids=None, db=_FakeDb([env_running, env_missing])))
+
+    by_id = {row["id"]: row for row in result["environments"]}
+    assert by_id[str(env_running.id)] == {"id": str(env_running.id), "status": "running", "container_id": "c" * 12}
+    assert by_id[str(env_missing.id)]["status"] == "stopped"
+    assert env_router._is_host_environment_running_now(env_running) is True
+    assert env_router._is_host_environment_running_now(env_missing) is False
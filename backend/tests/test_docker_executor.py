@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+from app.core import docker_executor
+
+
+def test_run_docker_executes_off_event_loop_thread():
+    loop_thread = threading.get_ident()
+
+    async def _run():
+        return await docker_executor.run_docker(threading.get_ident)
+
+    worker_thread = asyncio.run(_run())
+
+    assert worker_thread != loop_thread
+
+
+def test_run_docker_propagates_exceptions_and_counts_failures():
+    def _boom():
+        raise RuntimeError("daemon down")
+
+    before = docker_executor.get_docker_executor_metrics()["failed"]
+
+    async def _run():
+        await docker_executor.run_docker(_boom)
+
+    try:
+        asyncio.run(_run())
+    except RuntimeError as error:
+        assert str(error) == "daemon down"
+    else:
+        raise AssertionError("expected RuntimeError")
+
+    metrics = docker_executor.get_docker_executor_metrics()
+    assert metrics["failed"] == before + 1
+    assert metrics["active"] == 0
+    assert metrics["queued"] == 0
+
+
+def test_executor_size_is_clamped(monkeypatch):
+    monkeypatch.setenv("LYRA_DOCKER_EXECUTOR_THREADS", "0")
+    assert docker_executor._resolve_docker_executor_size() == 1
+    monkeypatch.setenv("LYRA_DOCKER_EXECUTOR_THREADS", "999")
+    assert docker_executor._resolve_docker_executor_size() == 64
+    monkeypatch.setenv("LYRA_DOCKER_EXECUTOR_THREADS", "bad")
+    assert docker_executor._resolve_docker_executor_size() == 8
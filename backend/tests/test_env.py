@@ -0,0 +1,12 @@
+from app.core.env import resolve_int_env
+
+
+def test_resolve_int_env_clamps_and_falls_back_to_default(monkeypatch):
+    monkeypatch.setenv("LYRA_TEST_INT", "500")
+    assert resolve_int_env("LYRA_TEST_INT", 5, 1, 100) == 100
+    monkeypatch.setenv("LYRA_TEST_INT", "-3")
+    assert resolve_int_env("LYRA_TEST_INT", 5, 1, 100) == 1
+    monkeypatch.setenv("LYRA_TEST_INT", "many")
+    assert resolve_int_env("LYRA_TEST_INT", 5, 1, 100) == 5
+    monkeypatch.delenv("LYRA_TEST_INT")
+    assert resolve_int_env("LYRA_TEST_INT", 5, 1, 100) == 5
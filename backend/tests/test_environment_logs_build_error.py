@@ -24,9 +24,8 @@ class _ExecuteResult:
 
 
 class _FakeDb:
-    def __init__(self, env_row, settings):
+    def __init__(self, env_row):
         self._env = env_row
-        self._settings = settings
 
     async def execute(self, stmt, *_args, **_kwargs):
         sql = str(stmt)
@@ -38,13 +37,6 @@ class _FakeDb:
                 return _ExecuteResult([self._env])
             return _ExecuteResult([])
 
-        if "FROM settings" in sql:
-            wanted_key = str(params.get("key_1") or "")
-            value = self._settings.get(wanted_key)
-            if value is None:
-                return _ExecuteResult([])
-            return _ExecuteResult([SimpleNamespace(key=wanted_key, value=value)])
-
         return _ExecuteResult([])
 
 
@@ -55,9 +47,9 @@ def test_get_environment_logs_returns_build_failure_details_when_container_missi
         name="build-fail-env",
         status="error",
         worker_server_id=None,
+        build_error="Build failed: syntax error at line 7",
     )
-    build_error_key = f"build_error:{env_id}"
-    db = _FakeDb(env, {build_error_key: "Build failed: syntax error at line 7"})
+    db = _FakeDb(env)
 
     class _ContainerStore:
         def get(self, _name):
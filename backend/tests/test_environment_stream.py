@@ -0,0 +1,67 @@
+import asyncio
+
+from app.core import environment_stream
+
+
+def test_hub_sends_snapshot_then_only_deltas(monkeypatch):
+    monkeypatch.setattr(environment_stream, "STREAM_COALESCE_SECONDS", 0)
+    state = {
+        "environments": [
+            {"id": "env-1", "name": "a", "status": "running"},
+            {"id": "env-2", "name": "b", "status": "building"},
+        ],
+        "workers": [{"id": "w-1", "name": "worker-1", "health_status": "healthy"}],
+    }
+    calls = {"count": 0}
+
+    async def _loader():
+        calls["count"] += 1
+        return [dict(row) for row in state["environments"]], [dict(row) for row in state["workers"]]
+
+    async def _run():
+        hub = environment_stream.EnvironmentStreamHub(_loader)
+        first = await hub.subscribe()
+        second = await hub.subscribe()
+
+        event, payload = first.get_nowait()
+        assert event == "snapshot"
+        assert [row["id"] for row in payload["environments"]] == ["env-1", "env-2"]
+        assert payload["workers"][0]["health_status"] == "healthy"
+        assert second.get_nowait()[0] == "snapshot"
+
+        state["environments"] = [
+            {"id": "env-1", "name": "a", "status": "running"},
+            {"id": "env-2", "name": "b", "status": "running"},
+            {"id": "env-3", "name": "c", "status": "creating"},
+        ]
+        state["workers"] = [{"id": "w-1", "name": "worker-1", "health_status": "unreachable"}]
+        hub.notify()
+        events = [await asyncio.wait_for(first.get(), timeout=1) for _ in range(3)]
+        assert events == [
+            ("environment.updated", {"id": "env-2", "name": "b", "status": "running"}),
+            ("environment.created", {"id": "env-3", "name": "c", "status": "creating"}),
+            ("worker.health", {"id": "w-1", "name": "worker-1", "health_status": "unreachable"}),
+        ]
+
+        assert [await asyncio.wait_for(second.get(), timeout=1) for _ in range(3)] == events
+
+        state["environments"] = [{"id": "env-1", "name": "a", "status": "running"}]
+        hub.notify()
+        deleted = [await asyncio.wait_for(second.get(), timeout=1) for _ in range(2)]
+        assert sorted(item[1]["id"] for item in deleted) == ["env-2", "env-3"]
+        assert all(item[0] == "environment.deleted" for item in deleted)
+
+        hub.unsubscribe(first)
+        hub.unsubscribe(second)
+        await asyncio.sleep(0.05)
+        assert hub.subscriber_count == 0
+
+    asyncio.run(_run())
+    # Both subscribers share one loader call per refresh instead of polling separately.
+    assert calls["count"] == 3
+
+
+def test_format_sse_event():
+    assert environment_stream.format_sse_event("environment.deleted", {"id": "x"}) == (
+        'event: environment.deleted\ndata: {"id":"x"}\n\n'
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.sql.elements import TextClause
+
+from app.core import port_allocator
+from app.models import Environment, Template
+from app.routers import environments as env_router
+from app.schemas import EnvironmentBulkCreate
+
+
+class _ExecuteResult:
+    def __init__(self, items):
+        self._items = items
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self._items)
+
+
+class _FakeBegin:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _FakeDb:
+    def __init__(self, template, existing_names=()):
+        self.template = template
+        self.existing_names = list(existing_names)
+        self.added = []
+        self.flushes = 0
+        self.locks = 0
+        self.reservation_rounds = 0
+
+    def begin(self):
+        return _FakeBegin()
+
+    async def rollback(self):
+        return None
+
+    async def get(self, model, key):
+        assert model is Template
+        return self.template if key == self.template.id else None
+
+    async def execute(self, stmt, params=None):
+        if isinstance(stmt, TextClause):
+            self.locks += 1
+        if isinstance(stmt, Insert):
+            self.reservation_rounds += 1
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            return _ExecuteResult([value for key, value in params.items() if key.startswith("port_m")])
+        return _ExecuteResult(self.existing_names)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        self.flushes += 1
+
+
+def _template():
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        config={"dockerfile_content": "FROM ubuntu:22.04\n", "enable_code_server": False},
+    )
+
+
+def _patch_common(monkeypatch, enqueued):
+    allocator = port_allocator.PortAllocator()
+    monkeypatch.setattr(port_allocator, "port_allocator", allocator)
+
+    async def _fake_ensure_port_map(_db):
+        allocator.rebuild(port_allocator.LOCAL_PORT_NODE, {20000, 25001})
+
+    async def _fake_base_image_check(_dockerfile):
+        return None
+
+    monkeypatch.setattr(env_router, "_ensure_port_map", _fake_ensure_port_map)
+    monkeypatch.setattr(env_router, "_assert_host_base_image_supported", _fake_base_image_check)
+    monkeypatch.setattr(env_router, "encrypt_secret", lambda _v: "encrypted-secret")
+    monkeypatch.setattr(
+        env_router,
+        "create_environment_batch_task",
+        SimpleNamespace(delay=lambda ids: enqueued.append(ids)),
+    )
+
+
+def test_bulk_create_allocates_batch_in_one_pass_and_enqueues_one_job(monkeypatch):
+    template = _template()
+    db = _FakeDb(template)
+    enqueued = []
+    _patch_common(monkeypatch, enqueued)
+    payload = EnvironmentBulkCreate(
+        template_id=template.id, count=3, name_pattern="cs101-{index}", root_password="pw"
+    )
+
+    created = asyncio.run(env_router.bulk_create_environments(payload, db=db))
+
+    envs = [obj for obj in db.added if isinstance(obj, Environment)]
+    assert [env.name for env in envs] == ["cs101-1", "cs101-2", "cs101-3"]
+    # CPU-only batches never take the per-node GPU lock.
+    assert (db.locks, db.reservation_rounds, db.flushes) == (0, 1, 1)
+    ports = [port for env in envs for port in (env.ssh_port, env.jupyter_port, env.code_port)]
+    assert len(set(ports)) == 9 and not {20000, 25001} & set(ports)
+    assert all(env.enable_code_server is False for env in envs)
+    assert all(env.custom_ports == [] and env.jupyter_token for env in envs)
+    assert enqueued == [[str(env.id) for env in envs]]
+    assert [env["status"] for env in created] == ["building"] * 3
+
+
+def test_bulk_create_rejects_names_that_already_exist(monkeypatch):
+    template = _template()
+    db = _FakeDb(template, existing_names=["cs101-2"])
+    enqueued = []
+    _patch_common(monkeypatch, enqueued)
+    payload = EnvironmentBulkCreate(
+        template_id=template.id, count=3, name_pattern="cs101-{index}", root_password="pw"
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(env_router.bulk_create_environments(payload, db=db))
+
+    assert exc.value.status_code == 409
+    assert db.added == [] and enqueued == []
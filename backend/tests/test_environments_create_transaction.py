@@ -143,16 +143,12 @@ def test_create_environment_rolls_back_rows_when_transaction_step_fails(monkeypa
         enable_code_server=True,
     )
 
-    async def _fake_blocked_ports(_db):
-        return set()
-
-    async def _fake_allocate_ports(_db):
+    async def _fake_allocate_ports(_db, _owner_id):
         raise HTTPException(
             status_code=503,
             detail={"code": "port_allocation_failed", "message": "simulated"},
         )
 
-    monkeypatch.setattr(env_router, "_collect_blocked_host_ports", _fake_blocked_ports)
     monkeypatch.setattr(env_router, "_allocate_ports", _fake_allocate_ports)
     monkeypatch.setattr(env_router, "_image_has_apt_get", lambda _image: True)
     monkeypatch.setattr(env_router, "encrypt_secret", lambda _v: "encrypted-secret")
@@ -182,10 +178,7 @@ def test_create_environment_rolls_back_rows_when_enqueue_fails(monkeypatch):
         enable_code_server=True,
     )
 
-    async def _fake_blocked_ports(_db):
-        return set()
-
-    async def _fake_allocate_ports(_db):
+    async def _fake_allocate_ports(_db, _owner_id):
         return (20001, 25001, 30001)
 
     class _FakeDelay:
@@ -193,7 +186,6 @@ def test_create_environment_rolls_back_rows_when_enqueue_fails(monkeypatch):
         def delay(_value):
             raise RuntimeError("enqueue failed")
 
-    monkeypatch.setattr(env_router, "_collect_blocked_host_ports", _fake_blocked_ports)
     monkeypatch.setattr(env_router, "_allocate_ports", _fake_allocate_ports)
     monkeypatch.setattr(env_router, "_image_has_apt_get", lambda _image: True)
     monkeypatch.setattr(env_router, "encrypt_secret", lambda _v: "encrypted-secret")
@@ -250,7 +242,7 @@ def test_worker_create_environment_cleans_up_remote_when_local_persist_fails(mon
             return {"status": "deleted"}
         raise AssertionError(f"unexpected worker api call: {method} {path}")
 
-    async def _fake_allocate_remote_surrogate_ports(_db):
+    async def _fake_allocate_remote_surrogate_ports(_db, _owner_id):
         raise HTTPException(
             status_code=503,
             detail={"code": "port_allocation_failed", "message": "simulated"},
@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import docker
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.dialects import postgresql
+
+from app.routers import environments as env_router
+
+
+class _ExecuteResult:
+    def __init__(self, items):
+        self._items = items
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._items
+
+
+class _FakeDb:
+    def __init__(self, envs):
+        self._envs = envs
+        self.statements = []
+
+    async def execute(self, statement, *_args, **_kwargs):
+        self.statements.append(statement)
+        return _ExecuteResult(self._envs)
+
+
+class _EnvRow:
+    def __init__(self, name, created_at):
+        self.id = uuid.uuid4()
+        self.name = name
+        self.status = "stopped"
+        self.created_at = created_at
+
+
+def _compile(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_read_environments_returns_next_cursor_header(monkeypatch):
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    envs = [_EnvRow(f"env-{idx}", started + timedelta(minutes=idx)) for idx in range(3)]
+    db = _FakeDb(envs)
+
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: (_ for _ in ()).throw(docker.errors.DockerException("down")))
+
+    response = Response()
+    result = asyncio.run(env_router.read_environments(response=response, limit=2, db=db))
+
+    assert [row["name"] for row in result] == ["env-0", "env-1"]
+    cursor = response.headers[env_router.ENVIRONMENT_NEXT_CURSOR_HEADER]
+    assert env_router._decode_environment_cursor(cursor) == (envs[1].created_at, envs[1].id)
+    sql = _compile(db.statements[0])
+    assert "ORDER BY environments.created_at, environments.id" in sql
+    assert "LIMIT" in sql
+
+
+def test_environment_list_query_applies_cursor_and_filters():
+    env = _EnvRow("cursor-env", datetime(2026, 1, 1, tzinfo=timezone.utc))
+    cursor = env_router._encode_environment_cursor(env)
+
+    sql = _compile(
+        env_router._build_environment_list_query(
+            cursor=cursor,
+            statuses=["running,stopped"],
+            worker_server_id="host",
+            uses_gpu=True,
+            name_prefix="team_",
+        )
+    )
+
+    assert "(environments.created_at, environments.id) >" in sql
+    assert "environments.status IN" in sql
+    assert "environments.worker_server_id IS NULL" in sql
+    assert "cardinality(environments.gpu_indices)" in sql
+    assert "environments.name LIKE" in sql
+
+
+def test_environment_list_query_rejects_invalid_cursor_and_worker_id():
+    with pytest.raises(HTTPException) as cursor_error:
+        env_router._build_environment_list_query(cursor="not-a-cursor")
+    assert cursor_error.value.status_code == 400
+    assert cursor_error.value.detail["code"] == "invalid_cursor"
+
+    with pytest.raises(HTTPException) as worker_error:
+        env_router._build_environment_list_query(worker_server_id="nope")
+    assert worker_error.value.detail["code"] == "invalid_worker_server_id"
@@ -1,7 +1,10 @@
 import asyncio
 import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
 
 import docker
+from fastapi import Response
 
 from app.routers import environments as env_router
 
@@ -76,13 +79,9 @@ def test_read_environments_returns_db_rows_when_docker_daemon_unavailable(monkey
     env = _EnvRow(name="degraded-test", status="running")
     db = _FakeDb([env])
 
-    async def _fake_custom_ports_map(_db):
-        return {}
-
-    monkeypatch.setattr(env_router, "_get_custom_ports_map", _fake_custom_ports_map)
     monkeypatch.setattr(env_router.docker, "from_env", lambda: (_ for _ in ()).throw(docker.errors.DockerException("down")))
 
-    result = asyncio.run(env_router.read_environments(skip=0, limit=100, db=db))
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
 
     assert len(result) == 1
     assert result[0]["id"] == env.id
@@ -96,9 +95,6 @@ def test_read_environments_handles_per_environment_docker_failures(monkeypatch):
     env_fail = _EnvRow(name="fail-env", status="running")
     db = _FakeDb([env_ok, env_fail])
 
-    async def _fake_custom_ports_map(_db):
-        return {}
-
     ok_name = f"lyra-{env_ok.name}-{env_ok.id}"
     fail_name = f"lyra-{env_fail.name}-{env_fail.id}"
     client = _DockerClient(
@@ -108,13 +104,130 @@ def test_read_environments_handles_per_environment_docker_failures(monkeypatch):
         }
     )
 
-    monkeypatch.setattr(env_router, "_get_custom_ports_map", _fake_custom_ports_map)
     monkeypatch.setattr(env_router.docker, "from_env", lambda: client)
 
-    result = asyncio.run(env_router.read_environments(skip=0, limit=100, db=db))
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
 
     assert len(result) == 2
     by_name = {row["name"]: row for row in result}
     assert by_name["ok-env"]["status"] == "running"
     assert env_fail.status == "running"
     assert db.commit_called is False
+
+
+class _SparseContainer:
+    def __init__(self, env, state: str, status_text: str):
+        self.id = f"{env.id.hex}"
+        self.short_id = self.id[:12]
+        self.status = state
+        self.attrs = {
+            "Id": self.id,
+            "Names": [f"/lyra-{env.name}-{env.id}"],
+            "Labels": {"lyra.managed": "true", "lyra.environment_id": str(env.id)},
+            "State": state,
+            "Status": status_text,
+        }
+
+
+class _SnapshotContainerStore:
+    def __init__(self, containers):
+        self._containers = containers
+        self.list_calls = []
+
+    def list(self, **kwargs):
+        self.list_calls.append(kwargs)
+        return self._containers
+
+    def get(self, name):
+        raise AssertionError(f"unexpected per-container inspect: {name}")
+
+
+def test_read_environments_resolves_host_status_from_one_container_snapshot(monkeypatch):
+    env_running = _EnvRow(name="snap-running", status="building")
+    env_exited = _EnvRow(name="snap-exited", status="running")
+    env_missing = _EnvRow(name="snap-missing", status="running")
+    db = _FakeDb([env_running, env_exited, env_missing])
+
+    store = _SnapshotContainerStore(
+        [
+            _SparseContainer(env_running, "running", "Up 3 minutes"),
+            _SparseContainer(env_exited, "exited", "Exited (1) 2 minutes ago"),
+        ]
+    )
+    client = type("_SnapshotClient", (), {"containers": store})()
+
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: client)
+
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
+
+    by_name = {row["name"]: row for row in result}
+    assert by_name["snap-running"]["status"] == "running"
+    assert by_name["snap-running"]["container_id"] == env_running.id.hex[:12]
+    assert by_name["snap-exited"]["status"] == "error"
+    assert by_name["snap-missing"]["status"] == "stopped"
+    assert all(call.get("sparse") is True for call in store.list_calls)
+    assert len(store.list_calls) == 2
+
+
+def test_read_environments_defers_dockerfile_content(monkeypatch):
+    env = _EnvRow(name="summary-env", status="stopped")
+    statements = []
+
+    class _RecordingDb(_FakeDb):
+        async def execute(self, statement, *_args, **_kwargs):
+            statements.append(str(statement))
+            return await super().execute(statement)
+
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: (_ for _ in ()).throw(docker.errors.DockerException("down")))
+
+    asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=_RecordingDb([env])))
+
+    assert "FROM environments" in statements[0]
+    assert "dockerfile_content" not in statements[0]
+    assert "jupyter_token" not in statements[0]
+    assert "dockerfile_content" not in env_router.EnvironmentSummaryResponse.model_fields
+
+
+class _StreamDb(_FakeDb):
+    def __init__(self, envs, workers):
+        super().__init__(envs)
+        self._workers = workers
+
+    async def execute(self, stmt, *_args, **_kwargs):
+        if "FROM worker_servers" in str(stmt):
+            return _ExecuteResult(self._workers)
+        return _ExecuteResult(self._envs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+
+def test_stream_snapshot_loads_environments_and_workers(monkeypatch):
+    env = SimpleNamespace(
+        id=uuid.uuid4(),
+        name="stream-env",
+        status="running",
+        worker_server_id=None,
+        container_user="root",
+        enable_jupyter=True,
+        enable_code_server=True,
+        mount_config=[],
+        custom_ports=[],
+        gpu_indices=[],
+        ssh_port=20000,
+        jupyter_port=20001,
+        code_port=20002,
+        created_at=datetime.now(timezone.utc),
+    )
+    worker = SimpleNamespace(id=uuid.uuid4(), name="worker-1", last_health_status="healthy")
+    db = _StreamDb([env], [worker])
+    monkeypatch.setattr(env_router, "AsyncSessionLocal", lambda: db)
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: (_ for _ in ()).throw(docker.errors.DockerException("down")))
+
+    environments, workers = asyncio.run(env_router._load_environment_stream_state())
+
+    assert [row["name"] for row in environments] == ["stream-env"]
+    assert workers == [{"id": str(worker.id), "name": "worker-1", "health_status": "healthy"}]
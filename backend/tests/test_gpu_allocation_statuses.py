@@ -1,7 +1,15 @@
 import asyncio
+from types import SimpleNamespace
 from uuid import uuid4
 
-from app.routers.environments import _collect_used_gpu_indices
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.sql.elements import TextClause
+
+from app.core.gpu_allocator import GPU_OCCUPIED_STATUSES, claim_gpus, held_gpu_indices, lock_gpu_node
+from app.routers import environments as env_router
 
 
 class _ScalarResult:
@@ -11,6 +19,9 @@ class _ScalarResult:
     def all(self):
         return self._items
 
+    def first(self):
+        return self._items[0] if self._items else None
+
 
 class _ExecuteResult:
     def __init__(self, items):
@@ -20,54 +31,124 @@ class _ExecuteResult:
         return _ScalarResult(self._items)
 
 
-class _FakeEnv:
-    def __init__(self, status: str, gpu_indices):
-        self.status = status
-        self.gpu_indices = gpu_indices
+class _FakeDb:
+    def __init__(self, items=()):
+        self._items = list(items)
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        return _ExecuteResult(self._items)
 
 
-class _FakeDb:
-    def __init__(self, envs):
-        self._envs = envs
-        self.last_stmt = None
+def _compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_occupied_statuses_include_creating_and_exclude_stopped():
+    assert {"creating", "building", "running", "starting"} == GPU_OCCUPIED_STATUSES
+    assert not {"stopped", "error"} & GPU_OCCUPIED_STATUSES
+
+
+def test_held_gpu_indices_only_counts_active_holders_on_the_node():
+    db = _FakeDb([0, 2])
+
+    held = asyncio.run(held_gpu_indices(db, "local"))
+
+    compiled = _compiled(db.statements[0][0])
+    assert held == {0, 2}
+    assert "gpu_allocations.node = " in str(compiled)
+    assert compiled.params["node_1"] == "local"
+    assert "environments.status IN" in str(compiled)
+
+
+def test_claim_gpus_reports_indices_held_by_another_active_environment():
+    env_id = uuid4()
+    # Index 1 stays with its active holder, so the upsert only returns index 0.
+    db = _FakeDb([0])
+
+    conflicted = asyncio.run(claim_gpus(db, "local", [(env_id, 0), (env_id, 1)]))
+
+    sql = str(_compiled(db.statements[0][0]))
+    assert conflicted == [1]
+    assert "ON CONFLICT (node, gpu_index) DO UPDATE" in sql
+    assert "gpu_allocations.environment_id NOT IN" in sql
+
+
+def test_gpu_lock_is_keyed_by_node():
+    db = _FakeDb()
+
+    asyncio.run(lock_gpu_node(db, "worker-a"))
+
+    stmt, params = db.statements[0]
+    assert "hashtext(:node)" in str(stmt)
+    assert params["node"] == "worker-a"
+
+
+class _AllocationDb:
+    # Applies the claim upsert the way Postgres would: a row is taken over only when its
+    # current holder is not in an occupied status.
+    def __init__(self, env, holders, statuses):
+        self.env = env
+        self.holders = dict(holders)
+        self.statuses = dict(statuses)
+        self.locked_nodes = []
+        self.rollbacks = 0
 
-    async def execute(self, *args, **_kwargs):
-        if args:
-            self.last_stmt = args[0]
-        return _ExecuteResult(self._envs)
+    async def execute(self, stmt, params=None):
+        if isinstance(stmt, TextClause):
+            self.locked_nodes.append(params["node"])
+            return _ExecuteResult([])
+        if isinstance(stmt, Insert):
+            values = _compiled(stmt).params
+            claimed = []
+            for key, gpu_index in values.items():
+                if not key.startswith("gpu_index_m"):
+                    continue
+                owner = values[key.replace("gpu_index", "environment_id")]
+                holder = self.holders.get(gpu_index)
+                if holder is None or self.statuses.get(holder) not in GPU_OCCUPIED_STATUSES:
+                    self.holders[gpu_index] = owner
+                    claimed.append(gpu_index)
+            return _ExecuteResult(claimed)
+        return _ExecuteResult([self.env])
 
+    async def commit(self):
+        return None
 
-def test_collect_used_gpu_indices_includes_creating_and_excludes_stopped():
-    db = _FakeDb(
-        [
-            _FakeEnv("creating", [0]),
-            _FakeEnv("building", [1]),
-            _FakeEnv("running", [2]),
-            _FakeEnv("starting", [3]),
-            _FakeEnv("stopped", [4]),
-            _FakeEnv("error", [5]),
-        ]
-    )
+    async def rollback(self):
+        self.rollbacks += 1
 
-    used = asyncio.run(_collect_used_gpu_indices(db))
 
-    assert used == {0, 1, 2, 3}
+def _start(monkeypatch, holder_status):
+    env = SimpleNamespace(id=uuid4(), name="gpu-env", worker_server_id=None, gpu_indices=[0], status="stopped")
+    other_id = uuid4()
+    db = _AllocationDb(env, {0: other_id}, {env.id: "stopped", other_id: holder_status})
+    container = SimpleNamespace(status="exited", start=lambda: None)
+    client = SimpleNamespace(containers=SimpleNamespace(get=lambda _name: container))
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: client)
+    return env, db
 
 
-def test_collect_used_gpu_indices_scopes_to_host_when_worker_not_provided():
-    db = _FakeDb([_FakeEnv("running", [0])])
+@pytest.mark.parametrize("holder_status", ["stopped", "error"])
+def test_start_takes_over_gpu_left_by_inactive_environment(monkeypatch, holder_status):
+    env, db = _start(monkeypatch, holder_status)
 
-    asyncio.run(_collect_used_gpu_indices(db, None))
+    asyncio.run(env_router.start_environment(str(env.id), db=db))
 
-    assert db.last_stmt is not None
-    assert "worker_server_id IS NULL" in str(db.last_stmt)
+    assert db.holders[0] == env.id
+    assert db.locked_nodes == ["local"]
+    assert env.status == "running"
 
 
-def test_collect_used_gpu_indices_scopes_to_selected_worker():
-    db = _FakeDb([_FakeEnv("running", [0])])
-    worker_id = uuid4()
+@pytest.mark.parametrize("holder_status", ["creating", "building", "running", "starting"])
+def test_start_conflicts_when_gpu_is_held_by_active_environment(monkeypatch, holder_status):
+    env, db = _start(monkeypatch, holder_status)
 
-    asyncio.run(_collect_used_gpu_indices(db, worker_id))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(env_router.start_environment(str(env.id), db=db))
 
-    assert db.last_stmt is not None
-    assert "worker_server_id" in str(db.last_stmt)
+    assert exc.value.status_code == 409
+    assert exc.value.detail["code"] == "gpu_already_allocated"
+    assert db.holders[0] != env.id
+    assert env.status == "stopped"
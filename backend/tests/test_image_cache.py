@@ -0,0 +1,162 @@
+import docker
+
+from app.core import image_cache
+from app.routers import resources as resources_router
+
+
+class _FakeImages:
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+
+    def get(self, tag):
+        if tag not in self.existing:
+            raise docker.errors.ImageNotFound("missing")
+        return object()
+
+
+class _FakeApi:
+    def __init__(self, images, chunks=None):
+        self.images = images
+        self.chunks = chunks or [{"stream": "Step 1/1 : FROM ubuntu:22.04\n"}]
+        self.builds = []
+
+    def build(self, **kwargs):
+        self.builds.append(kwargs)
+        for chunk in self.chunks:
+            yield chunk
+            if chunk.get("error"):
+                return
+        self.images.existing.add(kwargs["tag"])
+
+
+class _FakeClient:
+    def __init__(self, existing=(), chunks=None):
+        self.images = _FakeImages(existing)
+        self.api = _FakeApi(self.images, chunks)
+
+
+def test_content_hash_ignores_formatting_noise_but_not_content():
+    base = image_cache.compute_image_content_hash("FROM ubuntu:22.04\nRUN echo hi\n")
+    assert image_cache.compute_image_content_hash("\r\nFROM ubuntu:22.04  \r\nRUN echo hi\r\n\r\n") == base
+    assert image_cache.compute_image_content_hash("FROM ubuntu:22.04\nRUN echo bye\n") != base
+    assert image_cache.compute_image_content_hash("FROM ubuntu:22.04\nRUN echo hi\n", {"PIP_INDEX": "x"}) != base
+
+
+def test_ensure_image_builds_once_per_content_hash():
+    client = _FakeClient()
+    dockerfile = "FROM ubuntu:22.04\nRUN apt-get update\n"
+
+    first_tag, first_built = image_cache.ensure_content_addressed_image(client, dockerfile)
+    second_tag, second_built = image_cache.ensure_content_addressed_image(client, dockerfile + "\n")
+
+    assert first_tag == second_tag
+    assert first_tag.startswith(f"{image_cache.LYRA_IMAGE_REPOSITORY}:")
+    assert (first_built, second_built) == (True, False)
+    assert len(client.api.builds) == 1
+    labels = client.api.builds[0]["labels"]
+    assert labels[image_cache.LYRA_IMAGE_CONTENT_HASH_LABEL] == first_tag.split(":", 1)[1]
+
+
+def test_unused_images_skip_tags_referenced_by_environments(monkeypatch):
+    class _Image:
+        def __init__(self, image_id, tags):
+            self.id = image_id
+            self.short_id = image_id[:10]
+            self.tags = tags
+            self.attrs = {"Size": 1}
+
+    class _Client:
+        class containers:
+            @staticmethod
+            def list(all=True):
+                return []
+
+        class images:
+            @staticmethod
+            def list(all=True):
+                return [
+                    _Image("sha256:shared", ["lyra-custom:abc"]),
+                    _Image("sha256:orphan", ["lyra-custom:def"]),
+                ]
+
+    candidates = resources_router._list_unused_images(
+        _Client(), mode="unused", referenced_image_refs={"lyra-custom:abc"}
+    )
+    assert [candidate["id"] for candidate in candidates] == ["sha256:orphan"]
+
+
+class _FakeTaskRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def test_apt_get_check_never_pulls_when_asked_and_caches_by_image_id(monkeypatch):
+    redis = _FakeTaskRedis()
+    monkeypatch.setattr(image_cache, "get_task_redis", lambda: redis)
+    monkeypatch.setattr(image_cache, "_image_facts", image_cache.OrderedDict())
+
+    class _Containers:
+        runs = 0
+
+        def run(self, *args, **kwargs):
+            _Containers.runs += 1
+            return b""
+
+    class _Images:
+        def __init__(self):
+            self.local = {}
+            self.pulls = []
+
+        def get(self, ref):
+            if ref not in self.local:
+                raise docker.errors.ImageNotFound("missing")
+            return self.local[ref]
+
+        def pull(self, ref):
+            self.pulls.append(ref)
+            self.local[ref] = type("Image", (), {"id": "sha256:base"})()
+
+    client = type("Client", (), {})()
+    client.images = _Images()
+    client.containers = _Containers()
+
+    assert image_cache.image_has_apt_get(client, "nvidia/cuda:12.4", pull=False) is None
+    assert client.images.pulls == []
+
+    assert image_cache.image_has_apt_get(client, "nvidia/cuda:12.4", pull=True) is True
+    assert image_cache.image_has_apt_get(client, "nvidia/cuda:12.4", pull=False) is True
+    assert client.images.pulls == ["nvidia/cuda:12.4"]
+    assert _Containers.runs == 1
+
+    # Another process (empty local cache) answers from the shared entry without a container run.
+    monkeypatch.setattr(image_cache, "_image_facts", image_cache.OrderedDict())
+    assert image_cache.image_has_apt_get(client, "nvidia/cuda:12.4", pull=False) is True
+    assert _Containers.runs == 1
+
+
+def test_apt_get_answer_by_tag_expires_from_the_local_cache(monkeypatch):
+    redis = _FakeTaskRedis()
+    now = [1000.0]
+    monkeypatch.setattr(image_cache, "get_task_redis", lambda: redis)
+    monkeypatch.setattr(image_cache, "_image_facts", image_cache.OrderedDict())
+    monkeypatch.setattr(image_cache.time, "monotonic", lambda: now[0])
+
+    image_cache._store_image_fact("apt_ref", "ubuntu:latest", True, ttl_seconds=image_cache.IMAGE_REF_CACHE_TTL_SECONDS)
+    # Redis expires its copy on its own; only the in-process entry is left.
+    redis.values.clear()
+    assert image_cache._load_image_fact("apt_ref", "ubuntu:latest", image_cache.IMAGE_REF_CACHE_TTL_SECONDS) is True
+
+    now[0] += image_cache.IMAGE_REF_CACHE_TTL_SECONDS + 1
+    assert image_cache._load_image_fact("apt_ref", "ubuntu:latest", image_cache.IMAGE_REF_CACHE_TTL_SECONDS) is None
+    assert "apt_ref:ubuntu:latest" not in image_cache._image_facts
+
+
+def test_extract_dockerfile_base_image_skips_comments_and_flags():
+    dockerfile = "# syntax=docker/dockerfile:1\n\nFROM --platform=linux/amd64 ubuntu:22.04 AS base\nRUN true\n"
+    assert image_cache.extract_dockerfile_base_image(dockerfile) == "ubuntu:22.04"
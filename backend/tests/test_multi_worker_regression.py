@@ -1,10 +1,11 @@
 import asyncio
+import time
 import uuid
 from types import SimpleNamespace
 
 import docker
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
 from app.core.worker_registry import WORKER_HEALTH_HEALTHY, WorkerHealthResult, WorkerRequestError
 from app.routers import environments as env_router
@@ -120,9 +121,6 @@ def test_read_environments_multi_worker_mixed_health(monkeypatch):
 
     db = _FakeDb(envs=[local_env, remote_ok, remote_down], workers=[worker_ok, worker_down])
 
-    async def _fake_custom_ports_map(_db):
-        return {}
-
     async def _fake_refresh_health(_db, worker, **_kwargs):
         if str(worker.id) == str(worker_ok.id):
             worker.last_health_status = WORKER_HEALTH_HEALTHY
@@ -133,19 +131,19 @@ def test_read_environments_multi_worker_mixed_health(monkeypatch):
         return WorkerHealthResult(status="unreachable", message="connect failed")
 
     async def _fake_call_worker_api(worker, *, method, path, payload=None, timeout=None):
-        assert method == "GET"
-        assert payload is None
+        assert method == "POST"
+        assert path == "/api/worker/environments/status"
         assert timeout is None
         if str(worker.id) != str(worker_ok.id):
             raise WorkerRequestError("worker_unreachable", "connect failed", status_code=503)
-        return {"status": "running", "container_id": "abcdef1234567890"}
+        assert payload == {"environment_ids": [str(remote_ok.id)]}
+        return {"environments": [{"id": str(remote_ok.id), "status": "running", "container_id": "abcdef1234567890"}]}
 
-    monkeypatch.setattr(env_router, "_get_custom_ports_map", _fake_custom_ports_map)
     monkeypatch.setattr(env_router, "refresh_worker_health", _fake_refresh_health)
     monkeypatch.setattr(env_router, "call_worker_api", _fake_call_worker_api)
     monkeypatch.setattr(env_router.docker, "from_env", lambda: (_ for _ in ()).throw(docker.errors.DockerException("down")))
 
-    result = asyncio.run(env_router.read_environments(skip=0, limit=100, db=db))
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
 
     assert len(result) == 3
     by_name = {row["name"]: row for row in result}
@@ -165,6 +163,97 @@ def test_read_environments_multi_worker_mixed_health(monkeypatch):
     assert db.commit_called is False
 
 
+def test_read_environments_batches_worker_status_calls(monkeypatch):
+    worker = _worker("worker-batch")
+    remote_envs = [_env(f"remote-{idx}", "building", worker_server_id=worker.id) for idx in range(3)]
+    db = _FakeDb(envs=remote_envs, workers=[worker])
+    calls = []
+
+    async def _fake_refresh_health(_db, _worker, **_kwargs):
+        return WorkerHealthResult(status=WORKER_HEALTH_HEALTHY, message="ok")
+
+    async def _fake_call_worker_api(_worker, *, method, path, payload=None, timeout=None):
+        calls.append((method, path))
+        return {
+            "environments": [
+                {"id": str(remote_envs[0].id), "status": "running", "container_id": "0123456789abcdef"},
+                {"id": str(remote_envs[1].id), "status": "stopped", "container_id": None},
+            ]
+        }
+
+    monkeypatch.setattr(env_router, "refresh_worker_health", _fake_refresh_health)
+    monkeypatch.setattr(env_router, "call_worker_api", _fake_call_worker_api)
+
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
+
+    assert calls == [("POST", "/api/worker/environments/status")]
+    by_name = {row["name"]: row for row in result}
+    assert by_name["remote-0"]["status"] == "running"
+    assert by_name["remote-0"]["container_id"] == "0123456789ab"
+    assert by_name["remote-1"]["status"] == "stopped"
+    assert by_name["remote-2"]["status"] == "unknown"
+    assert by_name["remote-2"]["worker_error_code"] == "environment_not_found"
+
+
+def test_read_environments_falls_back_to_per_environment_calls_for_legacy_worker(monkeypatch):
+    worker = _worker("worker-legacy")
+    remote_env = _env("remote-legacy", "building", worker_server_id=worker.id)
+    db = _FakeDb(envs=[remote_env], workers=[worker])
+    calls = []
+
+    async def _fake_refresh_health(_db, _worker, **_kwargs):
+        return WorkerHealthResult(status=WORKER_HEALTH_HEALTHY, message="ok")
+
+    async def _fake_call_worker_api(_worker, *, method, path, payload=None, timeout=None):
+        calls.append((method, path))
+        if method == "POST":
+            raise WorkerRequestError("worker_request_failed", "Method Not Allowed", status_code=405)
+        return {"status": "running", "container_id": "fedcba9876543210"}
+
+    monkeypatch.setattr(env_router, "refresh_worker_health", _fake_refresh_health)
+    monkeypatch.setattr(env_router, "call_worker_api", _fake_call_worker_api)
+
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
+
+    assert calls == [
+        ("POST", "/api/worker/environments/status"),
+        ("GET", f"/api/worker/environments/{remote_env.id}"),
+    ]
+    assert result[0]["status"] == "running"
+    assert result[0]["container_id"] == "fedcba987654"
+
+
+def test_read_environments_slow_worker_only_degrades_its_environments(monkeypatch):
+    worker_fast = _worker("worker-fast")
+    worker_slow = _worker("worker-slow")
+    fast_env = _env("fast-env", "building", worker_server_id=worker_fast.id)
+    slow_env = _env("slow-env", "running", worker_server_id=worker_slow.id)
+    db = _FakeDb(envs=[fast_env, slow_env], workers=[worker_fast, worker_slow])
+
+    async def _fake_refresh_health(_db, _worker, **_kwargs):
+        return WorkerHealthResult(status=WORKER_HEALTH_HEALTHY, message="ok")
+
+    async def _fake_call_worker_api(worker, *, method, path, payload=None, timeout=None):
+        if str(worker.id) == str(worker_slow.id):
+            await asyncio.sleep(5)
+        return {"environments": [{"id": str(fast_env.id), "status": "running", "container_id": None}]}
+
+    monkeypatch.setattr(env_router, "refresh_worker_health", _fake_refresh_health)
+    monkeypatch.setattr(env_router, "call_worker_api", _fake_call_worker_api)
+    monkeypatch.setattr(env_router, "resolve_worker_fanout_deadline", lambda: 0.2)
+
+    started = time.monotonic()
+    result = asyncio.run(env_router.read_environments(skip=0, limit=100, response=Response(), db=db))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 2
+    by_name = {row["name"]: row for row in result}
+    assert by_name["fast-env"]["status"] == "running"
+    assert by_name["fast-env"]["worker_error_code"] is None
+    assert by_name["slow-env"]["status"] == "unknown"
+    assert by_name["slow-env"]["worker_error_code"] == "worker_timeout"
+
+
 def test_read_environment_worker_error_payload(monkeypatch):
     worker = _worker("worker-fail")
     env = _env("remote-env", "running", worker_server_id=worker.id)
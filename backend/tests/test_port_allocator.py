@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core import port_allocator
+from app.routers import environments as env_router
+
+
+class _FakeSyncDb:
+    # Ports in held_elsewhere were reserved by another process; the INSERT skips them.
+    def __init__(self, held_elsewhere=()):
+        self.held_elsewhere = set(held_elsewhere)
+        self.rounds = []
+
+    def execute(self, stmt):
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        ports = [value for key, value in params.items() if key.startswith("port_m")]
+        self.rounds.append(ports)
+        inserted = [port for port in ports if port not in self.held_elsewhere]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: inserted))
+
+
+@pytest.fixture
+def allocator(monkeypatch):
+    allocator = port_allocator.PortAllocator()
+    monkeypatch.setattr(port_allocator, "port_allocator", allocator)
+    return allocator
+
+
+def test_port_map_skips_used_ports_and_wraps_to_range_start():
+    start, end = port_allocator.PORT_RANGES["ssh"]
+    port_map = port_allocator.NodePortMap(used_ports=[start, start + 1, end])
+    port_map._cursors["ssh"] = end - 1
+
+    assert port_map.take("ssh") == end - 1
+    assert port_map.take("ssh") == start + 2
+    port_map.release(start)
+    assert port_map.is_free(start)
+
+
+def test_suggest_skips_excluded_ports_without_marking_them_used():
+    start, _end = port_allocator.PORT_RANGES["custom"]
+    port_map = port_allocator.NodePortMap(used_ports=[start])
+
+    first = port_map.suggest("custom", 2, exclude={start + 1})
+    second = port_map.suggest("custom", 1, exclude=set())
+
+    assert first == [start + 2, start + 3]
+    assert second == [start + 4]
+    assert port_map.is_free(start + 2)
+
+
+def test_reserve_retries_only_ports_lost_to_another_process(allocator):
+    ssh_start, _ = port_allocator.PORT_RANGES["ssh"]
+    jupyter_start, _ = port_allocator.PORT_RANGES["jupyter"]
+    allocator.rebuild(port_allocator.LOCAL_PORT_NODE, [])
+    db = _FakeSyncDb(held_elsewhere={ssh_start})
+
+    ports = port_allocator.reserve_ports_sync(db, [("env-1", "ssh"), ("env-1", "jupyter")])
+
+    assert ports == [ssh_start + 1, jupyter_start]
+    assert db.rounds == [[ssh_start, jupyter_start], [ssh_start + 1]]
+    assert not allocator.is_free(port_allocator.LOCAL_PORT_NODE, ssh_start)
+
+
+def test_reserve_raises_when_range_is_exhausted(allocator):
+    start, end = port_allocator.PORT_RANGES["surrogate"]
+    allocator.rebuild(port_allocator.LOCAL_PORT_NODE, range(start, end + 1))
+
+    with pytest.raises(port_allocator.PortsExhausted):
+        port_allocator.reserve_ports_sync(_FakeSyncDb(), [("env-1", "surrogate")])
+
+
+def test_container_ports_skip_blocked_ports_and_stay_in_range(monkeypatch):
+    start, end = env_router.CUSTOM_CONTAINER_PORT_RANGE
+    monkeypatch.setattr(env_router.random, "randrange", lambda _span: end - start - 1)
+
+    ports = env_router._pick_container_ports(3, {end})
+
+    assert ports == [end - 1, start, start + 1]
@@ -0,0 +1,102 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import provisioning
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+
+    def hincrby(self, key, field, amount):
+        bucket = self._redis.hashes.setdefault(key, {})
+        bucket[field] = int(bucket.get(field, 0)) + amount
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self._redis.hashes.setdefault(key, {})
+        bucket[field] = float(bucket.get(field, 0)) + amount
+
+    def sadd(self, key, member):
+        self._redis.sets.setdefault(key, set()).add(member)
+
+    def execute(self):
+        return []
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.sets = {}
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakeTask:
+    def __init__(self):
+        self.request = SimpleNamespace(id="task-1")
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, json.loads(json.dumps(meta))))
+
+
+def test_tracker_reports_steps_to_task_state_and_redis():
+    redis = _FakeRedis()
+    task = _FakeTask()
+    tracker = provisioning.ProvisioningTracker("env-1", task=task, redis_client=redis, node="node-a")
+
+    with tracker.step("build"):
+        pass
+    with tracker.step("probe") as probe_step:
+        tracker.fail_step(probe_step, "missing_prerequisite:sshd")
+    tracker.finish("failed")
+
+    stored = json.loads(redis.values[provisioning.provisioning_state_key("env-1")])
+    assert stored["task_id"] == "task-1"
+    assert stored["status"] == "failed"
+    assert [(step["name"], step["status"]) for step in stored["steps"]] == [("build", "succeeded"), ("probe", "failed")]
+    assert all(step["finished_at"] and step["duration_ms"] is not None for step in stored["steps"])
+    # The running state is visible while a step is in progress.
+    assert ("PROGRESS", "build") in [(state, meta["current_step"]) for state, meta in task.states]
+    assert redis.hashes[provisioning.provisioning_histogram_key("node-a", "build")]["count"] == 1
+
+
+def test_tracker_marks_step_failed_on_exception():
+    tracker = provisioning.ProvisioningTracker("env-1", redis_client=_FakeRedis(), node="node-a")
+
+    with pytest.raises(RuntimeError):
+        with tracker.step("container_run"):
+            raise RuntimeError("boom")
+
+    assert tracker.state["steps"][0]["status"] == "failed"
+
+
+def test_tracker_rejects_unknown_step_names():
+    redis = _FakeRedis()
+    tracker = provisioning.ProvisioningTracker("env-1", redis_client=redis, node="node-a")
+
+    with pytest.raises(ValueError):
+        with tracker.step("bulid"):
+            pass
+
+    assert tracker.state["steps"] == []
+    assert redis.hashes == {}
+
+
+def test_histogram_buckets_are_cumulative():
+    raw = {"le_1": "2", "le_30": "1", "le_inf": "1", "count": "4", "sum_seconds": "4000.0"}
+
+    histogram = provisioning.parse_provisioning_histogram(raw)
+
+    counts = {bucket["le"]: bucket["count"] for bucket in histogram["buckets"]}
+    assert (counts[0.5], counts[1], counts[30], counts["+Inf"]) == (0, 2, 3, 4)
+    assert histogram["mean_seconds"] == 1000.0
+    assert provisioning.histogram_bucket_label(0.7) == "le_1"
+    assert provisioning.histogram_bucket_label(4000) == "le_inf"
@@ -2,6 +2,9 @@ import asyncio
 import uuid
 from types import SimpleNamespace
 
+import pytest
+
+from app.core import gpu_allocator
 from app.routers import resources as resources_router
 
 
@@ -55,9 +58,9 @@ def test_get_gpu_resources_scopes_to_host_only(monkeypatch):
         ]
     )
 
-    monkeypatch.setattr(resources_router.pynvml, "nvmlInit", lambda: None)
-    monkeypatch.setattr(resources_router.pynvml, "nvmlShutdown", lambda: None)
-    monkeypatch.setattr(resources_router.pynvml, "nvmlDeviceGetCount", lambda: 4)
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlInit", lambda: None)
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlShutdown", lambda: None)
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlDeviceGetCount", lambda: 4)
 
     result = asyncio.run(resources_router.get_gpu_resources(db=db))
 
@@ -65,3 +68,19 @@ def test_get_gpu_resources_scopes_to_host_only(monkeypatch):
     assert result["used"] == 2
     assert result["used_indices"] == [0, 2]
     assert result["available_indices"] == [1, 3]
+
+
+def test_count_host_gpus_shuts_nvml_down_when_the_query_fails(monkeypatch):
+    calls = []
+
+    def _fail():
+        raise RuntimeError("driver gone")
+
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlInit", lambda: calls.append("init"))
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlShutdown", lambda: calls.append("shutdown"))
+    monkeypatch.setattr(gpu_allocator.pynvml, "nvmlDeviceGetCount", _fail)
+
+    with pytest.raises(RuntimeError):
+        gpu_allocator.count_host_gpus()
+
+    assert calls == ["init", "shutdown"]
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import shared_cache as shared_cache_module
+from app.routers import environments as env_router
+
+
+def test_memory_backend_take_add_and_ttl(monkeypatch):
+    monkeypatch.delenv("LYRA_SHARED_CACHE_REDIS_URL", raising=False)
+    cache = shared_cache_module.SharedCache()
+
+    async def _run():
+        await cache.set_many({"a": {"v": 1}, "b": {"v": 2}}, 60)
+        assert await cache.get_many(["a", "b", "c"]) == [{"v": 1}, {"v": 2}, None]
+
+        assert await cache.take("a") == {"v": 1}
+        assert await cache.take("a") is None
+
+        assert await cache.add("lock", 1, 60) is True
+        assert await cache.add("lock", 1, 60) is False
+
+        await cache.set("short", "x", 0.01)
+        await asyncio.sleep(0.02)
+        assert await cache.get("short") is None
+
+        await cache.set("disabled", "x", 0)
+        assert await cache.get("disabled") is None
+
+    asyncio.run(_run())
+    assert cache.is_shared is False
+
+
+def test_shared_cache_falls_back_to_memory_when_redis_fails(monkeypatch):
+    monkeypatch.setenv("LYRA_SHARED_CACHE_REDIS_URL", "redis://cache.invalid:6379/0")
+    cache = shared_cache_module.SharedCache()
+
+    class _BrokenRedis:
+        async def set_many(self, values, ttl_seconds):
+            raise OSError("connection refused")
+
+        async def get_many(self, keys):
+            raise OSError("connection refused")
+
+    monkeypatch.setattr(cache, "_backend", lambda: _BrokenRedis())
+
+    async def _run():
+        await cache.set("key", {"ok": True}, 60)
+        return await cache.get("key")
+
+    assert cache.is_shared is True
+    assert asyncio.run(_run()) == {"ok": True}
+
+
+def test_launch_ticket_is_single_use(monkeypatch):
+    monkeypatch.delenv("LYRA_SHARED_CACHE_REDIS_URL", raising=False)
+    monkeypatch.setattr(env_router, "shared_cache", shared_cache_module.SharedCache())
+
+    async def _run():
+        ticket = await env_router._issue_launch_ticket("jupyter", "env-1", 60, "http://worker/launch")
+        with pytest.raises(HTTPException) as mismatch:
+            await env_router._load_launch_ticket("jupyter", ticket, "env-2")
+        assert mismatch.value.status_code == 400
+        with pytest.raises(HTTPException) as wrong_kind:
+            await env_router._load_launch_ticket("code", ticket, "env-1")
+        assert wrong_kind.value.status_code == 404
+
+        meta = await env_router._load_launch_ticket("jupyter", ticket, "env-1")
+        assert meta["remote_launch_url"] == "http://worker/launch"
+        await env_router._consume_launch_ticket("jupyter", ticket)
+
+        with pytest.raises(HTTPException) as reused:
+            await env_router._load_launch_ticket("jupyter", ticket, "env-1")
+        assert reused.value.status_code == 410
+        with pytest.raises(HTTPException) as double_consume:
+            await env_router._consume_launch_ticket("jupyter", ticket)
+        assert double_consume.value.status_code == 410
+
+    asyncio.run(_run())
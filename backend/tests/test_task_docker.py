@@ -0,0 +1,38 @@
+from app.core import task_docker
+
+
+class _FakeDockerClient:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def ping(self):
+        if not self.healthy:
+            raise ConnectionError("daemon gone")
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def test_task_docker_client_is_reused_and_replaced_after_failed_ping(monkeypatch):
+    created = []
+
+    def _from_env():
+        created.append(_FakeDockerClient())
+        return created[-1]
+
+    monkeypatch.setattr(task_docker.docker, "from_env", _from_env)
+    monkeypatch.setattr(task_docker, "_client", None)
+    monkeypatch.setattr(task_docker, "TASK_DOCKER_PING_INTERVAL_SECONDS", 0.0)
+
+    first = task_docker.get_task_docker()
+    assert task_docker.get_task_docker() is first
+
+    first.healthy = False
+    second = task_docker.get_task_docker()
+    assert second is not first and first.closed is True
+
+    task_docker.close_task_docker()
+    assert second.closed is True
+    assert len(created) == 2
@@ -1,3 +1,5 @@
+from types import SimpleNamespace
+
 from app import tasks
 
 
@@ -23,7 +25,62 @@ def test_run_image_probe_passes_probe_as_single_command_arg():
     ok, detail = tasks._run_image_probe(client, "img:test", "if true; then :; fi")
 
     assert ok is True
-    assert detail == ""
+    assert detail == "ok"
     assert client.containers.last_args[0] == "img:test"
     assert client.containers.last_args[1] == ["if true; then :; fi"]
     assert client.containers.last_kwargs["entrypoint"] == ["sh", "-lc"]
+
+
+class _ProbeContainers:
+    def __init__(self, output):
+        self.output = output
+        self.runs = 0
+
+    def run(self, *args, **kwargs):
+        self.runs += 1
+        return self.output
+
+
+class _ProbeImages:
+    def get(self, _name):
+        return SimpleNamespace(id="sha256:image-a")
+
+
+def test_validate_runtime_prerequisites_probes_once_and_caches_by_image_id(monkeypatch):
+    cache = {}
+    monkeypatch.setattr(tasks, "load_cached_image_probe", lambda image_id: cache.get(image_id))
+    monkeypatch.setattr(tasks, "store_image_probe", lambda image_id, result: cache.__setitem__(image_id, result))
+    client = SimpleNamespace(
+        containers=_ProbeContainers(
+            b"welcome banner\n"
+            b"lyra-probe:sshd=1\nlyra-probe:chpasswd=1\nlyra-probe:code_server=1\n"
+            b"lyra-probe:jupyter_mode=python_module\n"
+        ),
+        images=_ProbeImages(),
+    )
+
+    first = tasks._validate_runtime_prerequisites(client, "img", enable_jupyter=True, enable_code_server=True)
+    second = tasks._validate_runtime_prerequisites(client, "img", enable_jupyter=True, enable_code_server=False)
+
+    assert (first, second) == ("python_module", "python_module")
+    assert client.containers.runs == 1
+    assert cache["sha256:image-a"]["jupyter_mode"] == "python_module"
+
+
+def test_validate_runtime_prerequisites_reports_first_missing_capability(monkeypatch):
+    monkeypatch.setattr(tasks, "load_cached_image_probe", lambda image_id: None)
+    monkeypatch.setattr(tasks, "store_image_probe", lambda image_id, result: None)
+    client = SimpleNamespace(
+        containers=_ProbeContainers(
+            b"lyra-probe:sshd=1\nlyra-probe:chpasswd=1\nlyra-probe:code_server=0\nlyra-probe:jupyter_mode=none\n"
+        ),
+        images=_ProbeImages(),
+    )
+
+    code_server_missing = tasks._validate_runtime_prerequisites(
+        client, "img", enable_jupyter=True, enable_code_server=True
+    )
+    jupyter_missing = tasks._validate_runtime_prerequisites(client, "img", enable_jupyter=True, enable_code_server=False)
+
+    assert code_server_missing.startswith("missing_prerequisite:code_server")
+    assert jupyter_missing.startswith("missing_prerequisite:jupyter")
@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import docker
+import pytest
+
+from app import tasks
+from app.core import warm_pool
+from app.core.container_state import LYRA_ENVIRONMENT_ID_LABEL
+from app.routers import environments as env_router
+from app.schemas import EnvironmentCreate
+
+
+def test_parse_warm_pool_config_defaults_to_template_dockerfile():
+    config = {"dockerfile_content": "FROM ubuntu:22.04\n", "warm_pool": {"size": 3, "enable_code_server": False}}
+
+    pool = warm_pool.parse_warm_pool_config(config)
+
+    assert pool.size == 3
+    assert pool.dockerfile_content == "FROM ubuntu:22.04\n"
+    assert (pool.enable_jupyter, pool.enable_code_server) == (True, False)
+    assert warm_pool.parse_warm_pool_config({"dockerfile_content": "FROM ubuntu:22.04\n"}) is None
+
+
+def test_parse_warm_pool_config_rejects_oversized_pool(monkeypatch):
+    monkeypatch.setenv("LYRA_WARM_POOL_MAX_SIZE", "2")
+
+    with pytest.raises(ValueError):
+        warm_pool.parse_warm_pool_config({"dockerfile_content": "FROM ubuntu:22.04\n", "warm_pool": {"size": 3}})
+    with pytest.raises(ValueError):
+        warm_pool.parse_warm_pool_config({"warm_pool": {"size": 1}})
+
+
+def test_only_plain_host_requests_can_claim_a_warm_container():
+    base = {"name": "env-a", "dockerfile_content": "FROM ubuntu:22.04\n", "root_password": "pw"}
+
+    assert env_router._is_warm_pool_eligible(EnvironmentCreate(**base)) is True
+    assert env_router._is_warm_pool_eligible(EnvironmentCreate(**base, gpu_count=1)) is False
+    assert env_router._is_warm_pool_eligible(EnvironmentCreate(**base, container_user="ubuntu")) is False
+    assert (
+        env_router._is_warm_pool_eligible(
+            EnvironmentCreate(**base, mount_config=[{"host_path": "/data", "container_path": "/data"}])
+        )
+        is False
+    )
+
+
+def test_bind_warm_container_sets_password_before_rename(monkeypatch):
+    calls = []
+    container = SimpleNamespace(
+        id="c1",
+        status="running",
+        rename=lambda name: calls.append(("rename", name)),
+    )
+    client = SimpleNamespace(api=object(), containers=SimpleNamespace(get=lambda name: container))
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: client)
+
+    def _fake_chpasswd(_api, container_id, password):
+        calls.append(("chpasswd", container_id, password))
+        return "exec-1"
+
+    async def _fake_wait(_api, exec_id, timeout_seconds=2.0):
+        return 0
+
+    monkeypatch.setattr(env_router, "_start_chpasswd_exec", _fake_chpasswd)
+    monkeypatch.setattr(env_router, "_wait_exec_exit_code", _fake_wait)
+
+    bound = asyncio.run(env_router._bind_warm_container("lyra-warm-1", "lyra-env-a-1", "secret"))
+
+    assert bound is True
+    assert calls == [("chpasswd", "c1", "secret"), ("rename", "lyra-env-a-1")]
+
+
+def test_bind_warm_container_refuses_stopped_container(monkeypatch):
+    container = SimpleNamespace(id="c1", status="exited")
+    client = SimpleNamespace(api=object(), containers=SimpleNamespace(get=lambda name: container))
+    monkeypatch.setattr(env_router.docker, "from_env", lambda: client)
+
+    assert asyncio.run(env_router._bind_warm_container("lyra-warm-1", "lyra-env-a-1", "secret")) is False
+
+
+def test_remove_warm_containers_skips_missing_containers():
+    removed = []
+
+    def _get(name):
+        if name == "lyra-warm-gone":
+            raise docker.errors.NotFound("missing")
+        return SimpleNamespace(remove=lambda force: removed.append(name))
+
+    client = SimpleNamespace(containers=SimpleNamespace(get=_get))
+
+    warm_pool.remove_warm_containers(["lyra-warm-a", "lyra-warm-gone", "lyra-warm-b"], client)
+
+    assert removed == ["lyra-warm-a", "lyra-warm-b"]
+
+
+def test_warm_container_is_labelled_with_the_environment_id_it_takes_on_claim(monkeypatch):
+    runs = []
+    db = SimpleNamespace(add=lambda entry: None, commit=lambda: None)
+    client = SimpleNamespace(containers=SimpleNamespace(run=lambda **kwargs: runs.append(kwargs)))
+    pool = warm_pool.WarmPoolConfig(
+        size=1, dockerfile_content="FROM ubuntu:22.04\n", enable_jupyter=True, enable_code_server=True
+    )
+    reserved = []
+    monkeypatch.setattr(
+        tasks, "_reserve_ports", lambda _db, owner_id, kinds: reserved.append(owner_id) or [22001, 22002, 22003]
+    )
+
+    tasks._start_warm_container(db, client, "template-1", pool, "lyra-custom:abc", "jupyter")
+
+    labels = runs[0]["labels"]
+    assert labels[LYRA_ENVIRONMENT_ID_LABEL] == str(reserved[0])
+    assert runs[0]["name"] == f"{warm_pool.WARM_CONTAINER_NAME_PREFIX}{reserved[0]}"
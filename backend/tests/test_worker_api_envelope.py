@@ -108,3 +108,35 @@ def test_worker_root_password_reset_normalizes_error(monkeypatch):
     body = response.json()
     assert body["detail"]["code"] == "env_not_running"
     assert body["detail"]["message"] == "Environment must be running"
+
+
+def test_worker_environment_statuses_returns_standard_envelope(monkeypatch):
+    env_id = "11111111-1111-1111-1111-111111111111"
+
+    async def _fake_statuses(*, environment_ids, db):
+        assert environment_ids == [env_id]
+        return {"environments": [{"id": env_id, "status": "running", "container_id": "abc123def456"}]}
+
+    monkeypatch.setattr(env_router, "read_environment_statuses", _fake_statuses)
+
+    client = _build_client()
+    response = client.post("/api/worker/environments/status", json={"environment_ids": [env_id]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["data"]["environments"][0]["status"] == "running"
+
+
+def test_worker_list_environments_passes_response_through(monkeypatch):
+    async def _fake_read(*, skip, limit, response, db):
+        response.headers["X-Next-Cursor"] = "next"
+        return [{"id": "env-1", "status": "running"}]
+
+    monkeypatch.setattr(env_router, "read_environments", _fake_read)
+
+    client = _build_client()
+    response = client.get("/api/worker/environments?limit=1")
+
+    assert response.status_code == 200
+    assert response.json()["data"]["environments"][0]["id"] == "env-1"
@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+
+from app.core import worker_health_prober
+from app.core import worker_registry
+from app.models import WorkerServer
+
+
+class _Result:
+    def __init__(self, items):
+        self._items = items
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._items
+
+
+class _FakeSession:
+    def __init__(self, workers):
+        self._workers = workers
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        return False
+
+    async def execute(self, *_args, **_kwargs):
+        return _Result(self._workers)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_prober_checks_workers_concurrently_and_backs_off_unhealthy(monkeypatch):
+    healthy = WorkerServer(id=uuid.uuid4(), name="healthy", base_url="http://a", api_token_encrypted="enc")
+    down = WorkerServer(id=uuid.uuid4(), name="down", base_url="http://b", api_token_encrypted="enc")
+    session = _FakeSession([healthy, down])
+    in_flight = {"now": 0, "max": 0}
+    probed = []
+
+    async def _fake_refresh(_db, worker, *, use_cache=True, persist=True):
+        assert use_cache is False
+        probed.append(worker.name)
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        status = worker_registry.WORKER_HEALTH_HEALTHY if worker is healthy else worker_registry.WORKER_HEALTH_UNREACHABLE
+        return worker_registry.WorkerHealthResult(status=status, message=status)
+
+    monkeypatch.setattr(worker_health_prober, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(worker_health_prober, "refresh_worker_health", _fake_refresh)
+    monkeypatch.setattr(worker_health_prober, "_jittered", lambda seconds: seconds)
+    monkeypatch.setenv("LYRA_WORKER_HEALTH_PROBE_INTERVAL_SECONDS", "10")
+
+    prober = worker_health_prober.WorkerHealthProber()
+    asyncio.run(prober.probe_due_workers())
+
+    assert sorted(probed) == ["down", "healthy"]
+    assert in_flight["max"] == 2
+    assert session.commits == 1
+    assert prober._delays[str(healthy.id)] == 10
+    assert prober._delays[str(down.id)] == 10
+
+    # Nothing is due yet, so a second cycle does not probe anything.
+    asyncio.run(prober.probe_due_workers())
+    assert len(probed) == 2
+
+    prober._next_probe_at = {key: 0.0 for key in prober._next_probe_at}
+    asyncio.run(prober.probe_due_workers())
+    assert prober._delays[str(healthy.id)] == 10
+    assert prober._delays[str(down.id)] == 20
+
+
+def test_refresh_worker_health_serves_cache_while_prober_active(monkeypatch):
+    worker = WorkerServer(id=uuid.uuid4(), name="cached", base_url="http://c", api_token_encrypted="enc")
+    checked_at = worker_registry._now_utc()
+    worker_registry._worker_health_cache[str(worker.id)] = worker_registry.WorkerHealthCacheEntry(
+        checked_at=checked_at,
+        result=worker_registry.WorkerHealthResult(status=worker_registry.WORKER_HEALTH_HEALTHY, message="ok"),
+        cached_at_monotonic=0.0,
+    )
+
+    async def _must_not_probe(*_args, **_kwargs):
+        raise AssertionError("request path must not probe while the prober is active")
+
+    monkeypatch.setattr(worker_registry, "check_worker_health", _must_not_probe)
+    monkeypatch.setattr(worker_registry, "_health_prober_active", True)
+    try:
+        result = asyncio.run(worker_registry.refresh_worker_health(None, worker, persist=False))
+    finally:
+        worker_registry.invalidate_worker_health_cache(str(worker.id))
+
+    assert result.status == worker_registry.WORKER_HEALTH_HEALTHY
+    assert worker.last_health_checked_at == checked_at
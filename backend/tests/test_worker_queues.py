@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import docker
+import pytest
+
+from app import tasks
+from app.worker import BUILD_QUEUE, LIFECYCLE_QUEUE, MAINTENANCE_QUEUE, celery_app
+
+
+def _route(task):
+    return celery_app.amqp.router.route({}, task.name)
+
+
+def test_builds_and_maintenance_do_not_share_the_lifecycle_queue():
+    assert _route(tasks.create_environment_task)["queue"].name == BUILD_QUEUE
+    assert _route(tasks.prefetch_base_image_task)["queue"].name == MAINTENANCE_QUEUE
+    assert _route(tasks.refill_warm_pool_task)["queue"].name == MAINTENANCE_QUEUE
+    assert celery_app.conf.task_default_queue == LIFECYCLE_QUEUE
+
+
+def test_long_tasks_are_acked_late_one_at_a_time():
+    assert celery_app.conf.task_acks_late is True
+    assert celery_app.conf.worker_prefetch_multiplier == 1
+    assert celery_app.conf.broker_transport_options["visibility_timeout"] >= 3600
+
+
+class _FakeQuery:
+    def __init__(self, row):
+        self._row = row
+
+    def filter(self, *_args):
+        return self
+
+    def first(self):
+        return self._row
+
+
+class _FakeSession:
+    def __init__(self, row):
+        self._row = row
+        self.closed = False
+
+    def query(self, _model):
+        return _FakeQuery(self._row)
+
+    def close(self):
+        self.closed = True
+
+
+def test_redelivered_create_task_leaves_running_environment_alone(monkeypatch):
+    env = SimpleNamespace(id="env-1", name="ready", status="running")
+    session = _FakeSession(env)
+    monkeypatch.setattr(tasks, "SessionLocal", lambda: session)
+    monkeypatch.setattr(tasks, "get_task_docker", lambda: pytest.fail("redelivery must not touch Docker"))
+
+    result = tasks.create_environment_task.run("env-1")
+
+    assert "already running" in result
+    assert env.status == "running" and session.closed
+
+
+def test_redelivered_create_task_adopts_running_container_and_removes_stopped_one():
+    removed = []
+
+    def _container(status):
+        return SimpleNamespace(status=status, remove=lambda force: removed.append(status))
+
+    containers = {"running": _container("running"), "exited": _container("exited")}
+
+    def _get(name):
+        if name not in containers:
+            raise docker.errors.NotFound("missing")
+        return containers[name]
+
+    client = SimpleNamespace(containers=SimpleNamespace(get=_get))
+
+    assert tasks._adopt_existing_container(client, "running") is True
+    assert tasks._adopt_existing_container(client, "exited") is False
+    assert tasks._adopt_existing_container(client, "absent") is False
+    assert removed == ["exited"]
@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import threading
 import types
 import uuid
 
@@ -283,3 +284,165 @@ def test_call_worker_api_preserves_auth_http_status(monkeypatch):
 
     assert exc_info.value.code == "worker_auth_failed"
     assert exc_info.value.status_code == 401
+
+
+def test_worker_http_clients_are_pooled_per_base_url(monkeypatch):
+    created = []
+
+    def _handler(request):
+        return httpx.Response(200, json={"status": "ok", "path": request.url.path})
+
+    def _fake_create():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(worker_registry, "_create_worker_http_client", _fake_create)
+    monkeypatch.setattr(worker_registry, "_worker_http_clients", {})
+
+    async def _run():
+        for _ in range(3):
+            status, body = await worker_registry._request_worker_json(
+                base_url="http://worker.local/",
+                api_token="token",
+                method="GET",
+                path="/api/worker/environments",
+                timeout=2.0,
+            )
+            assert status == 200
+            assert body["path"] == "/api/worker/environments"
+        status, _payload = await worker_registry._request_worker_health("http://worker.local", "token", 2.0)
+        assert status == 200
+        assert len(created) == 1
+
+        await worker_registry.close_worker_http_client("http://worker.local")
+        assert created[0].is_closed
+        await worker_registry._request_worker_health("http://worker.local", "token", 2.0)
+        assert len(created) == 2
+
+        await worker_registry.close_all_worker_http_clients()
+        assert created[1].is_closed
+        assert worker_registry._worker_http_clients == {}
+
+    asyncio.run(_run())
+
+
+def test_close_worker_http_client_closes_on_the_owning_loop(monkeypatch):
+    closed_on = []
+    owner_loop = asyncio.new_event_loop()
+    owner_thread = threading.Thread(target=owner_loop.run_forever, daemon=True)
+    owner_thread.start()
+
+    class _Client:
+        is_closed = False
+
+        async def aclose(self):
+            closed_on.append(asyncio.get_running_loop())
+            self.is_closed = True
+
+    client = _Client()
+    monkeypatch.setattr(worker_registry, "_worker_http_clients", {"http://worker.local": (owner_loop, client)})
+
+    try:
+        asyncio.run(worker_registry.close_worker_http_client("http://worker.local"))
+    finally:
+        owner_loop.call_soon_threadsafe(owner_loop.stop)
+        owner_thread.join(timeout=2)
+        owner_loop.close()
+
+    assert client.is_closed
+    assert closed_on == [owner_loop]
+    assert worker_registry._worker_http_clients == {}
+
+
+def test_close_worker_http_client_closes_clients_left_by_a_stopped_loop(monkeypatch):
+    dead_loop = asyncio.new_event_loop()
+    dead_loop.close()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    monkeypatch.setattr(worker_registry, "_worker_http_clients", {"http://worker.local": (dead_loop, client)})
+
+    asyncio.run(worker_registry.close_worker_http_client("http://worker.local"))
+
+    assert client.is_closed
+
+
+def test_call_worker_api_fails_fast_while_circuit_is_open(monkeypatch):
+    worker = WorkerServer(
+        id=uuid.uuid4(),
+        name="worker-1",
+        base_url="http://worker.local",
+        api_token_encrypted="enc",
+    )
+    calls = {"count": 0, "fail": True}
+    clock = {"now": 1000.0}
+
+    def _fake_build(_worker):
+        return worker_registry.WorkerConnectionConfig(
+            id=str(_worker.id),
+            name=_worker.name,
+            base_url=_worker.base_url,
+            api_token="token",
+        )
+
+    async def _fake_request(**_kwargs):
+        calls["count"] += 1
+        if calls["fail"]:
+            raise httpx.ConnectError("connect failed")
+        return 200, {"status": "ok"}
+
+    monkeypatch.setattr(worker_registry, "build_worker_connection_config", _fake_build)
+    monkeypatch.setattr(worker_registry, "_request_worker_json", _fake_request)
+    monkeypatch.setattr(worker_registry.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setenv("LYRA_WORKER_CIRCUIT_FAILURE_THRESHOLD", "2")
+    monkeypatch.setenv("LYRA_WORKER_CIRCUIT_RESET_SECONDS", "10")
+
+    def _call():
+        return asyncio.run(worker_registry.call_worker_api(worker, method="GET", path="/api/worker/health"))
+
+    for _ in range(2):
+        with pytest.raises(worker_registry.WorkerRequestError) as exc_info:
+            _call()
+        assert exc_info.value.code == "worker_unreachable"
+    assert worker_registry.get_worker_circuit_state(str(worker.id)) == worker_registry.WORKER_CIRCUIT_OPEN
+
+    with pytest.raises(worker_registry.WorkerRequestError) as exc_info:
+        _call()
+    assert exc_info.value.code == "worker_circuit_open"
+    assert calls["count"] == 2
+
+    clock["now"] += 11
+    calls["fail"] = False
+    assert _call() == {"status": "ok"}
+    assert calls["count"] == 3
+    assert worker_registry.get_worker_circuit_state(str(worker.id)) == worker_registry.WORKER_CIRCUIT_CLOSED
+
+
+def test_build_worker_connection_config_caches_decrypted_token(monkeypatch):
+    calls = []
+
+    def _fake_decrypt(value):
+        calls.append(value)
+        return f"plain-{value}"
+
+    monkeypatch.setattr(worker_registry, "decrypt_secret", _fake_decrypt)
+    worker = WorkerServer(
+        id=uuid.uuid4(),
+        name="worker-1",
+        base_url="http://worker.local",
+        api_token_encrypted="cipher-1",
+    )
+
+    assert worker_registry.build_worker_connection_config(worker).api_token == "plain-cipher-1"
+    worker.base_url = "http://worker-moved.local/"
+    moved = worker_registry.build_worker_connection_config(worker)
+    assert moved.api_token == "plain-cipher-1"
+    assert moved.base_url == "http://worker-moved.local"
+    assert calls == ["cipher-1"]
+
+    worker.api_token_encrypted = "cipher-2"
+    assert worker_registry.build_worker_connection_config(worker).api_token == "plain-cipher-2"
+    assert calls == ["cipher-1", "cipher-2"]
+
+    worker_registry.invalidate_worker_connection_config(str(worker.id))
+    worker_registry.build_worker_connection_config(worker)
+    assert calls == ["cipher-1", "cipher-2", "cipher-2"]
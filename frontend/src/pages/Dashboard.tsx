@@ -46,6 +46,9 @@ interface Environment {
 const ENVS_CACHE_KEY = 'lyra.dashboard.environments';
 const NOTICE_OPEN_KEY = 'lyra.dashboard.notice_open';
 const MIN_REFRESH_SPIN_MS = 900;
+const ENVS_POLL_INTERVAL_MS = 5000;
+const STREAM_RECONNECT_MIN_MS = 1000;
+const STREAM_RECONNECT_MAX_MS = 60000;
 
 export default function Dashboard() {
   const { showToast } = useToast();
@@ -324,11 +327,6 @@ export default function Dashboard() {
       const res = await axios.get('environments/');
       setEnvironments(res.data);
       setHasLoadedOnce(true);
-      try {
-        window.localStorage.setItem(ENVS_CACHE_KEY, JSON.stringify(res.data));
-      } catch {
-        // Ignore cache write failures
-      }
     } catch (error) {
       console.error("Failed to fetch environments", error);
     } finally {
@@ -592,12 +590,84 @@ export default function Dashboard() {
 
   useEffect(() => {
     fetchEnvironments({ showLoading: true });
-    const interval = setInterval(() => {
-      fetchEnvironments();
-    }, 5000);
-    return () => clearInterval(interval);
+    let pollTimer: ReturnType<typeof setInterval> | null = null;
+    const startPolling = () => {
+      if (pollTimer !== null) return;
+      pollTimer = setInterval(() => {
+        fetchEnvironments();
+      }, ENVS_POLL_INTERVAL_MS);
+    };
+    const stopPolling = () => {
+      if (pollTimer === null) return;
+      clearInterval(pollTimer);
+      pollTimer = null;
+    };
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
+    }
+
+    // The server sends one snapshot and then only per-environment deltas.
+    let source: EventSource | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let reconnectDelay = STREAM_RECONNECT_MIN_MS;
+    const upsertEnvironment = (event: Event) => {
+      const next = JSON.parse((event as MessageEvent).data) as Environment;
+      setEnvironments((prev) => {
+        const index = prev.findIndex((env) => env.id === next.id);
+        if (index === -1) return [...prev, next];
+        const updated = [...prev];
+        updated[index] = next;
+        return updated;
+      });
+    };
+    const connect = () => {
+      reconnectTimer = null;
+      const stream = new EventSource(`${axios.defaults.baseURL ?? '/api'}/environments/stream`);
+      source = stream;
+      stream.addEventListener('snapshot', (event) => {
+        const payload = JSON.parse((event as MessageEvent).data) as { environments: Environment[] };
+        setEnvironments(payload.environments);
+        setHasLoadedOnce(true);
+        reconnectDelay = STREAM_RECONNECT_MIN_MS;
+        stopPolling();
+      });
+      stream.addEventListener('environment.created', upsertEnvironment);
+      stream.addEventListener('environment.updated', upsertEnvironment);
+      stream.addEventListener('environment.deleted', (event) => {
+        const { id } = JSON.parse((event as MessageEvent).data) as { id: string };
+        setEnvironments((prev) => prev.filter((env) => env.id !== id));
+      });
+      // A failing endpoint or a proxy dropping the connection would leave the list stale:
+      // poll until a reconnected stream delivers a fresh snapshot.
+      stream.onerror = () => {
+        stream.close();
+        if (source !== stream) return;
+        source = null;
+        fetchEnvironments();
+        startPolling();
+        reconnectTimer = setTimeout(connect, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, STREAM_RECONNECT_MAX_MS);
+      };
+    };
+    connect();
+    return () => {
+      source?.close();
+      source = null;
+      if (reconnectTimer !== null) clearTimeout(reconnectTimer);
+      stopPolling();
+    };
   }, []);
 
+  useEffect(() => {
+    if (!hasLoadedOnce) return;
+    try {
+      window.localStorage.setItem(ENVS_CACHE_KEY, JSON.stringify(environments));
+    } catch {
+      // Ignore cache write failures
+    }
+  }, [environments, hasLoadedOnce]);
+
   useEffect(() => {
     if (!hasAnnouncement) {
       setIsNoticeOpen(false);
@@ -576,8 +576,22 @@ export default function Provisioning() {
     setIsSubmitting(true);
 
     try {
-      const envRes = await axios.get('environments/');
-      const envs: EnvironmentSummary[] = Array.isArray(envRes.data) ? envRes.data : [];
+      // Only stopped GPU environments on the chosen target can conflict; let the server filter them.
+      const envs: EnvironmentSummary[] = [];
+      let cursor: string | undefined;
+      do {
+        const envRes = await axios.get('environments/', {
+          params: {
+            status: 'stopped',
+            uses_gpu: true,
+            worker_server_id: executionTarget,
+            limit: 500,
+            cursor,
+          },
+        });
+        if (Array.isArray(envRes.data)) envs.push(...envRes.data);
+        cursor = envRes.headers['x-next-cursor'] || undefined;
+      } while (cursor);
       const selectedSet = new Set(selectedGpuIndices);
       const selectedWorkerId = executionTarget === 'host' ? null : executionTarget;
       const stoppedConflicts = envs